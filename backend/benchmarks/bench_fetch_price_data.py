@@ -0,0 +1,111 @@
+"""
+Microbenchmark: per-ticker quote extraction loop (the original
+fetch_price_data body) vs the vectorized extract_quote_columns.
+
+Run from backend/:
+    python benchmarks/bench_fetch_price_data.py [num_tickers] [repeats]
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.market_data import extract_quote_columns  # noqa: E402
+
+
+def make_download_frame(num_tickers, days=5, seed=0):
+    """
+    Synthetic yf.download(..., group_by='ticker') result with some gaps:
+    a few tickers missing their latest bar and a few with no data at all.
+    """
+    rng = np.random.default_rng(seed)
+    tickers = [f"T{i:04d}" for i in range(num_tickers)]
+    fields = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+    index = pd.bdate_range(end="2026-01-09", periods=days)
+
+    values = rng.uniform(10, 500, size=(days, num_tickers * len(fields)))
+    frame = pd.DataFrame(values, index=index, columns=pd.MultiIndex.from_product([tickers, fields]))
+
+    close = frame.xs("Close", axis=1, level=1)
+    close.iloc[-1, ::17] = np.nan
+    close.iloc[:, ::53] = np.nan
+    for ticker in tickers:
+        frame[(ticker, "Close")] = close[ticker]
+
+    return frame, tickers
+
+
+def extract_loop(data, tickers):
+    """
+    The original per-ticker loop from fetch_price_data.
+    """
+    results = {}
+
+    def extract_from_df(df, ticker=None):
+        if df.empty:
+            return None
+
+        if isinstance(df.columns, pd.MultiIndex):
+            if ticker and (ticker, 'Close') in df.columns:
+                closes = df[(ticker, 'Close')].dropna()
+            else:
+                return None
+        else:
+            if 'Close' not in df.columns:
+                return None
+            closes = df['Close'].dropna()
+
+        if len(closes) == 0:
+            return None
+
+        current = float(closes.iloc[-1])
+        prev = None
+        if len(closes) > 1:
+            prev = float(closes.iloc[-2])
+
+        return current, prev
+
+    if len(tickers) == 1:
+        ticker = tickers[0]
+        res = extract_from_df(data, ticker=ticker)
+        if res:
+            results[ticker] = res
+    else:
+        for ticker in tickers:
+            if ticker in data.columns.get_level_values(0):
+                res = extract_from_df(data[ticker])
+                if res:
+                    results[ticker] = res
+
+    return results
+
+
+def main():
+    num_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    data, tickers = make_download_frame(num_tickers)
+
+    # Both paths must agree before timing means anything
+    expected = extract_loop(data, tickers)
+    actual = extract_quote_columns(data, tickers).to_dict()
+    assert expected.keys() == actual.keys(), "ticker sets differ"
+    for ticker, (current, prev) in expected.items():
+        assert np.isclose(actual[ticker][0], current)
+        assert (prev is None and actual[ticker][1] is None) or np.isclose(actual[ticker][1], prev)
+
+    loop_time = min(timeit.repeat(lambda: extract_loop(data, tickers), number=1, repeat=repeats))
+    vector_time = min(timeit.repeat(lambda: extract_quote_columns(data, tickers), number=1, repeat=repeats))
+
+    print(f"{num_tickers} tickers, best of {repeats}")
+    print(f"  per-ticker loop : {loop_time * 1000:8.2f} ms")
+    print(f"  vectorized      : {vector_time * 1000:8.2f} ms")
+    print(f"  speedup         : {loop_time / vector_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
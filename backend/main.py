@@ -1,22 +1,82 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from sse_starlette.sse import EventSourceResponse
 import asyncio
 from functools import partial
 import subprocess
 import boto3
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import ClientError
 import re
-import pandas as pd
+import numpy as np
 import yfinance as yf
 import json
+import base64
 import sqlite3
 from pydantic import BaseModel
-import random
 from typing import List
-from services.finnhub_service import fetch_company_news, fetch_market_news
+from services.finnhub_service import fetch_company_news, fetch_market_news, init_http_client, close_http_client, finnhub_limiter, set_shared_cache
+from services.db import ConnectionPool
+from services.summary_cache import SummaryCache
+from services.history_store import HistoryStore
+from services.symbol_master import SymbolMaster
+from services.indicators import IndicatorEngine, stack_histories
+from services.explore_refresh import ExploreRefreshPlanner, load_universe
+from services.explore_snapshot import ExploreSnapshot, SORT_ORDERS, DEFAULT_SORT
+from services.cache import TTLCache, StaleWhileRevalidate
+from services.market_data import EMPTY_QUOTES, extract_quote_columns
+from services.quote_hub import QuoteHub
+from services.rate_limit import AdaptiveLimiter, THROTTLED, RETRYABLE
+from services.executors import yfinance_executor, bedrock_executor, db_executor, compute_executor, executor_stats, shutdown_executors
+from services.scheduler import LoopScheduler
+from services.shared_cache import SharedCache
+from services.leader import LeaderLease
+from services.config import (
+    SUMMARY_CACHE_TTL_SECONDS,
+    SUMMARY_CACHE_MAX_ENTRIES,
+    PINNED_OVERVIEW_CONCURRENCY,
+    PINNED_OVERVIEW_TICKER_TIMEOUT,
+    PINNED_OVERVIEW_BATCH_TOKEN_BUDGET,
+    PINNED_OVERVIEW_BATCH_MAX_TICKERS,
+    HISTORY_REFRESH_SECONDS,
+    HISTORY_INTRADAY_REFRESH_SECONDS,
+    HISTORY_RETENTION_DAYS,
+    EXPLORE_REFRESH_MINUTES,
+    EXPLORE_BATCH_SIZE,
+    EXPLORE_PRIORITY_SHARE,
+    EXPLORE_TOP_VIEWED,
+    FAVORITES_CACHE_TTL_SECONDS,
+    FAVORITES_CACHE_MAX_ENTRIES,
+    SYMBOL_NEGATIVE_TTL_SECONDS,
+    PINNED_BATCH_MAX_TICKERS,
+    ANALYSIS_CACHE_TTL_SECONDS,
+    ANALYSIS_CACHE_MAX_ENTRIES,
+    MARKET_SUMMARY_REFRESH_MINUTES,
+    MARKET_SUMMARY_FRESH_SECONDS,
+    MARKET_SUMMARY_DAYS,
+    PINNED_OVERVIEW_REFRESH_MINUTES,
+    PINNED_OVERVIEW_FRESH_SECONDS,
+    PINNED_OVERVIEW_ACTIVE_SECONDS,
+    PINNED_OVERVIEW_PREWARM_CONCURRENCY,
+    PINNED_OVERVIEW_MAX_CACHED,
+    QUOTE_POLL_SECONDS,
+    QUOTE_MAX_TICKERS_PER_CLIENT,
+    BEDROCK_RATE_PER_SECOND,
+    BEDROCK_BURST,
+    BEDROCK_MAX_CONCURRENCY,
+    UPSTREAM_MAX_ATTEMPTS,
+    UPSTREAM_RETRY_RATIO,
+    WORKER_COUNT,
+    SCHEDULER_JITTER,
+    LEADER_LEASE_SECONDS,
+    SHARED_CACHE_MAX_ENTRIES,
+    SHARED_CACHE_SYNC_SECONDS,
+    EXPLORE_SNAPSHOT_SYNC_SECONDS,
+)
 import os
-from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime
 import threading
+import time
 
 
 # Bedrock setup - Replace with your actual values after creating guardrail
@@ -25,25 +85,119 @@ MODEL_ID = 'us.anthropic.claude-3-5-sonnet-20240620-v1:0'  # Claude Sonnet (good
 GUARDRAIL_ID = 'f1mk0d93g9xs'  # From create_guardrail response
 GUARDRAIL_VERSION = 'DRAFT'  # Or specific version e.g. 'USD5Z3EXAMPLE'
 
-bedrock_runtime = boto3.client('bedrock-runtime', region_name=BEDROCK_REGION)
+# Retries are handled by bedrock_limiter, so botocore makes a single attempt
+bedrock_runtime = boto3.client(
+    'bedrock-runtime',
+    region_name=BEDROCK_REGION,
+    config=BotoConfig(retries={"total_max_attempts": 1, "mode": "standard"})
+)
+
+BEDROCK_THROTTLING_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"}
+BEDROCK_RETRYABLE_CODES = {"ServiceUnavailableException", "InternalServerException", "ModelNotReadyException", "ModelTimeoutException"}
+
+
+def _classify_bedrock_error(exc):
+    if isinstance(exc, ClientError):
+        code = exc.response.get("Error", {}).get("Code")
+        if code in BEDROCK_THROTTLING_CODES:
+            return THROTTLED
+        if code in BEDROCK_RETRYABLE_CODES:
+            return RETRYABLE
+    return None
+
+
+# Every Bedrock call goes through this: rate, in-flight cap and retries
+bedrock_limiter = AdaptiveLimiter(
+    "bedrock",
+    _classify_bedrock_error,
+    # This worker's share of the deployment-wide limits
+    rate=BEDROCK_RATE_PER_SECOND / WORKER_COUNT,
+    burst=max(1.0, BEDROCK_BURST / WORKER_COUNT),
+    max_concurrency=max(1, BEDROCK_MAX_CONCURRENCY // WORKER_COUNT),
+    max_attempts=UPSTREAM_MAX_ATTEMPTS,
+    retry_ratio=UPSTREAM_RETRY_RATIO,
+)
 
 # --- Database Setup ---
 DB_FILE = "favorites.db"
 
-# Add caching at the top
-EXPLORE_CACHE = {
-    "data": [],
-    "timestamp": None,
-    "ttl": 300  # 5 minutes cache
-}
+# Persistent per-thread connections; WAL and other pragmas are applied once per connection.
+# Async reads and writes run on the dedicated db executor.
+db = ConnectionPool(DB_FILE, executor=db_executor)
+
+# Bedrock summaries keyed by a hash of model ID, prompt template and article texts
+summary_cache = SummaryCache(db, ttl=SUMMARY_CACHE_TTL_SECONDS, max_entries=SUMMARY_CACHE_MAX_ENTRIES)
+
+# Full /analyze results keyed by ticker, period, last bar timestamp and model
+analysis_cache = SummaryCache(db, ttl=ANALYSIS_CACHE_TTL_SECONDS, max_entries=ANALYSIS_CACHE_MAX_ENTRIES, table="analysis_cache")
+
+# Technical indicators for /analyze, checkpointed per (ticker, period) so new bars fold in incrementally
+indicator_engine = IndicatorEngine()
+BENCHMARK_TICKER = "SPY"
+
+# OHLCV bars per (ticker, interval), topped up incrementally from yfinance.
+# A re-based series drops its indicator checkpoints with it.
+history_store = HistoryStore(
+    db,
+    refresh_seconds=HISTORY_REFRESH_SECONDS,
+    intraday_refresh_seconds=HISTORY_INTRADAY_REFRESH_SECONDS,
+    on_rebase=lambda ticker, interval: indicator_engine.invalidate(ticker),
+)
+
+# Cache tier shared by all uvicorn workers, behind the in-process news, market summary and overview caches
+shared_cache = SharedCache(db, max_entries=SHARED_CACHE_MAX_ENTRIES)
+
+# Only the worker holding this lease runs the scheduled jobs
+leader_lease = LeaderLease(db, "background_jobs", ttl=LEADER_LEASE_SECONDS)
+
+# Last good market summary per `days`, refreshed by the scheduler and on stale reads
+market_summary_swr = StaleWhileRevalidate(
+    fresh_for=MARKET_SUMMARY_FRESH_SECONDS,
+    shared=shared_cache, namespace="market_summary", sync_every=SHARED_CACHE_SYNC_SECONDS
+)
+
+# Pinned overviews per (userId, days, batch), pre-warmed for recently active users
+pinned_overview_swr = StaleWhileRevalidate(
+    fresh_for=PINNED_OVERVIEW_FRESH_SECONDS,
+    shared=shared_cache, namespace="pinned_overview", sync_every=SHARED_CACHE_SYNC_SECONDS,
+    max_keys=PINNED_OVERVIEW_MAX_CACHED,
+)
+overview_active_users = {}  # userId -> last overview request in this worker; published to overview_activity
+
+# The app's event loop, for scheduling async work from request worker threads
+main_loop = None
+
+# Ticker -> company name, so pinning doesn't need yfinance .info for known tickers
+symbol_master = SymbolMaster(db, yfinance_executor, negative_ttl=SYMBOL_NEGATIVE_TTL_SECONDS)
+
+# Chooses which slice of the explore universe each refresh run updates
+explore_planner = ExploreRefreshPlanner(
+    batch_size=EXPLORE_BATCH_SIZE,
+    interval_seconds=EXPLORE_REFRESH_MINUTES * 60,
+    priority_share=EXPLORE_PRIORITY_SHARE,
+    top_viewed=EXPLORE_TOP_VIEWED,
+    db=db
+)
+
+# Immutable in-memory copy of explore_stocks, rebuilt and swapped after each refresh
+explore_snapshot = ExploreSnapshot.empty()
+
+# userId -> frozenset of pinned tickers; dropped on pin/unpin here, and
+# within SHARED_CACHE_SYNC_SECONDS in the other workers via favorites_changes
+favorites_cache = TTLCache(maxsize=FAVORITES_CACHE_MAX_ENTRIES, ttl=FAVORITES_CACHE_TTL_SECONDS)
+
+# Wall-clock time of this worker's last sync_worker_state run
+last_worker_sync = time.time()
+
+# Shared poller behind /ws/quotes; fetches the union of subscribed tickers once per interval
+quote_hub = None
+
 # Modify your init_db function to include the explore_stocks table
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
+    # WAL mode is enabled by the pool when it opens its first connection
+    conn = db.connection()
     cursor = conn.cursor()
 
-    # Enable WAL mode for better concurrency
-    cursor.execute("PRAGMA journal_mode=WAL;")
-
     # Create favorites table with userId
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS favorites (
@@ -67,11 +221,51 @@ def init_db():
         )
     """)
 
+    # Keyset pagination walks (currentPrice DESC, ticker) straight off this index
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_explore_stocks_price
+        ON explore_stocks(currentPrice DESC, ticker)
+    """)
+
+    # Single-row table versioning the explore_stocks snapshot
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS explore_meta (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            snapshot_id INTEGER NOT NULL,
+            updated_at TIMESTAMP,
+            row_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO explore_meta (id, snapshot_id, row_count) VALUES (1, 0, 0)")
+    # Databases from before explore_meta existed already hold a snapshot
+    cursor.execute("UPDATE explore_meta SET row_count = (SELECT COUNT(*) FROM explore_stocks) WHERE id = 1")
+
+    # Last pin/unpin per user, polled by every worker to drop its cached favorites
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS favorites_changes (
+            user_id TEXT PRIMARY KEY,
+            changed_at REAL NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_favorites_changes_changed_at ON favorites_changes(changed_at)")
+
+    # Last overview request per user across all workers, for the leader's pre-warming
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS overview_activity (
+            user_id TEXT PRIMARY KEY,
+            last_seen REAL NOT NULL
+        )
+    """)
+    conn.commit()
+
 
 # --- Pydantic Models ---
 class StockFavorite(BaseModel):
     ticker: str
 
+class PinnedBatchRequest(BaseModel):
+    tickers: List[str]
+
 class NewsArticle(BaseModel):
     title: str
     summary: str
@@ -122,7 +316,7 @@ def migrate_favorites_table():
     Migrate existing favorites table to include user_id column.
     This is a one-time migration.
     """
-    conn = sqlite3.connect(DB_FILE)
+    conn = db.connection()
     cursor = conn.cursor()
 
     try:
@@ -169,16 +363,15 @@ def migrate_favorites_table():
     except Exception as e:
         print(f"Migration error: {e}")
         conn.rollback()
-    finally:
-        conn.close()
 
-async def fetch_price_data(tickers):
+async def fetch_price_columns(tickers):
     """
-    Fetches current price and previous close for a list of tickers using yfinance bulk download.
-    Returns a dictionary: {ticker: (current_price, previous_close)}
+    Fetches quotes for a list of tickers using yfinance bulk download.
+    Returns a QuoteColumns snapshot (tickers, last close, previous close,
+    change, percent change) computed in one vectorized pass.
     """
     if not tickers:
-        return {}
+        return EMPTY_QUOTES
 
     if isinstance(tickers, str):
         tickers = [tickers]
@@ -189,300 +382,744 @@ async def fetch_price_data(tickers):
         # period="5d" ensures we have enough history for previous close even after weekends
         # group_by='ticker' organizes columns by ticker
         # Run blocking yf.download in executor
-        data = await loop.run_in_executor(None, partial(yf.download, tickers, period="5d", interval="1d", group_by='ticker', progress=False, threads=True))
+        data = await loop.run_in_executor(yfinance_executor, partial(yf.download, tickers, period="5d", interval="1d", group_by='ticker', progress=False, threads=True))
     except Exception as e:
         print(f"Error downloading data: {e}")
-        return {}
+        return EMPTY_QUOTES
 
-    results = {}
-
-    # Helper to extract data from a single-ticker DataFrame
-    def extract_from_df(df, ticker=None):
-        if df.empty:
-            return None
-
-        # Handle MultiIndex columns (ticker, price_type)
-        if isinstance(df.columns, pd.MultiIndex):
-            # If ticker is provided, access that column level
-            if ticker and (ticker, 'Close') in df.columns:
-                closes = df[(ticker, 'Close')].dropna()
-            else:
-                return None
-        else:
-            # Regular columns
-            if 'Close' not in df.columns:
-                return None
-            closes = df['Close'].dropna()
-
-        if len(closes) == 0:
-            return None
-
-        current = float(closes.iloc[-1])
-        prev = None
-        if len(closes) > 1:
-            prev = float(closes.iloc[-2])
-
-        return current, prev
-
-    # Handle the structure of the returned DataFrame
-    if len(tickers) == 1:
-        # When only one ticker, yfinance still returns MultiIndex with ticker name
-        ticker = tickers[0]
-        res = extract_from_df(data, ticker=ticker)
-        if res:
-            results[ticker] = res
-    else:
-        # MultiIndex columns: top level is Ticker
-        for ticker in tickers:
-            # Check if ticker is in the columns (it might be missing if download failed)
-            if ticker in data.columns.get_level_values(0):
-                res = extract_from_df(data[ticker])
-                if res:
-                    results[ticker] = res
+    return extract_quote_columns(data, tickers)
 
-    return results
 
-async def summarize_news_with_bedrock(ticker, news_texts, news_urls=None):
+async def fetch_price_data(tickers):
     """
-    Summarizes news articles using AWS Bedrock Claude model.
-    Returns a dict with summary, sentiment, sources, and disclaimer.
+    Fetches current price and previous close for a list of tickers using yfinance bulk download.
+    Returns a dictionary: {ticker: (current_price, previous_close)}
     """
-    if not news_texts or all(not text.strip() for text in news_texts):
-        return {
-            "summary": "No news content available to summarize.",
-            "sentiment": "neutral",
-            "sources": news_urls or [],
-            "disclaimer": "Summarized news. Not financial advice."
-        }
+    quotes = await fetch_price_columns(tickers)
+    return quotes.to_dict()
 
-    # Ensure articles are trimmed to avoid overloading the context
-    cleaned_texts = [t[:2000] for t in news_texts[:5] if t and t.strip()]
 
-    if not cleaned_texts:
-        return {
-            "summary": "No valid news content after processing.",
-            "sentiment": "neutral",
-            "sources": news_urls or [],
-            "disclaimer": "Summarized news. Not financial advice."
-        }
+NEWS_SUMMARY_PROMPT = """Analyze the following news articles about {ticker} and provide a summary.
 
-    news_content = "\n\n".join(cleaned_texts)
+News Articles:
+{news_content}
 
-    loop = asyncio.get_running_loop()
-    try:
-        # Call Bedrock with improved prompt
-        resp = await loop.run_in_executor(None, partial(bedrock_runtime.converse,
-            modelId=MODEL_ID,
-            messages=[{
-                "role": "user",
-                "content": [{
-                    "text": f"""Analyze the following news articles about {ticker} and provide a summary.
+Provide your response as a JSON object with exactly two keys:
+1. "summary": A concise 2-3 sentence summary of the key facts and developments
+2. "sentiment": One of "positive", "negative", or "neutral"
+
+Return ONLY the JSON object, no other text."""
+
+MARKET_SUMMARY_PROMPT = """Analyze the following news articles about {ticker} and provide a summary.
 
 News Articles:
 {news_content}
 
 Provide your response as a JSON object with exactly two keys:
-1. "summary": A concise 2-3 sentence summary of the key facts and developments
+1. "summary": An in depth explanation, consisting of at least 200 words
 2. "sentiment": One of "positive", "negative", or "neutral"
 
 Return ONLY the JSON object, no other text."""
-                }]
-            }],
-            inferenceConfig={
-                "maxTokens": 600,
-                "temperature": 0.3
-            }
-        ))
 
-        # Extract the response text
-        raw_text = resp['output']['message']['content'][0]['text'].strip()
-        print(f"--- Bedrock Response for {ticker} ---")
-        print(raw_text)
-        print("--- End Response ---")
+SUMMARY_INFERENCE_CONFIG = {
+    "maxTokens": 600,
+    "temperature": 0.3
+}
 
-        if not raw_text:
-            return {
-                "summary": "Model returned empty response.",
-                "sentiment": "neutral",
-                "sources": news_urls or [],
-                "disclaimer": "Summarized news. Not financial advice."
-            }
 
-        # Try to parse as JSON
-        # First, try to extract JSON from markdown code blocks
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', raw_text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            # Try to find JSON object directly
-            json_match = re.search(r'\{.*\}', raw_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-            else:
-                # No JSON found, treat entire response as summary
-                return {
-                    "summary": raw_text[:500],  # Limit length
-                    "sentiment": "neutral",
-                    "sources": news_urls or [],
-                    "disclaimer": "Summarized news. Not financial advice."
-                }
-
-        # Parse the JSON
+async def converse(**kwargs):
+    """
+    Runs a blocking bedrock_runtime.converse call off the event loop,
+    within the Bedrock rate limit and retrying throttling.
+    """
+    loop = asyncio.get_running_loop()
+    return await bedrock_limiter.call(loop.run_in_executor, bedrock_executor, partial(bedrock_runtime.converse, **kwargs))
+
+
+async def stream_converse(**kwargs):
+    """
+    Async generator over the text deltas of a bedrock_runtime.converse_stream call.
+    The blocking event stream is drained on a worker thread and handed to the
+    event loop through a queue, so the first token is yielded as soon as it arrives.
+    Opening the stream goes through bedrock_limiter, and the limiter slot is
+    held until the stream has been drained; once tokens have been yielded a
+    failure is raised rather than retried.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+    cancelled = threading.Event()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop already closed, nobody is listening anymore
+            pass
+
+    def pump(response):
         try:
-            data = json.loads(json_str)
+            for event in response["stream"]:
+                if cancelled.is_set():
+                    break
+                text = event.get("contentBlockDelta", {}).get("delta", {}).get("text")
+                if text:
+                    put(text)
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
 
-            # Validate required keys
-            summary = data.get("summary", "").strip()
-            sentiment = data.get("sentiment", "neutral").lower()
+    pumping = False
 
-            # Validate sentiment value
-            if sentiment not in ["positive", "negative", "neutral"]:
-                sentiment = "neutral"
+    async def open_and_pump():
+        nonlocal pumping
+        response = await loop.run_in_executor(bedrock_executor, partial(bedrock_runtime.converse_stream, **kwargs))
+        pumping = True
+        # Hold the limiter slot until the bedrock thread has drained the stream
+        await loop.run_in_executor(bedrock_executor, pump, response)
 
-            if not summary:
-                summary = "No summary provided by model."
+    def opened(task):
+        if not task.cancelled() and task.exception() is not None:
+            queue.put_nowait(task.exception())
 
-            return {
-                "summary": summary,
-                "sentiment": sentiment,
-                "sources": news_urls or [],
-                "disclaimer": "Summarized news. Not financial advice."
-            }
+    task = asyncio.ensure_future(bedrock_limiter.call(open_and_pump))
+    task.add_done_callback(opened)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Stop draining the stream if the client went away mid-response; the
+        # slot is freed once pump notices. Before that, just stop waiting for one
+        cancelled.set()
+        if not pumping:
+            task.cancel()
 
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing error: {e}")
-            print(f"Attempted to parse: {json_str[:200]}")
 
-            # Fallback: use raw text as summary
-            return {
-                "summary": raw_text[:500],
-                "sentiment": "neutral",
-                "sources": news_urls or [],
-                "disclaimer": "Summarized news. Not financial advice."
-            }
+def extract_json_text(raw_text):
+    """
+    Returns the JSON object embedded in a model response (fenced or bare),
+    or None if the response contains no JSON object.
+    """
+    json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', raw_text, re.DOTALL)
+    if json_match:
+        return json_match.group(1)
+
+    json_match = re.search(r'\{.*\}', raw_text, re.DOTALL)
+    if json_match:
+        return json_match.group(0)
+
+    return None
+
+
+def _parse_summary_response(raw_text):
+    """
+    Turns the model's raw summary text into {"summary", "sentiment"}.
+    """
+    if not raw_text:
+        return {"summary": "Model returned empty response.", "sentiment": "neutral"}
+
+    json_str = extract_json_text(raw_text)
+    if json_str is None:
+        # No JSON found, treat entire response as summary
+        return {"summary": raw_text[:500], "sentiment": "neutral"}
+
+    # Parse the JSON
+    try:
+        data = json.loads(json_str)
+
+        # Validate required keys
+        summary = data.get("summary", "").strip()
+        sentiment = data.get("sentiment", "neutral").lower()
+
+        # Validate sentiment value
+        if sentiment not in ["positive", "negative", "neutral"]:
+            sentiment = "neutral"
+
+        if not summary:
+            summary = "No summary provided by model."
+
+        return {"summary": summary, "sentiment": sentiment}
+
+    except json.JSONDecodeError as e:
+        print(f"JSON parsing error: {e}")
+        print(f"Attempted to parse: {json_str[:200]}")
+
+        # Fallback: use raw text as summary
+        return {"summary": raw_text[:500], "sentiment": "neutral"}
+
+
+def _summary_error(e):
+    return {
+        "summary": f"Error generating summary: {str(e)[:100]}",
+        "sentiment": "error"
+    }
+
+
+def _summary_messages(ticker, cleaned_texts, prompt_template):
+    news_content = "\n\n".join(cleaned_texts)
+    return [{
+        "role": "user",
+        "content": [{
+            "text": prompt_template.format(ticker=ticker, news_content=news_content)
+        }]
+    }]
+
+
+async def _summarize_texts_with_bedrock(ticker, cleaned_texts, prompt_template):
+    """
+    Sends cleaned article texts to Bedrock and returns {"summary", "sentiment"}.
+    A sentiment of "error" marks a failed call, which is never cached.
+    """
+    try:
+        # Call Bedrock with improved prompt
+        resp = await converse(
+            modelId=MODEL_ID,
+            messages=_summary_messages(ticker, cleaned_texts, prompt_template),
+            inferenceConfig=SUMMARY_INFERENCE_CONFIG
+        )
+
+        # Extract the response text
+        raw_text = resp['output']['message']['content'][0]['text'].strip()
+        print(f"--- Bedrock Response for {ticker} ---")
+        print(raw_text)
+        print("--- End Response ---")
+
+        return _parse_summary_response(raw_text)
 
     except Exception as e:
         print(f"Bedrock API Error for {ticker}: {str(e)}")
         import traceback
         traceback.print_exc()
 
+        return _summary_error(e)
+
+
+def _article_texts_and_urls(articles):
+    news_texts = []
+    news_urls = []
+    for article in articles:
+        if isinstance(article, dict):
+            news_texts.append(article.get("summary", "") or "")
+            news_urls.append(article.get("url", "") or "")
+        else:
+            news_texts.append(getattr(article, "summary", "") or "")
+            news_urls.append(getattr(article, "url", "") or "")
+    return news_texts, news_urls
+
+
+def _clean_news_texts(news_texts):
+    # Ensure articles are trimmed to avoid overloading the context
+    return [t[:2000] for t in (news_texts or [])[:5] if t and t.strip()]
+
+
+async def _summarize_with_bedrock(ticker, news_texts, news_urls, prompt_template):
+    if not news_texts or all(not text.strip() for text in news_texts):
         return {
-            "summary": f"Error generating summary: {str(e)[:100]}",
-            "sentiment": "error",
+            "summary": "No news content available to summarize.",
+            "sentiment": "neutral",
+            "sources": news_urls or [],
+            "disclaimer": "Summarized news. Not financial advice."
+        }
+
+    cleaned_texts = _clean_news_texts(news_texts)
+
+    if not cleaned_texts:
+        return {
+            "summary": "No valid news content after processing.",
+            "sentiment": "neutral",
             "sources": news_urls or [],
             "disclaimer": "Summarized news. Not financial advice."
         }
 
-def update_explore_stocks():
+    # The ticker is part of the rendered prompt, so it is part of the key too
+    cache_key = summary_cache.make_key(MODEL_ID, prompt_template, ticker, *cleaned_texts)
+    result = await summary_cache.get_or_compute(
+        cache_key,
+        lambda: _summarize_texts_with_bedrock(ticker, cleaned_texts, prompt_template),
+        cacheable=lambda value: value.get("sentiment") != "error"
+    )
+
+    return {
+        "summary": result["summary"],
+        "sentiment": result["sentiment"],
+        "sources": news_urls or [],
+        "disclaimer": "Summarized news. Not financial advice."
+    }
+
+
+async def summarize_news_with_bedrock(ticker, news_texts, news_urls=None):
     """
-    Background job that runs periodically to update explore stocks data.
+    Summarizes news articles using AWS Bedrock Claude model.
+    Returns a dict with summary, sentiment, sources, and disclaimer.
     """
-    print(f"[{datetime.now()}] Starting explore stocks update...")
+    return await _summarize_with_bedrock(ticker, news_texts, news_urls, NEWS_SUMMARY_PROMPT)
 
-    file_path = os.path.join(os.path.dirname(__file__), 'top-1000.txt')
-    stock_list = []
+BATCH_NEWS_SUMMARY_PROMPT = """Analyze the recent news for each of the following stocks and summarize it per stock.
 
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
+{stocks_content}
 
-                    if '|' in line:
-                        parts = line.split('|')
-                        ticker = parts[0].strip()
-                        name = parts[1].strip()
-                    else:
-                        ticker = line.strip()
-                        name = ticker
+Provide your response as a JSON object keyed by ticker symbol. Each value must be an object with exactly two keys:
+1. "summary": A concise 2-3 sentence summary of the key facts and developments for that stock
+2. "sentiment": One of "positive", "negative", or "neutral"
 
-                    stock_list.append({"ticker": ticker, "name": name})
-        except Exception as e:
-            print(f"Error reading top-1000.txt: {e}")
-            return
+Include every ticker listed above. Return ONLY the JSON object, no other text."""
 
-    # Process in batches to avoid overwhelming yfinance
-    MAX_STOCKS = 200
-    if len(stock_list) > MAX_STOCKS:
-        stock_list = random.sample(stock_list, MAX_STOCKS)
+# Output tokens reserved per ticker in a batched response, plus JSON overhead
+BATCH_TOKENS_PER_TICKER = 200
+BATCH_TOKENS_OVERHEAD = 200
 
-    tickers = [item["ticker"] for item in stock_list]
 
-    try:
-        # Bulk fetch price data
-        # Use asyncio.run to execute the async function from this synchronous thread
-        price_data = asyncio.run(fetch_price_data(tickers))
+def estimate_tokens(text):
+    # Rough heuristic for English text, good enough for budgeting prompts
+    return len(text) // 4 + 1
 
-        # Update database
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
 
-        current_time = datetime.now()
+def _batch_section(item):
+    return f"### {item['ticker']} ({item['name']})\n" + "\n\n".join(item["cleaned_texts"])
 
-        for item in stock_list:
-            ticker_symbol = item["ticker"]
-            stock_name = item["name"]
 
-            if ticker_symbol in price_data:
-                current_price, previous_close = price_data[ticker_symbol]
+def split_summary_batches(items, token_budget=None, max_tickers=None):
+    """
+    Greedily packs items into batches whose estimated prompt size stays
+    within the token budget. An item larger than the budget gets its own batch.
+    """
+    token_budget = token_budget or PINNED_OVERVIEW_BATCH_TOKEN_BUDGET
+    max_tickers = max_tickers or PINNED_OVERVIEW_BATCH_MAX_TICKERS
+    base_tokens = estimate_tokens(BATCH_NEWS_SUMMARY_PROMPT)
 
-                if current_price is not None and previous_close is not None:
-                    day_change_usd = current_price - previous_close
-                    day_change_percent = (day_change_usd / previous_close) * 100
+    batches = []
+    current = []
+    current_tokens = base_tokens
 
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO explore_stocks
-                        (ticker, name, currentPrice, costChange, percentageChange, last_updated)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (
-                        ticker_symbol,
-                        stock_name,
-                        round(current_price, 2),
-                        round(day_change_usd, 2),
-                        round(day_change_percent, 2),
-                        current_time
-                    ))
+    for item in items:
+        item_tokens = estimate_tokens(_batch_section(item))
+        if current and (current_tokens + item_tokens > token_budget or len(current) >= max_tickers):
+            batches.append(current)
+            current = []
+            current_tokens = base_tokens
+        current.append(item)
+        current_tokens += item_tokens
 
-        conn.commit()
-        conn.close()
+    if current:
+        batches.append(current)
 
-        print(f"[{datetime.now()}] Explore stocks update completed. Updated {len(price_data)} stocks.")
+    return batches
 
-    except Exception as e:
-        print(f"Error updating explore stocks: {e}")
 
-# Initialize scheduler
-scheduler = BackgroundScheduler()
+async def _summarize_batch_with_bedrock(batch):
+    """
+    Summarizes several tickers in one converse call.
+    Returns {ticker: {"summary", "sentiment"}} for every ticker the model answered.
+    Raises if the call itself fails; an unparseable response returns {}.
+    """
+    stocks_content = "\n\n".join(_batch_section(item) for item in batch)
+    tickers = ", ".join(item["ticker"] for item in batch)
 
-app = FastAPI()
+    try:
+        resp = await converse(
+            modelId=MODEL_ID,
+            messages=[{
+                "role": "user",
+                "content": [{
+                    "text": BATCH_NEWS_SUMMARY_PROMPT.format(stocks_content=stocks_content)
+                }]
+            }],
+            inferenceConfig={
+                "maxTokens": BATCH_TOKENS_OVERHEAD + BATCH_TOKENS_PER_TICKER * len(batch),
+                "temperature": 0.3
+            }
+        )
 
-@app.on_event("startup")
-async def startup_event():
-    # Run migration first (only needed once)
-    migrate_favorites_table()  # Uncomment this line for one-time migration
+    except Exception as e:
+        print(f"Bedrock batch error for {tickers}: {str(e)}")
+        raise
 
-    init_db()
+    raw_text = resp['output']['message']['content'][0]['text'].strip()
+    print(f"--- Bedrock Batch Response for {tickers} ---")
+    print(raw_text)
+    print("--- End Response ---")
 
-    # Run initial update
-    threading.Thread(target=update_explore_stocks).start()
+    json_str = extract_json_text(raw_text)
+    if json_str is None:
+        return {}
+    try:
+        data = json.loads(json_str)
+    except json.JSONDecodeError as e:
+        print(f"Bedrock batch response for {tickers} is not valid JSON: {e}")
+        return {}
 
-    # Schedule updates every 10 minutes
-    scheduler.add_job(update_explore_stocks, 'interval', minutes=10)
-    scheduler.start()
+    results = {}
+    # Match keys case-insensitively in case the model changes the ticker casing
+    answers = {str(key).upper(): value for key, value in data.items() if isinstance(value, dict)}
+    for item in batch:
+        answer = answers.get(item["ticker"].upper())
+        if not answer:
+            continue
+
+        summary = str(answer.get("summary", "")).strip()
+        sentiment = str(answer.get("sentiment", "neutral")).lower()
+        if sentiment not in ["positive", "negative", "neutral"]:
+            sentiment = "neutral"
+
+        results[item["ticker"]] = {
+            "summary": summary or "No summary provided by model.",
+            "sentiment": sentiment
+        }
 
-    print("Background scheduler started - explore stocks will update every 10 minutes")
+    return results
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    scheduler.shutdown()
-    print("Background scheduler stopped")
 
+async def summarize_news_batch_with_bedrock(items):
+    """
+    Summarizes news for several tickers with as few Bedrock calls as possible.
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
+    items: list of {"ticker", "name", "news_texts", "news_urls"}
+    Returns {ticker: {"summary", "sentiment", "sources", "disclaimer"}}.
+
+    Tickers already in the summary cache are served from it; the rest are
+    packed into token-budgeted batches. Any ticker missing from a batched
+    response falls back to an individual summary call, run concurrently under
+    the same semaphore. A throttled batch gets no fallbacks: each ticker gets
+    the error instead of adding more calls while Bedrock is pushing back.
+    """
+    loop = asyncio.get_running_loop()
+    results = {}
+    pending = []
+
+    for item in items:
+        cleaned_texts = _clean_news_texts(item["news_texts"])
+        if not cleaned_texts:
+            results[item["ticker"]] = await summarize_news_with_bedrock(
+                item["ticker"], item["news_texts"], item["news_urls"]
+            )
+            continue
+
+        cache_key = summary_cache.make_key(MODEL_ID, BATCH_NEWS_SUMMARY_PROMPT, item["ticker"], *cleaned_texts)
+        cached = await loop.run_in_executor(db_executor, summary_cache.get, cache_key)
+        if cached is not None:
+            results[item["ticker"]] = cached
+        else:
+            pending.append({**item, "cleaned_texts": cleaned_texts, "cache_key": cache_key})
+
+    semaphore = asyncio.Semaphore(PINNED_OVERVIEW_CONCURRENCY)
+
+    async def fallback(item):
+        async with semaphore:
+            return await summarize_news_with_bedrock(item["ticker"], item["news_texts"], item["news_urls"])
+
+    async def run_batch(batch):
+        try:
+            async with semaphore:
+                answers = await _summarize_batch_with_bedrock(batch)
+        except Exception as e:
+            if _classify_bedrock_error(e) == THROTTLED:
+                for item in batch:
+                    results[item["ticker"]] = _summary_error(e)
+                return
+            answers = {}
+
+        missing = [item for item in batch if item["ticker"] not in answers]
+        if missing:
+            print(f"Batch response missing {', '.join(item['ticker'] for item in missing)}, summarizing individually")
+            for item, answer in zip(missing, await asyncio.gather(*(fallback(item) for item in missing))):
+                answers[item["ticker"]] = answer
+
+        for item in batch:
+            answer = answers[item["ticker"]]
+            if answer["sentiment"] != "error":
+                await loop.run_in_executor(db_executor, summary_cache.set, item["cache_key"], {
+                    "summary": answer["summary"],
+                    "sentiment": answer["sentiment"]
+                })
+            results[item["ticker"]] = answer
+
+    await asyncio.gather(*(run_batch(batch) for batch in split_summary_batches(pending)))
+
+    return {
+        item["ticker"]: {
+            "summary": results[item["ticker"]]["summary"],
+            "sentiment": results[item["ticker"]]["sentiment"],
+            "sources": item["news_urls"] or [],
+            "disclaimer": "Summarized news. Not financial advice."
+        }
+        for item in items
+    }
+
+
+def _parse_db_timestamp(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _load_explore_freshness():
+    """
+    Returns ({ticker: last_updated}, {tickers pinned by any user}).
+    """
+    last_updated = {}
+    for ticker, updated in db.fetchall("SELECT ticker, last_updated FROM explore_stocks"):
+        parsed = _parse_db_timestamp(updated)
+        if parsed is not None:
+            last_updated[ticker] = parsed
+    pinned = {row[0] for row in db.fetchall("SELECT DISTINCT ticker FROM favorites")}
+    return last_updated, pinned
+
+
+def write_explore_snapshot(rows):
+    """
+    Upserts a refresh batch into explore_stocks in a single transaction and
+    bumps the snapshot id in the same commit, so readers of /explore see either
+    the previous snapshot or the new one in full.
+    Returns (snapshot_id, write_seconds).
+    """
+    started = time.perf_counter()
+    # BEGIN IMMEDIATE takes the write lock up front instead of on first write
+    with db.transaction(immediate=True) as conn:
+        conn.executemany("""
+            INSERT OR REPLACE INTO explore_stocks
+            (ticker, name, currentPrice, costChange, percentageChange, last_updated)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.execute("""
+            UPDATE explore_meta
+            SET snapshot_id = snapshot_id + 1,
+                updated_at = ?,
+                row_count = (SELECT COUNT(*) FROM explore_stocks)
+            WHERE id = 1
+        """, (datetime.now(),))
+        snapshot_id = conn.execute("SELECT snapshot_id FROM explore_meta WHERE id = 1").fetchone()[0]
+
+    return snapshot_id, time.perf_counter() - started
+
+
+def rebuild_explore_snapshot():
+    """
+    Loads explore_stocks into a new ExploreSnapshot and swaps it in. The swap
+    is a single reference assignment, so requests see the old snapshot or
+    the new one, never a mix.
+    """
+    global explore_snapshot
+
+    with db.snapshot() as conn:
+        snapshot_id = conn.execute("SELECT snapshot_id FROM explore_meta WHERE id = 1").fetchone()[0]
+        rows = conn.execute("""
+            SELECT ticker, name, currentPrice, costChange, percentageChange, last_updated
+            FROM explore_stocks
+        """).fetchall()
+
+    explore_snapshot = ExploreSnapshot(snapshot_id, rows)
+    return explore_snapshot
+
+
+def _plan_explore_batch():
+    """
+    Loads the explore universe and picks this run's batch with explore_planner.
+    """
+    file_path = os.path.join(os.path.dirname(__file__), 'top-1000.txt')
+    stock_list = []
+    if os.path.exists(file_path):
+        stock_list = load_universe(file_path)
+
+    last_updated, pinned = _load_explore_freshness()
+    return explore_planner.next_batch(stock_list, last_updated, pinned)
+
+
+async def update_explore_stocks():
+    """
+    Background job that runs periodically to update explore stocks data.
+    Each run refreshes one batch chosen by explore_planner: pinned and
+    frequently viewed tickers first, then the stalest of the universe.
+    """
+    print(f"[{datetime.now()}] Starting explore stocks update...")
+    loop = asyncio.get_running_loop()
+
+    try:
+        stock_list = await loop.run_in_executor(db_executor, _plan_explore_batch)
+    except Exception as e:
+        print(f"Error planning explore stocks update: {e}")
+        return
+
+    tickers = [item["ticker"] for item in stock_list]
+
+    try:
+        # Bulk fetch price data
+        quotes = await fetch_price_columns(tickers)
+        names = {item["ticker"]: item["name"] for item in stock_list}
+
+        current_time = datetime.now()
+
+        # Tickers with only one close have no previous close to compare against
+        complete = ~np.isnan(quotes.prev_close)
+        rows = [
+            (ticker_symbol, names[ticker_symbol], float(current_price), float(day_change_usd), float(day_change_percent), current_time)
+            for ticker_symbol, current_price, day_change_usd, day_change_percent in zip(
+                np.asarray(quotes.tickers, dtype=object)[complete],
+                np.round(quotes.last_close[complete], 2),
+                np.round(quotes.change[complete], 2),
+                np.round(quotes.pct_change[complete], 2)
+            )
+        ]
+
+        snapshot_id, write_seconds = await loop.run_in_executor(db_executor, write_explore_snapshot, rows)
+        await loop.run_in_executor(db_executor, rebuild_explore_snapshot)
+
+        explore_planner.last_run = {
+            "finished_at": datetime.now().isoformat(),
+            "requested": len(tickers),
+            "updated": len(rows),
+            "snapshot_id": snapshot_id,
+            "write_ms": round(write_seconds * 1000, 2)
+        }
+        print(f"[{datetime.now()}] Explore stocks update completed. Updated {len(rows)} stocks "
+              f"(snapshot {snapshot_id}, write {write_seconds * 1000:.1f} ms).")
+
+    except Exception as e:
+        print(f"Error updating explore stocks: {e}")
+
+async def sync_explore_snapshot():
+    """
+    Worker job: rebuild the in-memory explore snapshot when another worker
+    (the leader) has written a newer one.
+    """
+    row = await db.afetchone("SELECT snapshot_id FROM explore_meta WHERE id = 1")
+    if row is not None and row[0] != explore_snapshot.snapshot_id:
+        loop = asyncio.get_running_loop()
+        snapshot = await loop.run_in_executor(db_executor, rebuild_explore_snapshot)
+        print(f"[{datetime.now()}] Picked up explore snapshot {snapshot.snapshot_id}.")
+
+def _sync_worker_state(since):
+    now = time.time()
+    # Views and overview requests seen here go to SQLite for the leader's jobs
+    explore_planner.flush_views()
+    recent = [(user_id, seen) for user_id, seen in list(overview_active_users.items()) if seen >= since]
+    stale = [user_id for user_id, seen in list(overview_active_users.items()) if seen < now - PINNED_OVERVIEW_ACTIVE_SECONDS]
+    for user_id in stale:
+        overview_active_users.pop(user_id, None)
+
+    with db.transaction() as conn:
+        if recent:
+            conn.executemany(
+                "INSERT INTO overview_activity (user_id, last_seen) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)",
+                recent
+            )
+        # Cached favorites older than the TTL are gone anyway
+        conn.execute("DELETE FROM favorites_changes WHERE changed_at < ?", (now - FAVORITES_CACHE_TTL_SECONDS - SHARED_CACHE_SYNC_SECONDS,))
+        changed = conn.execute("SELECT user_id FROM favorites_changes WHERE changed_at >= ?", (since,)).fetchall()
+
+    for (user_id,) in changed:
+        favorites_cache.pop(user_id)
+
+
+async def sync_worker_state():
+    """
+    Worker job: publish this worker's explore views and overview activity,
+    and drop cached favorites that another worker has changed.
+    """
+    global last_worker_sync
+    started = time.time()
+    loop = asyncio.get_running_loop()
+    # Look back one extra interval for changes committed just after the last run read
+    await loop.run_in_executor(db_executor, _sync_worker_state, last_worker_sync - SHARED_CACHE_SYNC_SECONDS)
+    last_worker_sync = started
+
+def init_symbol_master():
+    """
+    Loads the symbol master and seeds it with the explore universe and
+    the names already stored with users' favorites.
+    """
+    symbol_master.init()
+
+    file_path = os.path.join(os.path.dirname(__file__), 'top-1000.txt')
+    if os.path.exists(file_path):
+        symbol_master.seed(load_universe(file_path), source="universe")
+
+    favorites = db.fetchall("SELECT DISTINCT ticker, name FROM favorites")
+    symbol_master.seed([{"ticker": ticker, "name": name} for ticker, name in favorites], source="favorites")
+
+# Periodic refresh jobs, run on the app's event loop by the lease holder only
+scheduler = LoopScheduler(jitter=SCHEDULER_JITTER)
+
+# Jobs every worker runs for itself, e.g. picking up the leader's explore refreshes
+worker_scheduler = LoopScheduler(jitter=SCHEDULER_JITTER)
+
+app = FastAPI()
+
+@app.on_event("startup")
+async def startup_event():
+    # Run migration first (only needed once)
+    migrate_favorites_table()  # Uncomment this line for one-time migration
+
+    init_db()
+    rebuild_explore_snapshot()
+    summary_cache.init()
+    analysis_cache.init()
+    history_store.init()
+    init_symbol_master()
+    explore_planner.init()
+    shared_cache.init()
+    leader_lease.init()
+    set_shared_cache(shared_cache)
+
+    # Open the pooled Finnhub client so news fetches reuse warm connections
+    await init_http_client()
+
+    global main_loop, quote_hub
+    main_loop = asyncio.get_running_loop()
+
+    # Explore refresh every EXPLORE_REFRESH_MINUTES (10 by default), starting as soon as we lead
+    scheduler.add_job("explore_stocks", update_explore_stocks, EXPLORE_REFRESH_MINUTES * 60, run_at_start=True)
+    scheduler.add_job("market_summary", refresh_market_summary, MARKET_SUMMARY_REFRESH_MINUTES * 60, run_at_start=True)
+    scheduler.add_job("pinned_overviews", refresh_pinned_overviews, PINNED_OVERVIEW_REFRESH_MINUTES * 60)
+    scheduler.add_job("price_history_prune", prune_price_history, 86400, run_at_start=True)
+
+    # With several uvicorn workers only the lease holder runs them; the rest take over if it dies
+    leader_lease.start(on_elected=scheduler.start, on_lost=scheduler.shutdown)
+
+    worker_scheduler.add_job("explore_snapshot_sync", sync_explore_snapshot, EXPLORE_SNAPSHOT_SYNC_SECONDS)
+    worker_scheduler.add_job("worker_state_sync", sync_worker_state, SHARED_CACHE_SYNC_SECONDS)
+    worker_scheduler.start()
+
+    # Workers share fetched quotes, so a ticker watched in several is fetched about once per interval
+    quote_hub = QuoteHub(
+        fetch_price_columns,
+        interval=QUOTE_POLL_SECONDS,
+        max_tickers_per_client=QUOTE_MAX_TICKERS_PER_CLIENT,
+        shared=shared_cache,
+    )
+    quote_hub.start()
+
+    print(f"Background scheduler started - explore stocks will update every {EXPLORE_REFRESH_MINUTES:g} minutes on the lease holder")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Stops our jobs if we lead and frees the lease for another worker
+    await leader_lease.stop()
+    await scheduler.shutdown()
+    await worker_scheduler.shutdown()
+    print("Background scheduler stopped")
+
+    if quote_hub is not None:
+        await quote_hub.stop()
+    await close_http_client()
+    shutdown_executors()
+    db.close_all()
+
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -525,13 +1162,23 @@ async def get_market_news(
         "articles": articles
         }
 
+async def prune_price_history():
+    """
+    Scheduled job: drop stored price histories nobody has read in HISTORY_RETENTION_DAYS.
+    """
+    loop = asyncio.get_running_loop()
+    pruned = await loop.run_in_executor(db_executor, history_store.prune, HISTORY_RETENTION_DAYS * 86400)
+    print(f"[{datetime.now()}] Pruned {pruned} price histories not read in {HISTORY_RETENTION_DAYS:g} days.")
+
 @app.get("/stock/{ticker}")
-def get_stock_history(ticker: str, period: str = "1mo", interval: str = "1d"):
+async def get_stock_history(ticker: str, period: str = "1mo", interval: str = "1d"):
+    explore_planner.record_view(ticker)
+    loop = asyncio.get_running_loop()
     try:
-        stock = yf.Ticker(ticker)
-        
-        # Pass both parameters to yfinance
-        hist = stock.history(period=period, interval=interval)
+        # Served from the local store, which only downloads bars it doesn't have yet
+        hist = await loop.run_in_executor(
+            yfinance_executor, partial(history_store.get_history, ticker, period=period, interval=interval)
+        )
         
         if hist.empty:
             raise HTTPException(status_code=404, detail="Stock ticker not found or no data available")
@@ -556,8 +1203,110 @@ def get_stock_history(ticker: str, period: str = "1mo", interval: str = "1d"):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _batch_tickers(request: PinnedBatchRequest):
+    tickers = list(dict.fromkeys(t.strip().upper() for t in request.tickers if t and t.strip()))
+    if not tickers:
+        raise HTTPException(status_code=400, detail="tickers must contain at least one ticker")
+    if len(tickers) > PINNED_BATCH_MAX_TICKERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {PINNED_BATCH_MAX_TICKERS} tickers per batch, got {len(tickers)}"
+        )
+    return tickers
+
+
+def _batch_response(user_id, results):
+    counts = {}
+    for item in results:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+    return {"userId": user_id, "counts": counts, "results": results}
+
+
+# Declared before /pinned/{ticker}/{userId} so "batch" isn't taken for a ticker
+@app.post("/pinned/batch/{userId}")
+async def add_pinned_batch(userId: str, request: PinnedBatchRequest):
+    """
+    Add several stocks to a user's favorites in one request.
+
+    Names are resolved together through the symbol master (only unknown
+    tickers go upstream, concurrently) and every insert runs in a single
+    transaction. Each ticker gets its own status: added, already_pinned,
+    not_found or error.
+    """
+    if not userId or not userId.strip():
+        raise HTTPException(status_code=400, detail="userId is required")
+
+    user_id = userId.strip()
+    tickers = _batch_tickers(request)
+
+    try:
+        names = await symbol_master.aresolve_many(tickers)
+
+        def insert():
+            results = []
+            with db.transaction(immediate=True) as conn:
+                for ticker_symbol in tickers:
+                    name = names[ticker_symbol]
+                    if isinstance(name, Exception):
+                        results.append({"ticker": ticker_symbol, "status": "error", "detail": str(name)})
+                        continue
+                    if not name:
+                        results.append({"ticker": ticker_symbol, "status": "not_found"})
+                        continue
+
+                    inserted = conn.execute(
+                        "INSERT OR IGNORE INTO favorites (user_id, ticker, name) VALUES (?, ?, ?)",
+                        (user_id, ticker_symbol, name)
+                    ).rowcount
+                    results.append({
+                        "ticker": ticker_symbol,
+                        "name": name,
+                        "status": "added" if inserted else "already_pinned"
+                    })
+            favorites_changed(user_id)
+            return results
+
+        results = await asyncio.get_running_loop().run_in_executor(db.executor, insert)
+
+        invalidate_pinned_overview(user_id)
+        return _batch_response(user_id, results)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+
+
+@app.delete("/pinned/batch/{userId}")
+def delete_pinned_batch(userId: str, request: PinnedBatchRequest):
+    """
+    Remove several stocks from a user's favorites in one transaction.
+    Each ticker gets its own status: removed or not_pinned.
+    """
+    if not userId or not userId.strip():
+        raise HTTPException(status_code=400, detail="userId is required")
+
+    user_id = userId.strip()
+    tickers = _batch_tickers(request)
+
+    try:
+        results = []
+        with db.transaction(immediate=True) as conn:
+            for ticker_symbol in tickers:
+                deleted = conn.execute(
+                    "DELETE FROM favorites WHERE user_id = ? AND ticker = ?",
+                    (user_id, ticker_symbol)
+                ).rowcount
+                results.append({"ticker": ticker_symbol, "status": "removed" if deleted else "not_pinned"})
+
+        favorites_changed(user_id)
+        invalidate_pinned_overview(user_id)
+        return _batch_response(user_id, results)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+
+
 @app.post("/pinned/{ticker}/{userId}")
-def add_pinned(ticker: str, userId: str):
+async def add_pinned(ticker: str, userId: str):
     """
     Add a stock to user's favorites.
 
@@ -572,34 +1321,26 @@ def add_pinned(ticker: str, userId: str):
     user_id = userId.strip()
 
     try:
-        # Fetch stock info to get the name
-        stock = yf.Ticker(ticker_symbol)
-        stock_info = stock.info
+        # Known tickers resolve locally; unknown ones hit yfinance once and are remembered either way
+        stock_name = await symbol_master.aresolve(ticker_symbol)
 
-        if not stock_info or 'longName' not in stock_info:
+        if not stock_name:
             raise HTTPException(status_code=404, detail=f"Could not find information for ticker: {ticker_symbol}")
 
-        stock_name = stock_info['longName']
-
-        # Connect to the database and insert the new favorite
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-
+        # Insert the new favorite
         try:
-            cursor.execute(
+            await db.aexecute(
                 "INSERT INTO favorites (user_id, ticker, name) VALUES (?, ?, ?)",
                 (user_id, ticker_symbol, stock_name)
             )
-            conn.commit()
         except sqlite3.IntegrityError:
             # This error occurs if the ticker is already in the database for this user
-            conn.close()
             raise HTTPException(
                 status_code=409,
                 detail=f"Ticker '{ticker_symbol}' is already in favorites for user '{user_id}'."
             )
-
-        conn.close()
+        await asyncio.get_running_loop().run_in_executor(db_executor, favorites_changed, user_id)
+        invalidate_pinned_overview(user_id)
 
         return {
             "message": f"Added '{stock_name} ({ticker_symbol})' to favorites for user '{user_id}'.",
@@ -631,20 +1372,8 @@ async def get_pinned(userId: str):
     user_id = userId.strip()
 
     try:
-        loop = asyncio.get_running_loop()
         # Get favorited tickers from the database for this user
-        def get_db_favorites():
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT ticker, name FROM favorites WHERE user_id = ?",
-                (user_id,)
-            )
-            rows = cursor.fetchall()
-            conn.close()
-            return rows
-
-        rows = await loop.run_in_executor(None, get_db_favorites)
+        rows = await _get_user_favorites(user_id)
 
         if not rows:
             return []
@@ -726,27 +1455,18 @@ def delete_pinned(ticker: str, userId: str):
     user_id = userId.strip()
 
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-
-        # Check if ticker exists for this user
-        cursor.execute(
-            "SELECT ticker FROM favorites WHERE user_id = ? AND ticker = ?",
+        # The row count tells us whether the ticker was pinned for this user
+        deleted = db.execute(
+            "DELETE FROM favorites WHERE user_id = ? AND ticker = ?",
             (user_id, ticker_symbol)
         )
-        if cursor.fetchone() is None:
-            conn.close()
+        if deleted == 0:
             raise HTTPException(
                 status_code=404,
                 detail=f"Ticker '{ticker_symbol}' not found in favorites for user '{user_id}'."
             )
-
-        cursor.execute(
-            "DELETE FROM favorites WHERE user_id = ? AND ticker = ?",
-            (user_id, ticker_symbol)
-        )
-        conn.commit()
-        conn.close()
+        favorites_changed(user_id)
+        invalidate_pinned_overview(user_id)
 
         return {
             "message": f"Removed '{ticker_symbol}' from favorites for user '{user_id}'.",
@@ -759,70 +1479,238 @@ def delete_pinned(ticker: str, userId: str):
             raise e
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
-@app.get("/explore/{userId}")
-def get_explore_stocks(userId: str = None, limit: int = 100, offset: int = 0):
+@app.get("/explore/status")
+def get_explore_status():
     """
-    Get explore stocks from cached database.
-    Much faster than fetching from yfinance every time.
+    Reports explore data freshness: the current maximum staleness across the
+    universe, the worst-case bound implied by the batch size and interval,
+    and stats from the last refresh run.
     """
+    file_path = os.path.join(os.path.dirname(__file__), 'top-1000.txt')
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-
-        if userId:
-            # Get total count excluding pinned
-            cursor.execute("""
-                SELECT COUNT(*) 
-                FROM explore_stocks 
-                WHERE ticker NOT IN (SELECT ticker FROM favorites WHERE user_id = ?)
-            """, (userId,))
-            total_count = cursor.fetchone()[0]
-
-            # Get paginated results excluding pinned
-            cursor.execute("""
-                SELECT ticker, name, currentPrice, costChange, percentageChange, last_updated
-                FROM explore_stocks
-                WHERE ticker NOT IN (SELECT ticker FROM favorites WHERE user_id = ?)
-                ORDER BY currentPrice DESC
-                LIMIT ? OFFSET ?
-            """, (userId, limit, offset))
-        else:
-            # Get total count
-            cursor.execute("SELECT COUNT(*) FROM explore_stocks")
-            total_count = cursor.fetchone()[0]
+        universe = load_universe(file_path) if os.path.exists(file_path) else []
+        last_updated, _ = _load_explore_freshness()
+        return explore_planner.report(universe, last_updated)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
-            # Get paginated results
-            cursor.execute("""
-                SELECT ticker, name, currentPrice, costChange, percentageChange, last_updated
-                FROM explore_stocks
-                ORDER BY currentPrice DESC
-                LIMIT ? OFFSET ?
-            """, (limit, offset))
+def _encode_explore_cursor(sort, key, ticker):
+    raw = json.dumps([sort, key, ticker]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
 
-        rows = cursor.fetchall()
-        conn.close()
 
-        results = []
-        for row in rows:
-            results.append({
-                "ticker": row[0],
-                "name": row[1],
-                "currentPrice": row[2],
-                "costChange": row[3],
-                "percentageChange": row[4],
-                "last_updated": row[5]
-            })
+def _decode_explore_cursor(cursor, sort):
+    try:
+        cursor_sort, key, ticker = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail=f"Cursor was issued for sort '{cursor_sort}', not '{sort}'")
+    return key, str(ticker)
+
+
+def _check_explore_sort(sort):
+    if sort not in SORT_ORDERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown sort '{sort}'. Use one of: {', '.join(SORT_ORDERS)}"
+        )
+
+
+def favorites_changed(user_id):
+    """
+    Drops the user's cached pinned tickers in this worker and records the
+    change so the other workers drop theirs on their next sync. Blocking.
+    """
+    favorites_cache.pop(user_id)
+    db.execute(
+        "INSERT INTO favorites_changes (user_id, changed_at) VALUES (?, ?) "
+        "ON CONFLICT(user_id) DO UPDATE SET changed_at = excluded.changed_at",
+        (user_id, time.time())
+    )
+
+
+def _pinned_tickers(user_id):
+    """
+    The user's pinned tickers as a frozenset, from memory when possible.
+    """
+    pinned = favorites_cache.get(user_id)
+    if pinned is None:
+        rows = db.fetchall("SELECT ticker FROM favorites WHERE user_id = ?", (user_id,))
+        pinned = frozenset(row[0] for row in rows)
+        favorites_cache.set(user_id, pinned)
+    return pinned
+
+
+@app.get("/explore/movers")
+def get_explore_movers(limit: int = 10):
+    """
+    Top gainers, losers and biggest absolute movers from the last refresh,
+    read straight off the snapshot's precomputed orders.
+    """
+    snapshot = explore_snapshot
+    return {
+        "snapshot_id": snapshot.snapshot_id,
+        "built_at": snapshot.built_at.isoformat(),
+        **snapshot.movers(max(limit, 0))
+    }
+
+@app.get("/explore/{userId}")
+def get_explore_stocks(userId: str = None, limit: int = 100, offset: int = 0, cursor: str = None, sort: str = DEFAULT_SORT):
+    """
+    Get explore stocks from the in-memory snapshot of the last refresh.
+    Much faster than fetching from yfinance every time.
+
+    `sort` picks one of the orders precomputed on every refresh: price
+    (default, high to low), price_asc, pct_up (gainers first), pct_down
+    (losers first), abs_change or name.
+
+    Pass the `next_cursor` from a previous page as `cursor` to continue from
+    where it ended; each page then costs the same however deep it is.
+    `offset` is still accepted for older clients when no cursor is given.
+    """
+    _check_explore_sort(sort)
+    after = _decode_explore_cursor(cursor, sort) if cursor else None
+
+    try:
+        # Hold one reference so a concurrent refresh can't change the snapshot mid-request
+        snapshot = explore_snapshot
+        pinned = _pinned_tickers(userId) if userId else frozenset()
+
+        results, last = snapshot.page(pinned, limit, offset=offset, after=after, order_name=sort)
 
         return {
-            "total": total_count,
+            "total": snapshot.count_excluding(pinned),
             "limit": limit,
             "offset": offset,
+            "sort": sort,
+            "next_cursor": _encode_explore_cursor(sort, *last) if last else None,
             "stocks": results
         }
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
+def _ws_tickers(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        return []
+    return [t for t in value if isinstance(t, str) and t.strip()]
+
+
+@app.websocket("/ws/quotes")
+async def quotes_websocket(websocket: WebSocket, userId: str = None, tickers: str = None):
+    """
+    Live quotes for subscribed tickers, pushed as they change.
+
+    Optional query parameters set the initial subscription: `userId`
+    subscribes to that user's pinned tickers, `tickers` is a comma-separated
+    list. Afterwards the client sends
+    {"action": "subscribe" | "unsubscribe", "tickers": ["AAPL", ...]}.
+
+    The server replies {"type": "subscribed", "tickers": [...]} after each
+    change and sends {"type": "quotes", "quotes": [...]} with the latest
+    quote for every subscribed ticker that changed since it was last sent.
+    All clients share one poller, so upstream load follows distinct tickers.
+    """
+    await websocket.accept()
+    subscription = quote_hub.connect()
+
+    async def send_subscribed():
+        await websocket.send_json({"type": "subscribed", "tickers": sorted(subscription.tickers)})
+
+    async def receive_actions():
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "detail": "messages must be JSON objects"})
+                continue
+            action = message.get("action")
+            requested = _ws_tickers(message.get("tickers"))
+            if action == "subscribe":
+                quote_hub.subscribe(subscription, requested)
+            elif action == "unsubscribe":
+                quote_hub.unsubscribe(subscription, requested)
+            else:
+                await websocket.send_json({"type": "error", "detail": "action must be 'subscribe' or 'unsubscribe'"})
+                continue
+            await send_subscribed()
+
+    async def send_quotes():
+        while True:
+            quotes = await subscription.next_batch()
+            await websocket.send_json({"type": "quotes", "quotes": quotes})
+
+    try:
+        initial = _ws_tickers(tickers) if tickers else []
+        if userId and userId.strip():
+            loop = asyncio.get_running_loop()
+            initial += sorted(await loop.run_in_executor(db_executor, _pinned_tickers, userId.strip()))
+        quote_hub.subscribe(subscription, initial)
+        await send_subscribed()
+
+        tasks = [asyncio.create_task(receive_actions()), asyncio.create_task(send_quotes())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        quote_hub.disconnect(subscription)
+
+
+@app.get("/upstream/status")
+def upstream_status():
+    """
+    Rate limiter, concurrency and retry counters per upstream API.
+    """
+    return {
+        "finnhub": finnhub_limiter.stats(),
+        "bedrock": bedrock_limiter.stats(),
+    }
+
+
+@app.get("/scheduler/status")
+def scheduler_status():
+    """
+    Lease holder, plus last run time, duration, errors and skipped
+    (overlapping) runs per background job. `jobs` only run on the leader;
+    `worker_jobs` run in every worker.
+    """
+    return {
+        "leader": leader_lease.stats(),
+        "jobs": scheduler.stats(),
+        "worker_jobs": worker_scheduler.stats(),
+        "shared_cache": shared_cache.stats(),
+    }
+
+
+@app.get("/executors/status")
+def executors_status():
+    """
+    Queue depth, wait and run times for the yfinance, Bedrock and database thread pools.
+    """
+    return executor_stats()
+
+
+@app.get("/ws/quotes/status")
+def quotes_websocket_status():
+    """
+    Connected clients, distinct watched tickers and poller counters for /ws/quotes.
+    """
+    return quote_hub.stats()
+
+
 @app.post("/summarize-news/{ticker}", response_model=dict)
 async def get_summarized_news(ticker: str, period: int = 7):
     news = await get_company_news(ticker, period)
@@ -870,144 +1758,244 @@ async def summarize_news(request: NewsSummaryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Summarization error: {str(e)}")
 
-# Update the helper function
-async def analyze_stock_performance(ticker, period="1y"):
-    """
-    Analyzes historical stock performance using price data and AWS Bedrock.
-    Returns analysis, sentiment, and disclaimer.
-    """
-    loop = asyncio.get_running_loop()
-    try:
-        def get_history():
-            stock = yf.Ticker(ticker)
-            return stock.history(period=period)
+ANALYSIS_PROMPT = """Analyze the following historical stock performance data for {ticker}:
 
-        hist = await loop.run_in_executor(None, get_history)
+{data_summary}
 
-        if hist.empty:
-            return {
-                "analysis": f"No historical data available for {ticker} over the {period} period.",
-                "sentiment": "neutral",
-                "disclaimer": "Unable to perform analysis due to lack of data."
-            }
+Provide your response as a JSON object with exactly two keys:
+1. "analysis": A comprehensive 4-5 sentence analysis covering:
+   - Overall performance and total return over the period
+   - Volatility, drawdown and risk-adjusted return (Sharpe, beta to the S&P 500) and what they mean
+   - Technical indicators (moving averages, RSI, MACD, Bollinger bands, ATR where available)
+   - Key patterns or trends observed
+   - Notable price levels (highs/lows)
 
-        # Calculate key metrics
-        current_price = float(hist['Close'].iloc[-1])
-        start_price = float(hist['Close'].iloc[0])
-        high_price = float(hist['High'].max())
-        low_price = float(hist['Low'].min())
-        avg_volume = float(hist['Volume'].mean())
+2. "sentiment": One of "bullish", "bearish", or "neutral" based on the technical indicators and performance
 
-        total_return = ((current_price - start_price) / start_price) * 100
-        volatility = float(hist['Close'].pct_change().std() * 100)
+Be specific with numbers and percentages. Write in clear, professional language.
+Return ONLY the JSON object, no other text."""
 
-        # Calculate moving averages if enough data
-        if len(hist) >= 50:
-            ma_50 = float(hist['Close'].rolling(window=50).mean().iloc[-1])
-        else:
-            ma_50 = None
+ANALYSIS_INFERENCE_CONFIG = {
+    "maxTokens": 1000,
+    "temperature": 0.3
+}
 
-        if len(hist) >= 200:
-            ma_200 = float(hist['Close'].rolling(window=200).mean().iloc[-1])
-        else:
-            ma_200 = None
+ANALYSIS_DISCLAIMER = "This is automated analysis based on historical data. Not financial advice."
+
+
+async def _load_performance_metrics(ticker, period):
+    """
+    Loads price history for the ticker and the benchmark and computes the
+    metrics fed to the analysis prompt. Returns None when no history is available.
+    """
+    loop = asyncio.get_running_loop()
+
+    async def load(symbol):
+        return await loop.run_in_executor(yfinance_executor, partial(history_store.get_history, symbol, period=period, interval="1d"))
+
+    hist, benchmark = await asyncio.gather(load(ticker), load(BENCHMARK_TICKER), return_exceptions=True)
+    if isinstance(hist, Exception):
+        raise hist
+    if isinstance(benchmark, Exception):
+        # Beta is the only metric that needs the benchmark
+        print(f"Benchmark history unavailable for {BENCHMARK_TICKER}: {benchmark}")
+        benchmark = None
+
+    if hist.empty:
+        return None
+
+    ticker = ticker.upper()
+
+    def compute():
+        return indicator_engine.compute((ticker, period), stack_histories({ticker: hist}, benchmark))[ticker]
+
+    metrics = await loop.run_in_executor(compute_executor, compute)
+    metrics["as_of"] = hist.index[-1].isoformat()
+    return metrics
+
+
+def _no_history_analysis(ticker, period):
+    return {
+        "analysis": f"No historical data available for {ticker} over the {period} period.",
+        "sentiment": "neutral",
+        "disclaimer": "Unable to perform analysis due to lack of data."
+    }
+
+
+def _format_volatility(volatility):
+    # A single bar has no daily returns to measure
+    return f"{volatility:.2f}%" if volatility is not None else "n/a"
 
-        # Prepare data summary for Bedrock
-        data_summary = f"""
+
+def _performance_data_summary(ticker, period, metrics):
+    # Prepare data summary for Bedrock
+    data_summary = f"""
 Ticker: {ticker}
 Period: {period}
-Current Price: ${current_price:.2f}
-Starting Price: ${start_price:.2f}
-Total Return: {total_return:.2f}%
-High Price: ${high_price:.2f}
-Low Price: ${low_price:.2f}
-Price Volatility: {volatility:.2f}%
-Average Daily Volume: {avg_volume:,.0f}
+Current Price: ${metrics['current_price']:.2f}
+Starting Price: ${metrics['start_price']:.2f}
+Total Return: {metrics['total_return']:.2f}%
+High Price: ${metrics['high_price']:.2f}
+Low Price: ${metrics['low_price']:.2f}
+Price Volatility: {_format_volatility(metrics['volatility'])}
+Average Daily Volume: {metrics['avg_volume']:,.0f}
 """
 
-        if ma_50:
-            data_summary += f"50-Day Moving Average: ${ma_50:.2f}\n"
-        if ma_200:
-            data_summary += f"200-Day Moving Average: ${ma_200:.2f}\n"
+    if metrics["ma_50"]:
+        data_summary += f"50-Day Moving Average: ${metrics['ma_50']:.2f}\n"
+    if metrics["ma_200"]:
+        data_summary += f"200-Day Moving Average: ${metrics['ma_200']:.2f}\n"
+    if metrics["rsi_14"] is not None:
+        data_summary += f"RSI (14): {metrics['rsi_14']:.1f}\n"
+    if metrics["macd"] is not None:
+        data_summary += (f"MACD (12, 26, 9): {metrics['macd']:.2f}, signal {metrics['macd_signal']:.2f}, "
+                         f"histogram {metrics['macd_histogram']:.2f}\n")
+    if metrics["bollinger_middle"] is not None:
+        data_summary += (f"Bollinger Bands (20, 2): lower ${metrics['bollinger_lower']:.2f}, "
+                         f"middle ${metrics['bollinger_middle']:.2f}, upper ${metrics['bollinger_upper']:.2f}\n")
+    if metrics["atr_14"] is not None:
+        data_summary += f"Average True Range (14): ${metrics['atr_14']:.2f}\n"
+    if metrics["max_drawdown"] is not None:
+        data_summary += f"Maximum Drawdown: {metrics['max_drawdown']:.2f}%\n"
+    if metrics["sharpe"] is not None:
+        data_summary += f"Sharpe Ratio (annualized, 0% risk-free): {metrics['sharpe']:.2f}\n"
+    if metrics["beta"] is not None:
+        data_summary += f"Beta vs {BENCHMARK_TICKER}: {metrics['beta']:.2f}\n"
+
+    return data_summary
+
+
+def _parse_analysis_response(raw_text):
+    """
+    Turns the model's raw analysis text into the response dict.
+    Raises json.JSONDecodeError if the embedded JSON is malformed.
+    """
+    if not raw_text:
+        return {
+            "analysis": "Model returned empty response.",
+            "sentiment": "neutral",
+            "disclaimer": ANALYSIS_DISCLAIMER
+        }
 
-        # Call Bedrock for analysis
-        try:
-            resp = await loop.run_in_executor(None, partial(bedrock_runtime.converse,
-                modelId=MODEL_ID,
-                messages=[{
-                    "role": "user",
-                    "content": [{
-                        "text": f"""Analyze the following historical stock performance data for {ticker}:
+    # Extract JSON from response
+    json_str = extract_json_text(raw_text)
+    if json_str is None:
+        # No JSON found, use raw text as analysis
+        return {
+            "analysis": raw_text[:1000],
+            "sentiment": "neutral",
+            "disclaimer": ANALYSIS_DISCLAIMER
+        }
 
-{data_summary}
+    data = json.loads(json_str)
 
-Provide your response as a JSON object with exactly two keys:
-1. "analysis": A comprehensive 4-5 sentence analysis covering:
-   - Overall performance and total return over the period
-   - Volatility assessment and what it means
-   - Technical indicators (moving averages if available)
-   - Key patterns or trends observed
-   - Notable price levels (highs/lows)
+    analysis_text = data.get("analysis", "").strip()
+    sentiment = data.get("sentiment", "neutral").lower()
 
-2. "sentiment": One of "bullish", "bearish", or "neutral" based on the technical indicators and performance
+    # Validate sentiment
+    if sentiment not in ["bullish", "bearish", "neutral"]:
+        sentiment = "neutral"
 
-Be specific with numbers and percentages. Write in clear, professional language.
-Return ONLY the JSON object, no other text."""
-                    }]
-                }],
-                inferenceConfig={
-                    "maxTokens": 1000,
-                    "temperature": 0.3
-                }
-            ))
+    if not analysis_text:
+        analysis_text = "No analysis provided by model."
 
-            raw_text = resp['output']['message']['content'][0]['text'].strip()
-            print(f"--- Bedrock Analysis Response for {ticker} ---")
-            print(raw_text)
-            print("--- End Response ---")
+    return {
+        "analysis": analysis_text,
+        "sentiment": sentiment,
+        "disclaimer": ANALYSIS_DISCLAIMER
+    }
 
-            if not raw_text:
-                return {
-                    "analysis": "Model returned empty response.",
-                    "sentiment": "neutral",
-                    "disclaimer": "This is automated analysis based on historical data. Not financial advice."
-                }
-
-            # Extract JSON from response
-            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', raw_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_match = re.search(r'\{.*\}', raw_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                else:
-                    # No JSON found, use raw text as analysis
-                    return {
-                        "analysis": raw_text[:1000],
-                        "sentiment": "neutral",
-                        "disclaimer": "This is automated analysis based on historical data. Not financial advice."
-                    }
-
-            # Parse JSON
-            import json as json_module
-            data = json_module.loads(json_str)
-
-            analysis_text = data.get("analysis", "").strip()
-            sentiment = data.get("sentiment", "neutral").lower()
-
-            # Validate sentiment
-            if sentiment not in ["bullish", "bearish", "neutral"]:
-                sentiment = "neutral"
-
-            if not analysis_text:
-                analysis_text = "No analysis provided by model."
-
-            return {
-                "analysis": analysis_text,
-                "sentiment": sentiment,
-                "disclaimer": "This is automated analysis based on historical data. Not financial advice."
-            }
+
+def _basic_analysis(ticker, period, metrics):
+    """
+    Rule-based analysis used when Bedrock is unavailable.
+    """
+    total_return = metrics["total_return"]
+    volatility = metrics["volatility"]
+
+    basic_analysis = f"Over the {period} period, {ticker} "
+    if total_return > 0:
+        basic_analysis += f"has gained {total_return:.2f}%, "
+    else:
+        basic_analysis += f"has declined {abs(total_return):.2f}%, "
+
+    basic_analysis += f"moving from ${metrics['start_price']:.2f} to ${metrics['current_price']:.2f}. "
+    basic_analysis += f"The stock reached a high of ${metrics['high_price']:.2f} and a low of ${metrics['low_price']:.2f} during this period. "
+    if volatility is None:
+        basic_analysis += "Price volatility: n/a, too few trading days to measure."
+    else:
+        basic_analysis += f"Price volatility measured at {volatility:.2f}%, "
+
+        if volatility < 2:
+            basic_analysis += "indicating relatively stable price movements."
+        elif volatility < 4:
+            basic_analysis += "showing moderate price fluctuations."
+        else:
+            basic_analysis += "reflecting significant price swings."
+
+    basic_sentiment = "bullish" if total_return > 5 else ("bearish" if total_return < -5 else "neutral")
+
+    return {
+        "analysis": basic_analysis,
+        "sentiment": basic_sentiment,
+        "disclaimer": "Basic analysis only. AI-powered analysis unavailable. Not financial advice."
+    }
+
+
+def _analysis_cache_key(ticker, period, metrics):
+    # A new bar changes as_of, so a cached analysis lives until the next bar prints
+    return analysis_cache.make_key("analysis", MODEL_ID, ANALYSIS_PROMPT, ticker, period, metrics["as_of"])
+
+
+def _cacheable_analysis(result):
+    return result.get("disclaimer") == ANALYSIS_DISCLAIMER and result.get("analysis") != "Model returned empty response."
+
+
+async def _model_analysis(ticker, period, metrics):
+    data_summary = _performance_data_summary(ticker, period, metrics)
+
+    resp = await converse(
+        modelId=MODEL_ID,
+        messages=[{
+            "role": "user",
+            "content": [{
+                "text": ANALYSIS_PROMPT.format(ticker=ticker, data_summary=data_summary)
+            }]
+        }],
+        inferenceConfig=ANALYSIS_INFERENCE_CONFIG
+    )
+
+    raw_text = resp['output']['message']['content'][0]['text'].strip()
+    print(f"--- Bedrock Analysis Response for {ticker} ---")
+    print(raw_text)
+    print("--- End Response ---")
+
+    return _parse_analysis_response(raw_text)
+
+
+# Update the helper function
+async def analyze_stock_performance(ticker, period="1y"):
+    """
+    Analyzes historical stock performance using price data and AWS Bedrock.
+    Returns analysis, sentiment, and disclaimer.
+
+    Results are memoized per (ticker, period, last bar, model), so repeat
+    views before the next bar prints skip Bedrock, and with the history
+    store serving closed-market reads from disk, yfinance too.
+    """
+    try:
+        metrics = await _load_performance_metrics(ticker, period)
+
+        if metrics is None:
+            return _no_history_analysis(ticker, period)
+
+        # Call Bedrock for analysis
+        try:
+            return await analysis_cache.get_or_compute(
+                _analysis_cache_key(ticker, period, metrics),
+                lambda: _model_analysis(ticker, period, metrics),
+                cacheable=_cacheable_analysis
+            )
 
         except Exception as bedrock_error:
             print(f"Bedrock error: {bedrock_error}")
@@ -1015,30 +2003,7 @@ Return ONLY the JSON object, no other text."""
             traceback.print_exc()
 
             # Return basic analysis if Bedrock fails
-            basic_analysis = f"Over the {period} period, {ticker} "
-            if total_return > 0:
-                basic_analysis += f"has gained {total_return:.2f}%, "
-            else:
-                basic_analysis += f"has declined {abs(total_return):.2f}%, "
-
-            basic_analysis += f"moving from ${start_price:.2f} to ${current_price:.2f}. "
-            basic_analysis += f"The stock reached a high of ${high_price:.2f} and a low of ${low_price:.2f} during this period. "
-            basic_analysis += f"Price volatility measured at {volatility:.2f}%, "
-
-            if volatility < 2:
-                basic_analysis += "indicating relatively stable price movements."
-            elif volatility < 4:
-                basic_analysis += "showing moderate price fluctuations."
-            else:
-                basic_analysis += "reflecting significant price swings."
-
-            basic_sentiment = "bullish" if total_return > 5 else ("bearish" if total_return < -5 else "neutral")
-
-            return {
-                "analysis": basic_analysis,
-                "sentiment": basic_sentiment,
-                "disclaimer": "Basic analysis only. AI-powered analysis unavailable. Not financial advice."
-            }
+            return _basic_analysis(ticker, period, metrics)
 
     except Exception as e:
         print(f"Stock analysis error for {ticker}: {str(e)}")
@@ -1071,6 +2036,8 @@ async def analyze_stock(ticker: str, period: str = "1y"):
             detail=f"Invalid period. Must be one of: {', '.join(valid_periods)}"
         )
 
+    explore_planner.record_view(ticker)
+
     try:
         result = await analyze_stock_performance(ticker.upper(), period)
         return result
@@ -1081,118 +2048,140 @@ async def analyze_stock(ticker: str, period: str = "1y"):
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
-# Add this helper function
-async def generate_pinned_stocks_overview(userId: str, days: int = 7):
+@app.get("/analyze/{ticker}/metrics")
+async def analyze_stock_metrics(ticker: str, period: str = "1y"):
     """
-    Generates an overview of all pinned stocks including news analysis.
-    Returns overview, sentiment, and individual stock summaries.
+    Raw performance metrics and technical indicators behind /analyze,
+    without the model call: return, volatility, moving averages, RSI, MACD,
+    Bollinger bands, ATR, max drawdown, Sharpe ratio and beta to SPY.
+    Values that need more history than the period provides are null.
     """
+    valid_periods = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
+
+    if period not in valid_periods:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid period. Must be one of: {', '.join(valid_periods)}"
+        )
+
+    ticker = ticker.upper()
+    explore_planner.record_view(ticker)
+
     try:
-        loop = asyncio.get_running_loop()
-        # 1. Get user's pinned stocks
-        def get_db_favorites():
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT ticker, name FROM favorites WHERE user_id = ?",
-                (userId,)
-            )
-            rows = cursor.fetchall()
-            conn.close()
-            return rows
+        metrics = await _load_performance_metrics(ticker, period)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing metrics: {str(e)}")
 
-        rows = await loop.run_in_executor(None, get_db_favorites)
+    if metrics is None:
+        raise HTTPException(status_code=404, detail=f"No historical data available for {ticker} over the {period} period.")
 
-        if not rows:
-            return {
-                "userId": userId,
-                "stock_count": 0,
-                "overview": "No pinned stocks found for this user.",
-                "sentiment": "neutral",
-                "individual_summaries": [],
-                "disclaimer": "No data available."
-            }
+    return {
+        "ticker": ticker,
+        "period": period,
+        "benchmark": BENCHMARK_TICKER,
+        "as_of": metrics.pop("as_of"),
+        "metrics": metrics
+    }
 
-        # 2. Collect news and summaries for each stock
-        individual_summaries = []
-        all_news_combined = []
 
-        for ticker, name in rows:
-            try:
-                # Get news for this ticker
-                articles = await fetch_company_news(ticker, days)
+async def _fetch_pinned_news(ticker, days):
+    """
+    Returns (news_texts, news_urls) for up to five recent articles.
+    """
+    articles = (await fetch_company_news(ticker, days))[:5]
+    return _article_texts_and_urls(articles)
 
-                if not articles:
-                    individual_summaries.append({
-                        "ticker": ticker,
-                        "name": name,
-                        "summary": "No recent news available.",
-                        "sentiment": "neutral",
-                        "article_count": 0,
-                        "sources": []
-                    })
-                    continue
-
-                articles = articles[:5]
-
-                # Extract news texts and URLs
-                news_texts = []
-                news_urls = []
-                for article in articles:
-                    if isinstance(article, dict):
-                        news_texts.append(article.get("summary", "") or "")
-                        news_urls.append(article.get("url", "") or "")
-                    else:
-                        news_texts.append(getattr(article, "summary", "") or "")
-                        news_urls.append(getattr(article, "url", "") or "")
-
-                # Get summary for this individual stock
-                stock_summary = await summarize_news_with_bedrock(ticker, news_texts, news_urls)
-
-                individual_summaries.append({
-                    "ticker": ticker,
-                    "name": name,
-                    "summary": stock_summary.get("summary", "No summary available."),
-                    "sentiment": stock_summary.get("sentiment", "neutral"),
-                    "article_count": len(articles),
-                    "sources": stock_summary.get("sources", [])
-                })
 
-                # Combine for overall analysis
-                combined_text = f"{ticker} ({name}): {stock_summary.get('summary', '')}"
-                all_news_combined.append(combined_text)
-
-            except Exception as e:
-                print(f"Error processing {ticker}: {e}")
-                individual_summaries.append({
-                    "ticker": ticker,
-                    "name": name,
-                    "summary": f"Error retrieving news: {str(e)[:100]}",
-                    "sentiment": "neutral",
-                    "article_count": 0,
-                    "sources": []
-                })
+def _pinned_summary_entry(ticker, name, article_count, stock_summary):
+    """
+    Returns (individual_summary, combined_text) for the overview response.
+    """
+    return {
+        "ticker": ticker,
+        "name": name,
+        "summary": stock_summary.get("summary", "No summary available."),
+        "sentiment": stock_summary.get("sentiment", "neutral"),
+        "article_count": article_count,
+        "sources": stock_summary.get("sources", [])
+    }, f"{ticker} ({name}): {stock_summary.get('summary', '')}"
 
-        # 3. Generate overall portfolio overview using Bedrock
-        if not all_news_combined:
-            return {
-                "userId": userId,
-                "stock_count": len(rows),
-                "overview": "Unable to generate overview due to lack of news data.",
-                "sentiment": "neutral",
-                "individual_summaries": individual_summaries,
-                "disclaimer": "This is automated analysis. Not financial advice."
-            }
 
-        portfolio_context = "\n\n".join(all_news_combined)
+def _pinned_empty_entry(ticker, name, message):
+    return {
+        "ticker": ticker,
+        "name": name,
+        "summary": message,
+        "sentiment": "neutral",
+        "article_count": 0,
+        "sources": []
+    }, None
 
-        try:
-            resp = await loop.run_in_executor(None, partial(bedrock_runtime.converse,
-                modelId=MODEL_ID,
-                messages=[{
-                    "role": "user",
-                    "content": [{
-                        "text": f"""Analyze the following portfolio of {len(rows)} stocks and their recent news summaries:
+
+def _pinned_error_message(ticker, error):
+    if isinstance(error, asyncio.TimeoutError):
+        print(f"Timed out processing {ticker} after {PINNED_OVERVIEW_TICKER_TIMEOUT}s")
+        return "Timed out retrieving news."
+    print(f"Error processing {ticker}: {error}")
+    return f"Error retrieving news: {str(error)[:100]}"
+
+
+async def _summarize_pinned_stock(ticker, name, days):
+    """
+    Fetches news and a Bedrock summary for one pinned stock.
+    Returns (individual_summary, combined_text); combined_text is None when
+    the stock has nothing to contribute to the portfolio overview.
+    Failures and timeouts are reported in the summary instead of raised.
+    """
+    async def summarize():
+        news_texts, news_urls = await _fetch_pinned_news(ticker, days)
+
+        if not news_texts:
+            return _pinned_empty_entry(ticker, name, "No recent news available.")
+
+        # Get summary for this individual stock
+        stock_summary = await summarize_news_with_bedrock(ticker, news_texts, news_urls)
+        return _pinned_summary_entry(ticker, name, len(news_texts), stock_summary)
+
+    try:
+        return await asyncio.wait_for(summarize(), timeout=PINNED_OVERVIEW_TICKER_TIMEOUT)
+    except Exception as e:
+        return _pinned_empty_entry(ticker, name, _pinned_error_message(ticker, e))
+
+
+async def _summarize_pinned_stocks_batched(rows, days):
+    """
+    Batched variant of the per-ticker fan-out: news is still fetched
+    concurrently, but summaries for many tickers share Bedrock calls.
+    Returns a list of (individual_summary, combined_text) in `rows` order.
+    """
+    semaphore = asyncio.Semaphore(PINNED_OVERVIEW_CONCURRENCY)
+
+    async def fetch(ticker):
+        async with semaphore:
+            return await asyncio.wait_for(_fetch_pinned_news(ticker, days), timeout=PINNED_OVERVIEW_TICKER_TIMEOUT)
+
+    fetched = await asyncio.gather(*(fetch(ticker) for ticker, _ in rows), return_exceptions=True)
+
+    items = [
+        {"ticker": ticker, "name": name, "news_texts": news[0], "news_urls": news[1]}
+        for (ticker, name), news in zip(rows, fetched)
+        if not isinstance(news, BaseException) and news[0]
+    ]
+    summaries = await summarize_news_batch_with_bedrock(items)
+
+    results = []
+    for (ticker, name), news in zip(rows, fetched):
+        if isinstance(news, BaseException):
+            results.append(_pinned_empty_entry(ticker, name, _pinned_error_message(ticker, news)))
+        elif not news[0]:
+            results.append(_pinned_empty_entry(ticker, name, "No recent news available."))
+        else:
+            results.append(_pinned_summary_entry(ticker, name, len(news[0]), summaries[ticker]))
+
+    return results
+
+
+PORTFOLIO_OVERVIEW_PROMPT = """Analyze the following portfolio of {stock_count} stocks and their recent news summaries:
 
 {portfolio_context}
 
@@ -1207,70 +2196,144 @@ Provide your response as a JSON object with exactly two keys:
 
 Be specific and reference individual stocks where relevant.
 Return ONLY the JSON object, no other text."""
+
+PORTFOLIO_OVERVIEW_INFERENCE_CONFIG = {
+    "maxTokens": 1000,
+    "temperature": 0.3
+}
+
+
+async def _get_user_favorites(userId):
+    return await db.afetchall(
+        "SELECT ticker, name FROM favorites WHERE user_id = ?",
+        (userId,)
+    )
+
+
+def _overview_response(userId, rows, individual_summaries, overview, sentiment, disclaimer):
+    return {
+        "userId": userId,
+        "stock_count": len(rows),
+        "overview": overview,
+        "sentiment": sentiment,
+        "individual_summaries": individual_summaries,
+        "disclaimer": disclaimer
+    }
+
+
+def _parse_portfolio_overview(raw_text):
+    """
+    Returns (overview, sentiment, disclaimer) from the model's raw text.
+    Raises json.JSONDecodeError if the embedded JSON is malformed.
+    """
+    if not raw_text:
+        return "Model returned empty response.", "neutral", "This is automated analysis. Not financial advice."
+
+    # Extract JSON from response
+    json_str = extract_json_text(raw_text)
+    if json_str is None:
+        # No JSON found, use raw text as overview
+        return raw_text[:1000], "neutral", "This is automated analysis. Not financial advice."
+
+    data = json.loads(json_str)
+
+    overview_text = data.get("overview", "").strip()
+    sentiment = data.get("sentiment", "neutral").lower()
+
+    # Validate sentiment
+    if sentiment not in ["bullish", "bearish", "neutral"]:
+        sentiment = "neutral"
+
+    if not overview_text:
+        overview_text = "No overview provided by model."
+
+    return overview_text, sentiment, "This is automated analysis based on recent news. Not financial advice."
+
+
+def _basic_portfolio_overview(rows, individual_summaries):
+    """
+    Sentiment-count fallback used when Bedrock is unavailable.
+    Returns (overview, sentiment, disclaimer).
+    """
+    stock_names = [name for _, name in rows]
+    basic_overview = f"Portfolio contains {len(rows)} stocks: {', '.join(stock_names)}. "
+
+    # Count sentiments
+    sentiments = [s.get("sentiment", "neutral") for s in individual_summaries]
+    bullish_count = sentiments.count("positive") + sentiments.count("bullish")
+    bearish_count = sentiments.count("negative") + sentiments.count("bearish")
+
+    if bullish_count > bearish_count:
+        basic_overview += f"Overall sentiment is positive with {bullish_count} stocks showing bullish indicators."
+        portfolio_sentiment = "bullish"
+    elif bearish_count > bullish_count:
+        basic_overview += f"Overall sentiment is negative with {bearish_count} stocks showing bearish indicators."
+        portfolio_sentiment = "bearish"
+    else:
+        basic_overview += "Overall sentiment is mixed across the portfolio."
+        portfolio_sentiment = "neutral"
+
+    return basic_overview, portfolio_sentiment, "Basic analysis only. AI-powered overview unavailable. Not financial advice."
+
+
+# Add this helper function
+async def generate_pinned_stocks_overview(userId: str, days: int = 7, batch: bool = False):
+    """
+    Generates an overview of all pinned stocks including news analysis.
+    Returns overview, sentiment, and individual stock summaries.
+    With batch=True, per-ticker summaries are packed into as few Bedrock calls as possible.
+    """
+    try:
+        # 1. Get user's pinned stocks
+        rows = await _get_user_favorites(userId)
+
+        if not rows:
+            return _overview_response(userId, rows, [], "No pinned stocks found for this user.", "neutral", "No data available.")
+
+        # 2. Collect news and summaries for each stock, a bounded number at a time.
+        # gather() keeps results in favorites order regardless of completion order.
+        if batch:
+            results = await _summarize_pinned_stocks_batched(rows, days)
+        else:
+            semaphore = asyncio.Semaphore(PINNED_OVERVIEW_CONCURRENCY)
+
+            async def bounded(ticker, name):
+                async with semaphore:
+                    return await _summarize_pinned_stock(ticker, name, days)
+
+            results = await asyncio.gather(*(bounded(ticker, name) for ticker, name in rows))
+
+        individual_summaries = [summary for summary, _ in results]
+        all_news_combined = [combined for _, combined in results if combined]
+
+        # 3. Generate overall portfolio overview using Bedrock
+        if not all_news_combined:
+            return _overview_response(
+                userId, rows, individual_summaries,
+                "Unable to generate overview due to lack of news data.", "neutral",
+                "This is automated analysis. Not financial advice."
+            )
+
+        portfolio_context = "\n\n".join(all_news_combined)
+
+        try:
+            resp = await converse(
+                modelId=MODEL_ID,
+                messages=[{
+                    "role": "user",
+                    "content": [{
+                        "text": PORTFOLIO_OVERVIEW_PROMPT.format(stock_count=len(rows), portfolio_context=portfolio_context)
                     }]
                 }],
-                inferenceConfig={
-                    "maxTokens": 1000,
-                    "temperature": 0.3
-                }
-            ))
+                inferenceConfig=PORTFOLIO_OVERVIEW_INFERENCE_CONFIG
+            )
 
             raw_text = resp['output']['message']['content'][0]['text'].strip()
             print(f"--- Portfolio Overview Response ---")
             print(raw_text)
             print("--- End Response ---")
 
-            if not raw_text:
-                return {
-                    "userId": userId,
-                    "stock_count": len(rows),
-                    "overview": "Model returned empty response.",
-                    "sentiment": "neutral",
-                    "individual_summaries": individual_summaries,
-                    "disclaimer": "This is automated analysis. Not financial advice."
-                }
-
-            # Extract JSON from response
-            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', raw_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_match = re.search(r'\{.*\}', raw_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                else:
-                    # No JSON found, use raw text as overview
-                    return {
-                        "userId": userId,
-                        "stock_count": len(rows),
-                        "overview": raw_text[:1000],
-                        "sentiment": "neutral",
-                        "individual_summaries": individual_summaries,
-                        "disclaimer": "This is automated analysis. Not financial advice."
-                    }
-
-            # Parse JSON
-            import json as json_module
-            data = json_module.loads(json_str)
-
-            overview_text = data.get("overview", "").strip()
-            sentiment = data.get("sentiment", "neutral").lower()
-
-            # Validate sentiment
-            if sentiment not in ["bullish", "bearish", "neutral"]:
-                sentiment = "neutral"
-
-            if not overview_text:
-                overview_text = "No overview provided by model."
-
-            return {
-                "userId": userId,
-                "stock_count": len(rows),
-                "overview": overview_text,
-                "sentiment": sentiment,
-                "individual_summaries": individual_summaries,
-                "disclaimer": "This is automated analysis based on recent news. Not financial advice."
-            }
+            overview, sentiment, disclaimer = _parse_portfolio_overview(raw_text)
 
         except Exception as bedrock_error:
             print(f"Bedrock error for portfolio overview: {bedrock_error}")
@@ -1278,32 +2341,9 @@ Return ONLY the JSON object, no other text."""
             traceback.print_exc()
 
             # Fallback to basic overview
-            stock_names = [name for _, name in rows]
-            basic_overview = f"Portfolio contains {len(rows)} stocks: {', '.join(stock_names)}. "
-
-            # Count sentiments
-            sentiments = [s.get("sentiment", "neutral") for s in individual_summaries]
-            bullish_count = sentiments.count("positive") + sentiments.count("bullish")
-            bearish_count = sentiments.count("negative") + sentiments.count("bearish")
-
-            if bullish_count > bearish_count:
-                basic_overview += f"Overall sentiment is positive with {bullish_count} stocks showing bullish indicators."
-                portfolio_sentiment = "bullish"
-            elif bearish_count > bullish_count:
-                basic_overview += f"Overall sentiment is negative with {bearish_count} stocks showing bearish indicators."
-                portfolio_sentiment = "bearish"
-            else:
-                basic_overview += "Overall sentiment is mixed across the portfolio."
-                portfolio_sentiment = "neutral"
-
-            return {
-                "userId": userId,
-                "stock_count": len(rows),
-                "overview": basic_overview,
-                "sentiment": portfolio_sentiment,
-                "individual_summaries": individual_summaries,
-                "disclaimer": "Basic analysis only. AI-powered overview unavailable. Not financial advice."
-            }
+            overview, sentiment, disclaimer = _basic_portfolio_overview(rows, individual_summaries)
+
+        return _overview_response(userId, rows, individual_summaries, overview, sentiment, disclaimer)
 
     except Exception as e:
         print(f"Error generating portfolio overview: {str(e)}")
@@ -1314,13 +2354,14 @@ Return ONLY the JSON object, no other text."""
 
 # Add this endpoint
 @app.get("/pinned/overview/{userId}", response_model=PinnedStocksOverviewResponse)
-async def get_pinned_stocks_overview(userId: str, days: int = 7):
+async def get_pinned_stocks_overview(userId: str, days: int = 7, batch: bool = False):
     """
     Get a comprehensive overview of all pinned stocks including news analysis.
 
     Parameters:
     - userId: User identifier (query parameter)
     - days: Number of days to look back for news (default: 7)
+    - batch: Summarize several stocks per Bedrock call (default: false)
 
     Returns:
     - userId: The user ID
@@ -1336,9 +2377,15 @@ async def get_pinned_stocks_overview(userId: str, days: int = 7):
     if days < 1 or days > 30:
         raise HTTPException(status_code=400, detail="days must be between 1 and 30")
 
+    user_id = userId.strip()
+    overview_active_users[user_id] = time.time()
+
     try:
-        result = await generate_pinned_stocks_overview(userId.strip(), days)
-        return result
+        # Pre-warmed by refresh_pinned_overviews; a stale copy is served while it refreshes
+        return await pinned_overview_swr.get(
+            (user_id, days, batch),
+            lambda: generate_pinned_stocks_overview(user_id, days, batch)
+        )
 
     except HTTPException:
         raise
@@ -1346,144 +2393,84 @@ async def get_pinned_stocks_overview(userId: str, days: int = 7):
         raise HTTPException(status_code=500, detail=f"Overview generation failed: {str(e)}")
 
 
-async def summarize_market_with_bedrock(ticker, news_texts, news_urls=None):
-    """
-    Summarizes news articles using AWS Bedrock Claude model.
-    Returns a dict with summary, sentiment, sources, and disclaimer.
-    """
-    if not news_texts or all(not text.strip() for text in news_texts):
-        return {
-            "summary": "No news content available to summarize.",
-            "sentiment": "neutral",
-            "sources": news_urls or [],
-            "disclaimer": "Summarized news. Not financial advice."
-        }
-
-    # Ensure articles are trimmed to avoid overloading the context
-    cleaned_texts = [t[:2000] for t in news_texts[:5] if t and t.strip()]
-
-    if not cleaned_texts:
-        return {
-            "summary": "No valid news content after processing.",
-            "sentiment": "neutral",
-            "sources": news_urls or [],
-            "disclaimer": "Summarized news. Not financial advice."
-        }
+def _default_overview_key(user_id):
+    # What the Home page asks for: the endpoint's defaults
+    return (user_id, 7, False)
 
-    news_content = "\n\n".join(cleaned_texts)
 
-    loop = asyncio.get_running_loop()
+async def _prewarm_pinned_overview(user_id):
+    key = _default_overview_key(user_id)
     try:
-        # Call Bedrock with improved prompt
-        resp = await loop.run_in_executor(None, partial(bedrock_runtime.converse,
-            modelId=MODEL_ID,
-            messages=[{
-                "role": "user",
-                "content": [{
-                    "text": f"""Analyze the following news articles about {ticker} and provide a summary.
+        await pinned_overview_swr.refresh(key, lambda: generate_pinned_stocks_overview(*key))
+    except Exception as e:
+        print(f"Error pre-warming pinned overview for {user_id}: {e}")
 
-News Articles:
-{news_content}
 
-Provide your response as a JSON object with exactly two keys:
-1. "summary": An in depth explanation, consisting of at least 200 words
-2. "sentiment": One of "positive", "negative", or "neutral"
+async def refresh_pinned_overviews():
+    """
+    Scheduled job: rebuild the default overview (7 days, unbatched) for every
+    user who opened an overview within PINNED_OVERVIEW_ACTIVE_SECONDS.
+    """
+    cutoff = time.time() - PINNED_OVERVIEW_ACTIVE_SECONDS
 
-Return ONLY the JSON object, no other text."""
-                }]
-            }],
-            inferenceConfig={
-                "maxTokens": 600,
-                "temperature": 0.3
-            }
-        ))
+    def load_activity(conn):
+        # Every worker's overview requests, recorded by sync_worker_state
+        with conn:
+            rows = conn.execute("SELECT user_id, last_seen FROM overview_activity").fetchall()
+            conn.execute("DELETE FROM overview_activity WHERE last_seen < ?", (cutoff,))
+        return rows
 
-        # Extract the response text
-        raw_text = resp['output']['message']['content'][0]['text'].strip()
-        print(f"--- Bedrock Response for {ticker} ---")
-        print(raw_text)
-        print("--- End Response ---")
+    rows = await db.run(load_activity)
+    active = [user_id for user_id, seen in rows if seen >= cutoff]
+    for user_id, seen in rows:
+        if seen < cutoff:
+            for key in pinned_overview_swr.keys():
+                if key[0] == user_id:
+                    pinned_overview_swr.invalidate(key)
 
-        if not raw_text:
-            return {
-                "summary": "Model returned empty response.",
-                "sentiment": "neutral",
-                "sources": news_urls or [],
-                "disclaimer": "Summarized news. Not financial advice."
-            }
+    semaphore = asyncio.Semaphore(PINNED_OVERVIEW_PREWARM_CONCURRENCY)
 
-        # Try to parse as JSON
-        # First, try to extract JSON from markdown code blocks
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', raw_text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            # Try to find JSON object directly
-            json_match = re.search(r'\{.*\}', raw_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-            else:
-                # No JSON found, treat entire response as summary
-                return {
-                    "summary": raw_text[:500],  # Limit length
-                    "sentiment": "neutral",
-                    "sources": news_urls or [],
-                    "disclaimer": "Summarized news. Not financial advice."
-                }
-
-        # Parse the JSON
-        try:
-            data = json.loads(json_str)
+    async def bounded(user_id):
+        async with semaphore:
+            await _prewarm_pinned_overview(user_id)
 
-            # Validate required keys
-            summary = data.get("summary", "").strip()
-            sentiment = data.get("sentiment", "neutral").lower()
+    await asyncio.gather(*(bounded(user_id) for user_id in active))
+    print(f"[{datetime.now()}] Pre-warmed pinned overviews for {len(active)} active users.")
 
-            # Validate sentiment value
-            if sentiment not in ["positive", "negative", "neutral"]:
-                sentiment = "neutral"
 
-            if not summary:
-                summary = "No summary provided by model."
+def _invalidate_pinned_overview_now(user_id):
+    # The default key is always included so a first load already in flight is discarded too
+    keys = {key for key in pinned_overview_swr.keys() if key[0] == user_id}
+    keys.add(_default_overview_key(user_id))
+    for key in keys:
+        pinned_overview_swr.invalidate(key)
 
-            return {
-                "summary": summary,
-                "sentiment": sentiment,
-                "sources": news_urls or [],
-                "disclaimer": "Summarized news. Not financial advice."
-            }
+    if user_id in overview_active_users:
+        asyncio.ensure_future(_prewarm_pinned_overview(user_id))
 
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing error: {e}")
-            print(f"Attempted to parse: {json_str[:200]}")
 
-            # Fallback: use raw text as summary
-            return {
-                "summary": raw_text[:500],
-                "sentiment": "neutral",
-                "sources": news_urls or [],
-                "disclaimer": "Summarized news. Not financial advice."
-            }
+def invalidate_pinned_overview(user_id):
+    """
+    Drops a user's cached overviews after their favorites change and, if they
+    are active, starts rebuilding the default one. Safe to call from worker threads.
+    """
+    if main_loop is not None:
+        main_loop.call_soon_threadsafe(_invalidate_pinned_overview_now, user_id)
 
-    except Exception as e:
-        print(f"Bedrock API Error for {ticker}: {str(e)}")
-        import traceback
-        traceback.print_exc()
 
-        return {
-            "summary": f"Error generating summary: {str(e)[:100]}",
-            "sentiment": "error",
-            "sources": news_urls or [],
-            "disclaimer": "Summarized news. Not financial advice."
-        }
+async def summarize_market_with_bedrock(ticker, news_texts, news_urls=None):
+    """
+    Summarizes market news articles in depth using AWS Bedrock Claude model.
+    Returns a dict with summary, sentiment, sources, and disclaimer.
+    """
+    return await _summarize_with_bedrock(ticker, news_texts, news_urls, MARKET_SUMMARY_PROMPT)
 
 
-@app.get("/news/market/summary")
-async def summarize_market_news(days: int = 7):
+async def _compute_market_summary(days):
     """
-    Fetches general market news and returns an AI-generated summary and sentiment.
+    Fetches general market news and summarizes it. Raises when Finnhub or
+    Bedrock fails so the stale-while-revalidate cache keeps its last good copy.
     """
-
     # 1. Fetch general market news
     articles = await fetch_market_news(category="general", days=days)
 
@@ -1492,23 +2479,12 @@ async def summarize_market_news(days: int = 7):
             "summary": "No recent market news available.",
             "sentiment": "neutral",
             "sources": [],
-            "disclaimer": "No data available."
+            "disclaimer": "No data available.",
+            "generated_at": datetime.now().isoformat()
         }
 
-    # Limit to 5 articles
-    articles = articles[:10]
-
-    # 2. Extract article summaries and URLs
-    news_texts = []
-    news_urls = []
-
-    for article in articles:
-        if isinstance(article, dict):
-            news_texts.append(article.get("summary", "") or "")
-            news_urls.append(article.get("url", "") or "")
-        else:
-            news_texts.append(getattr(article, "summary", "") or "")
-            news_urls.append(getattr(article, "url", "") or "")
+    # 2. Extract article summaries and URLs from the 10 latest articles
+    news_texts, news_urls = _article_texts_and_urls(articles[:10])
 
     # 3. Summarize using Bedrock
     result = await summarize_market_with_bedrock(
@@ -1516,11 +2492,293 @@ async def summarize_market_news(days: int = 7):
         news_texts=news_texts,
         news_urls=news_urls
     )
+    if result.get("sentiment") == "error":
+        raise RuntimeError(result.get("summary"))
 
     # 4. Return response
     return {
         "summary": result.get("summary"),
         "sentiment": result.get("sentiment"),
         "sources": result.get("sources"),
-        "disclaimer": result.get("disclaimer")
-    }
\ No newline at end of file
+        "disclaimer": result.get("disclaimer"),
+        "generated_at": datetime.now().isoformat()
+    }
+
+
+async def refresh_market_summary():
+    """
+    Scheduled job: recompute the default market summary ahead of requests.
+    """
+    try:
+        await market_summary_swr.refresh(MARKET_SUMMARY_DAYS, lambda: _compute_market_summary(MARKET_SUMMARY_DAYS))
+        print(f"[{datetime.now()}] Market summary refreshed.")
+    except Exception as e:
+        print(f"Error refreshing market summary (serving last good copy): {e}")
+
+
+@app.get("/news/market/summary")
+async def summarize_market_news(days: int = 7):
+    """
+    Returns an AI-generated summary and sentiment of general market news.
+
+    Served from the last good summary, which the scheduler recomputes in the
+    background. A stale copy triggers a refresh but is still returned at once,
+    and stays in service if Finnhub or Bedrock fail.
+    """
+    # `days` is the cache key, so it must come from a bounded set
+    if days < 1 or days > 30:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 30")
+
+    try:
+        return await market_summary_swr.get(days, lambda: _compute_market_summary(days))
+    except Exception as e:
+        # Only reached when there has never been a good summary for `days`
+        return {
+            "summary": f"Error generating summary: {str(e)[:100]}",
+            "sentiment": "error",
+            "sources": [],
+            "disclaimer": "Summarized news. Not financial advice."
+        }
+
+# --- Streaming (Server-Sent Events) endpoints ---
+# Each stream emits "token" events with model text deltas as they arrive,
+# "ticker" events with per-stock partial results (pinned overview only),
+# and a final "result" event carrying the same payload as the blocking endpoint.
+
+def _sse(event, data):
+    return {"event": event, "data": json.dumps(data)}
+
+
+async def _stream_summary_events(ticker, news_texts, news_urls, prompt_template):
+    """
+    Streaming counterpart of _summarize_with_bedrock. Cached summaries are
+    sent straight away as the result; fresh ones stream token by token and
+    are stored in the summary cache once complete.
+    """
+    def result(summary):
+        return _sse("result", {
+            "summary": summary["summary"],
+            "sentiment": summary["sentiment"],
+            "sources": news_urls or [],
+            "disclaimer": "Summarized news. Not financial advice."
+        })
+
+    cleaned_texts = _clean_news_texts(news_texts)
+    if not cleaned_texts:
+        yield result({"summary": "No news content available to summarize.", "sentiment": "neutral"})
+        return
+
+    loop = asyncio.get_running_loop()
+    cache_key = summary_cache.make_key(MODEL_ID, prompt_template, ticker, *cleaned_texts)
+    cached = await loop.run_in_executor(db_executor, summary_cache.get, cache_key)
+    if cached is not None:
+        yield result(cached)
+        return
+
+    chunks = []
+    try:
+        async for text in stream_converse(
+            modelId=MODEL_ID,
+            messages=_summary_messages(ticker, cleaned_texts, prompt_template),
+            inferenceConfig=SUMMARY_INFERENCE_CONFIG
+        ):
+            chunks.append(text)
+            yield _sse("token", {"text": text})
+    except Exception as e:
+        print(f"Bedrock stream error for {ticker}: {str(e)}")
+        yield _sse("error", {"detail": str(e)[:200]})
+        yield result(_summary_error(e))
+        return
+
+    summary = _parse_summary_response("".join(chunks).strip())
+    await loop.run_in_executor(db_executor, summary_cache.set, cache_key, summary)
+    yield result(summary)
+
+
+@app.get("/summarize-news/{ticker}/stream")
+async def stream_summarized_news(ticker: str, period: int = 7):
+    """
+    Streaming variant of POST /summarize-news/{ticker}.
+    """
+    articles = await fetch_company_news(ticker, period)
+
+    async def events():
+        if not articles:
+            yield _sse("result", {
+                "summary": "No recent news found for this ticker.",
+                "sources": [],
+                "sentiment": "neutral",
+                "disclaimer": "No data available."
+            })
+            return
+
+        news_texts, news_urls = _article_texts_and_urls(articles)
+        async for event in _stream_summary_events(ticker, news_texts, news_urls, NEWS_SUMMARY_PROMPT):
+            yield event
+
+    return EventSourceResponse(events())
+
+
+@app.get("/news/market/summary/stream")
+async def stream_market_summary(days: int = 7):
+    """
+    Streaming variant of GET /news/market/summary. When a precomputed
+    summary exists it is sent as the result straight away.
+    """
+    if market_summary_swr.peek(days) is not None:
+        summary = await market_summary_swr.get(days, lambda: _compute_market_summary(days))
+        return EventSourceResponse(iter([_sse("result", summary)]))
+
+    articles = await fetch_market_news(category="general", days=days)
+
+    async def events():
+        if not articles:
+            yield _sse("result", {
+                "summary": "No recent market news available.",
+                "sentiment": "neutral",
+                "sources": [],
+                "disclaimer": "No data available."
+            })
+            return
+
+        news_texts, news_urls = _article_texts_and_urls(articles[:10])
+        async for event in _stream_summary_events("Overall Market", news_texts, news_urls, MARKET_SUMMARY_PROMPT):
+            yield event
+
+    return EventSourceResponse(events())
+
+
+@app.get("/analyze/{ticker}/stream")
+async def stream_stock_analysis(ticker: str, period: str = "1y"):
+    """
+    Streaming variant of GET /analyze/{ticker}.
+    """
+    valid_periods = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
+
+    if period not in valid_periods:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid period. Must be one of: {', '.join(valid_periods)}"
+        )
+
+    ticker = ticker.upper()
+
+    async def events():
+        try:
+            metrics = await _load_performance_metrics(ticker, period)
+        except Exception as e:
+            print(f"Stock analysis error for {ticker}: {str(e)}")
+            yield _sse("error", {"detail": f"Error analyzing stock: {str(e)}"})
+            return
+
+        if metrics is None:
+            yield _sse("result", _no_history_analysis(ticker, period))
+            return
+
+        loop = asyncio.get_running_loop()
+        cache_key = _analysis_cache_key(ticker, period, metrics)
+        cached = await loop.run_in_executor(db_executor, analysis_cache.get, cache_key)
+        if cached is not None:
+            yield _sse("result", cached)
+            return
+
+        data_summary = _performance_data_summary(ticker, period, metrics)
+        chunks = []
+        try:
+            async for text in stream_converse(
+                modelId=MODEL_ID,
+                messages=[{
+                    "role": "user",
+                    "content": [{
+                        "text": ANALYSIS_PROMPT.format(ticker=ticker, data_summary=data_summary)
+                    }]
+                }],
+                inferenceConfig=ANALYSIS_INFERENCE_CONFIG
+            ):
+                chunks.append(text)
+                yield _sse("token", {"text": text})
+
+            analysis = _parse_analysis_response("".join(chunks).strip())
+            if _cacheable_analysis(analysis):
+                await loop.run_in_executor(db_executor, analysis_cache.set, cache_key, analysis)
+        except Exception as bedrock_error:
+            print(f"Bedrock stream error: {bedrock_error}")
+            analysis = _basic_analysis(ticker, period, metrics)
+
+        yield _sse("result", analysis)
+
+    return EventSourceResponse(events())
+
+
+@app.get("/pinned/overview/{userId}/stream")
+async def stream_pinned_stocks_overview(userId: str, days: int = 7):
+    """
+    Streaming variant of GET /pinned/overview/{userId}. Each stock's summary is
+    sent as a "ticker" event as soon as it is ready (with its favorites index so
+    the client can keep order), followed by the streamed portfolio overview.
+    """
+    if not userId or not userId.strip():
+        raise HTTPException(status_code=400, detail="userId is required")
+
+    if days < 1 or days > 30:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 30")
+
+    user_id = userId.strip()
+    rows = await _get_user_favorites(user_id)
+
+    async def events():
+        if not rows:
+            yield _sse("result", _overview_response(user_id, rows, [], "No pinned stocks found for this user.", "neutral", "No data available."))
+            return
+
+        semaphore = asyncio.Semaphore(PINNED_OVERVIEW_CONCURRENCY)
+
+        async def bounded(index, ticker, name):
+            async with semaphore:
+                return index, await _summarize_pinned_stock(ticker, name, days)
+
+        tasks = [asyncio.ensure_future(bounded(index, ticker, name)) for index, (ticker, name) in enumerate(rows)]
+        results = [None] * len(rows)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, result = await next_done
+                results[index] = result
+                yield _sse("ticker", {"index": index, **result[0]})
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        individual_summaries = [summary for summary, _ in results]
+        all_news_combined = [combined for _, combined in results if combined]
+
+        if not all_news_combined:
+            yield _sse("result", _overview_response(
+                user_id, rows, individual_summaries,
+                "Unable to generate overview due to lack of news data.", "neutral",
+                "This is automated analysis. Not financial advice."
+            ))
+            return
+
+        chunks = []
+        try:
+            async for text in stream_converse(
+                modelId=MODEL_ID,
+                messages=[{
+                    "role": "user",
+                    "content": [{
+                        "text": PORTFOLIO_OVERVIEW_PROMPT.format(stock_count=len(rows), portfolio_context="\n\n".join(all_news_combined))
+                    }]
+                }],
+                inferenceConfig=PORTFOLIO_OVERVIEW_INFERENCE_CONFIG
+            ):
+                chunks.append(text)
+                yield _sse("token", {"text": text})
+
+            overview, sentiment, disclaimer = _parse_portfolio_overview("".join(chunks).strip())
+        except Exception as bedrock_error:
+            print(f"Bedrock stream error for portfolio overview: {bedrock_error}")
+            overview, sentiment, disclaimer = _basic_portfolio_overview(rows, individual_summaries)
+
+        yield _sse("result", _overview_response(user_id, rows, individual_summaries, overview, sentiment, disclaimer))
+
+    return EventSourceResponse(events())
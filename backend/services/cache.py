@@ -0,0 +1,351 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+_MISSING = object()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight task.
+    Every caller awaiting a key gets the result (or exception) of that task.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, fn))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+        # Shield so one cancelled caller doesn't cancel the load for the rest
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]):
+        try:
+            return await fn()
+        finally:
+            self._inflight.pop(key, None)
+
+    def __len__(self):
+        return len(self._inflight)
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries expire after `ttl` seconds.
+    `get_or_load` fills misses through a SingleFlight so a burst of
+    identical requests produces exactly one load. get/set/pop are
+    thread-safe, so sync handlers on worker threads can share a cache
+    with async code.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._data)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+
+        async def load():
+            result = await loader()
+            self.set(key, result)
+            return result
+
+        return await self._flight.do(key, load)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self._flight.coalesced,
+            "inflight": len(self._flight),
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+
+class StaleWhileRevalidate:
+    """
+    Keeps the last good value per key and serves it immediately.
+
+    A value younger than `fresh_for` is returned as is. An older one is
+    still returned straight away while a single background refresh runs.
+    A failed refresh leaves the previous value in place, so callers keep
+    getting the stale copy through upstream outages. Only a key that has
+    never loaded successfully makes a caller wait (or see the error).
+    `invalidate` drops a value outright, for when it is wrong rather than old.
+
+    With a `shared` tier (a SharedCache) every loaded value is also published
+    under `namespace`, and reads check it at most every `sync_every` seconds:
+    a newer copy from another worker replaces ours, and a missing one means
+    it was invalidated elsewhere. A refresh adopts a fresh copy some other
+    worker already loaded instead of calling the loader.
+
+    At most `max_keys` keys are tracked; beyond that the least recently used
+    key that isn't being loaded or deleted is forgotten entirely.
+    """
+
+    def __init__(
+        self,
+        fresh_for: float,
+        shared=None,
+        namespace: str = None,
+        shared_ttl: float = 86400,
+        sync_every: float = 5,
+        max_keys: int = 1000,
+    ):
+        self.fresh_for = fresh_for
+        self.shared = shared
+        self.namespace = namespace
+        self.shared_ttl = shared_ttl
+        self.sync_every = sync_every
+        self.max_keys = max_keys
+        # Every key we hold any state for, least recently used first
+        self._recent: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._loading: Dict[Hashable, int] = {}
+        self._values: Dict[Hashable, tuple] = {}
+        self._synced: Dict[Hashable, float] = {}
+        # Shared-tier deletes still running; reads of the key wait for them
+        self._deleting: Dict[Hashable, asyncio.Task] = {}
+        # Bumped by invalidate() so loads that started earlier can't store their result
+        self._generations: Dict[Hashable, int] = {}
+        self._flight = SingleFlight()
+        self._background: Dict[Hashable, asyncio.Task] = {}
+        self.refreshes = 0
+        self.failures = 0
+        self.stale_served = 0
+        self.shared_adopted = 0
+        self.evicted = 0
+        self.last_error: Optional[str] = None
+
+    def _touch(self, key: Hashable):
+        self._recent[key] = None
+        self._recent.move_to_end(key)
+        if len(self._recent) <= self.max_keys:
+            return
+        for old in list(self._recent):
+            if len(self._recent) <= self.max_keys:
+                break
+            # A running load or delete still relies on the key's generation
+            if old == key or old in self._loading or old in self._deleting:
+                continue
+            task = self._background.get(old)
+            if task is not None and not task.done():
+                continue
+            del self._recent[old]
+            for state in (self._values, self._synced, self._generations, self._background):
+                state.pop(old, None)
+            self.evicted += 1
+
+    def peek(self, key: Hashable) -> Optional[tuple]:
+        """
+        (value, loaded_at wall-clock time) or None.
+        """
+        entry = self._values.get(key)
+        return None if entry is None else (entry[1], entry[2])
+
+    async def refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Loads `key` now (coalesced with any refresh already running) and
+        stores the result. Raises if the loader fails; the old value is kept.
+        """
+        self._touch(key)
+        generation = self._generations.get(key, 0)
+
+        async def load():
+            self._loading[key] = self._loading.get(key, 0) + 1
+            try:
+                return await load_once()
+            finally:
+                self._loading[key] -= 1
+                if not self._loading[key]:
+                    del self._loading[key]
+
+        async def load_once():
+            if self.shared is not None:
+                row = await self._read_shared(key)
+                entry = self._values.get(key)
+                if (row is not None and time.time() - row[1] <= self.fresh_for
+                        and (entry is None or row[1] > entry[2])
+                        and self._generations.get(key, 0) == generation):
+                    # Another worker refreshed it already
+                    self._adopt(key, *row)
+                    return row[0]
+
+            try:
+                value = await loader()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                raise
+            self.refreshes += 1
+            if self._generations.get(key, 0) == generation:
+                loaded_at = time.time()
+                if self.shared is not None:
+                    try:
+                        await self.shared.aset(self.namespace, key, value, self.shared_ttl, stored_at=loaded_at)
+                    except Exception as e:
+                        print(f"Shared cache write failed for {key}: {e}")
+                if self._generations.get(key, 0) == generation:
+                    self._values[key] = (time.monotonic(), value, loaded_at)
+                    self._synced[key] = time.monotonic()
+            return value
+
+        return await self._flight.do((key, generation), load)
+
+    def invalidate(self, key: Hashable):
+        self._touch(key)
+        self._generations[key] = self._generations.get(key, 0) + 1
+        self._values.pop(key, None)
+        self._synced.pop(key, None)
+        if self.shared is not None:
+            # The SQLite write runs on the db executor, off the event loop
+            self._deleting[key] = asyncio.ensure_future(self._delete_shared(key))
+
+    async def _delete_shared(self, key: Hashable):
+        try:
+            await self.shared.adelete(self.namespace, key)
+        except Exception as e:
+            print(f"Shared cache delete failed for {key}: {e}")
+        finally:
+            if self._deleting.get(key) is asyncio.current_task():
+                del self._deleting[key]
+
+    def _adopt(self, key: Hashable, value: Any, stored_at: float):
+        # Age the local entry as if we had loaded it when the other worker did
+        age = max(0.0, time.time() - stored_at)
+        self._touch(key)
+        self._values[key] = (time.monotonic() - age, value, stored_at)
+        self._synced[key] = time.monotonic()
+        self.shared_adopted += 1
+
+    async def _read_shared(self, key: Hashable) -> Optional[tuple]:
+        deleting = self._deleting.get(key)
+        if deleting is not None:
+            # Don't read back a copy we've just invalidated
+            await asyncio.shield(deleting)
+        try:
+            return await self.shared.aget(self.namespace, key)
+        except Exception as e:
+            print(f"Shared cache read failed for {key}: {e}")
+            return None
+
+    async def _sync(self, key: Hashable):
+        """
+        Reconciles the local copy of `key` with the shared tier.
+        """
+        now = time.monotonic()
+        synced = self._synced.get(key)
+        if synced is not None and now - synced < self.sync_every:
+            return
+        self._synced[key] = now
+
+        generation = self._generations.get(key, 0)
+        row = await self._read_shared(key)
+        if self._generations.get(key, 0) != generation:
+            return
+
+        entry = self._values.get(key)
+        if row is None:
+            # Invalidated (or expired) by another worker
+            self._values.pop(key, None)
+        elif entry is None or row[1] > entry[2]:
+            self._adopt(key, *row)
+
+    def keys(self):
+        return list(self._values)
+
+    def _refresh_in_background(self, key: Hashable, loader: Callable[[], Awaitable[Any]]):
+        task = self._background.get(key)
+        if task is not None and not task.done():
+            return
+
+        async def run():
+            try:
+                await self.refresh(key, loader)
+            except Exception as e:
+                print(f"Background refresh failed for {key}: {e}")
+
+        self._background[key] = asyncio.ensure_future(run())
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        self._touch(key)
+        if self.shared is not None:
+            await self._sync(key)
+
+        entry = self._values.get(key)
+        if entry is None:
+            return await self.refresh(key, loader)
+
+        stored_at, value, _ = entry
+        if time.monotonic() - stored_at > self.fresh_for:
+            self.stale_served += 1
+            self._refresh_in_background(key, loader)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._values),
+            "fresh_for": self.fresh_for,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "stale_served": self.stale_served,
+            "shared_adopted": self.shared_adopted,
+            "evicted": self.evicted,
+            "last_error": self.last_error,
+        }
@@ -8,4 +8,96 @@ load_dotenv()
 FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
 
 if not FINNHUB_API_KEY:
-    raise RuntimeError("FINNHUB_API_KEY is not set")
\ No newline at end of file
+    raise RuntimeError("FINNHUB_API_KEY is not set")
+
+# Finnhub HTTP client pool
+FINNHUB_HTTP2 = os.getenv("FINNHUB_HTTP2", "true").lower() == "true"
+FINNHUB_MAX_CONNECTIONS = int(os.getenv("FINNHUB_MAX_CONNECTIONS", "20"))
+FINNHUB_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("FINNHUB_MAX_KEEPALIVE_CONNECTIONS", "10"))
+FINNHUB_MAX_CONNECTIONS_PER_HOST = int(os.getenv("FINNHUB_MAX_CONNECTIONS_PER_HOST", "10"))
+FINNHUB_KEEPALIVE_EXPIRY = float(os.getenv("FINNHUB_KEEPALIVE_EXPIRY", "30"))
+FINNHUB_TIMEOUT = float(os.getenv("FINNHUB_TIMEOUT", "10"))
+
+# Finnhub news cache
+NEWS_CACHE_TTL_SECONDS = float(os.getenv("NEWS_CACHE_TTL_SECONDS", "300"))
+NEWS_CACHE_MAX_ENTRIES = int(os.getenv("NEWS_CACHE_MAX_ENTRIES", "512"))
+
+# Bedrock summary cache
+SUMMARY_CACHE_TTL_SECONDS = float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", "21600"))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "2000"))
+
+# Pinned overview fan-out
+PINNED_OVERVIEW_CONCURRENCY = int(os.getenv("PINNED_OVERVIEW_CONCURRENCY", "5"))
+PINNED_OVERVIEW_TICKER_TIMEOUT = float(os.getenv("PINNED_OVERVIEW_TICKER_TIMEOUT", "30"))
+PINNED_OVERVIEW_BATCH_TOKEN_BUDGET = int(os.getenv("PINNED_OVERVIEW_BATCH_TOKEN_BUDGET", "12000"))
+PINNED_OVERVIEW_BATCH_MAX_TICKERS = int(os.getenv("PINNED_OVERVIEW_BATCH_MAX_TICKERS", "10"))
+
+# Local price-history store
+HISTORY_REFRESH_SECONDS = float(os.getenv("HISTORY_REFRESH_SECONDS", "900"))
+HISTORY_INTRADAY_REFRESH_SECONDS = float(os.getenv("HISTORY_INTRADAY_REFRESH_SECONDS", "60"))
+HISTORY_RETENTION_DAYS = float(os.getenv("HISTORY_RETENTION_DAYS", "30"))
+
+# Explore universe refresh
+EXPLORE_REFRESH_MINUTES = float(os.getenv("EXPLORE_REFRESH_MINUTES", "10"))
+EXPLORE_BATCH_SIZE = int(os.getenv("EXPLORE_BATCH_SIZE", "200"))
+EXPLORE_PRIORITY_SHARE = float(os.getenv("EXPLORE_PRIORITY_SHARE", "0.25"))
+EXPLORE_TOP_VIEWED = int(os.getenv("EXPLORE_TOP_VIEWED", "50"))
+
+# Per-user pinned tickers, kept in memory for explore filtering
+FAVORITES_CACHE_TTL_SECONDS = float(os.getenv("FAVORITES_CACHE_TTL_SECONDS", "600"))
+FAVORITES_CACHE_MAX_ENTRIES = int(os.getenv("FAVORITES_CACHE_MAX_ENTRIES", "5000"))
+
+# Symbol master: how long a ticker yfinance had no name for stays rejected
+SYMBOL_NEGATIVE_TTL_SECONDS = float(os.getenv("SYMBOL_NEGATIVE_TTL_SECONDS", "86400"))
+
+# Batch pin/unpin
+PINNED_BATCH_MAX_TICKERS = int(os.getenv("PINNED_BATCH_MAX_TICKERS", "200"))
+
+# Memoized /analyze results, keyed by ticker, period, last bar and model
+ANALYSIS_CACHE_TTL_SECONDS = float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "604800"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "2000"))
+
+# Market summary, recomputed in the background and served stale-while-revalidate
+MARKET_SUMMARY_REFRESH_MINUTES = float(os.getenv("MARKET_SUMMARY_REFRESH_MINUTES", "15"))
+MARKET_SUMMARY_FRESH_SECONDS = float(os.getenv("MARKET_SUMMARY_FRESH_SECONDS", "900"))
+MARKET_SUMMARY_DAYS = int(os.getenv("MARKET_SUMMARY_DAYS", "7"))
+
+# Pre-warmed pinned overviews for recently active users
+PINNED_OVERVIEW_REFRESH_MINUTES = float(os.getenv("PINNED_OVERVIEW_REFRESH_MINUTES", "15"))
+PINNED_OVERVIEW_FRESH_SECONDS = float(os.getenv("PINNED_OVERVIEW_FRESH_SECONDS", "900"))
+PINNED_OVERVIEW_ACTIVE_SECONDS = float(os.getenv("PINNED_OVERVIEW_ACTIVE_SECONDS", "86400"))
+PINNED_OVERVIEW_PREWARM_CONCURRENCY = int(os.getenv("PINNED_OVERVIEW_PREWARM_CONCURRENCY", "2"))
+PINNED_OVERVIEW_MAX_CACHED = int(os.getenv("PINNED_OVERVIEW_MAX_CACHED", "2000"))
+
+# Live quotes over /ws/quotes: one shared poller for all subscribed tickers
+QUOTE_POLL_SECONDS = float(os.getenv("QUOTE_POLL_SECONDS", "15"))
+QUOTE_MAX_TICKERS_PER_CLIENT = int(os.getenv("QUOTE_MAX_TICKERS_PER_CLIENT", "100"))
+
+# Upstream rate limits: token bucket, AIMD concurrency and a bounded retry budget.
+# Finnhub's free tier allows 60 calls/minute. These are totals for the whole
+# deployment: every uvicorn worker runs its own limiters, so each one gets
+# 1/WORKER_COUNT of the rate, burst and concurrency.
+FINNHUB_RATE_PER_SECOND = float(os.getenv("FINNHUB_RATE_PER_SECOND", "1"))
+FINNHUB_BURST = float(os.getenv("FINNHUB_BURST", "10"))
+BEDROCK_RATE_PER_SECOND = float(os.getenv("BEDROCK_RATE_PER_SECOND", "2"))
+BEDROCK_BURST = float(os.getenv("BEDROCK_BURST", "5"))
+BEDROCK_MAX_CONCURRENCY = int(os.getenv("BEDROCK_MAX_CONCURRENCY", "8"))
+UPSTREAM_MAX_ATTEMPTS = int(os.getenv("UPSTREAM_MAX_ATTEMPTS", "3"))
+UPSTREAM_RETRY_RATIO = float(os.getenv("UPSTREAM_RETRY_RATIO", "0.2"))
+# uvicorn takes its default --workers from WEB_CONCURRENCY too
+WORKER_COUNT = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+# Thread pools per blocking dependency, so one slow upstream can't starve the others
+YFINANCE_EXECUTOR_WORKERS = int(os.getenv("YFINANCE_EXECUTOR_WORKERS", "8"))
+BEDROCK_EXECUTOR_WORKERS = int(os.getenv("BEDROCK_EXECUTOR_WORKERS", "16"))
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "8"))
+COMPUTE_EXECUTOR_WORKERS = int(os.getenv("COMPUTE_EXECUTOR_WORKERS", "2"))
+
+# Background jobs: each interval is randomized by +/- this fraction
+SCHEDULER_JITTER = float(os.getenv("SCHEDULER_JITTER", "0.1"))
+
+# Multiple uvicorn workers: one leader runs background jobs, the rest share its results
+LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", "30"))
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "5000"))
+SHARED_CACHE_SYNC_SECONDS = float(os.getenv("SHARED_CACHE_SYNC_SECONDS", "5"))
+EXPLORE_SNAPSHOT_SYNC_SECONDS = float(os.getenv("EXPLORE_SNAPSHOT_SYNC_SECONDS", "15"))
@@ -0,0 +1,156 @@
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+
+class ConnectionPool:
+    """
+    Per-thread pool of persistent SQLite connections.
+
+    Each thread (request worker, executor thread, scheduler thread) gets one
+    connection, opened on first use and kept for the life of the process.
+    Pragmas are applied once when a connection is opened rather than on every
+    request, and each connection keeps a prepared-statement cache so repeated
+    queries skip re-parsing. The async methods run on `executor` (the loop's
+    default pool if None).
+    """
+
+    def __init__(
+        self,
+        db_file: str,
+        cached_statements: int = 256,
+        synchronous: str = "NORMAL",
+        mmap_size: int = 256 * 1024 * 1024,
+        busy_timeout_ms: int = 5000,
+        executor: Optional[Executor] = None,
+    ):
+        self.db_file = db_file
+        self.cached_statements = cached_statements
+        self.synchronous = synchronous
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.executor = executor
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._guard = threading.Lock()
+        self._wal_enabled = False
+
+    def _open(self) -> sqlite3.Connection:
+        # check_same_thread is off only so close_all() can run from the main
+        # thread; a connection is otherwise only ever used by its owner thread
+        conn = sqlite3.connect(
+            self.db_file,
+            timeout=self.busy_timeout_ms / 1000,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+        )
+        with self._guard:
+            if not self._wal_enabled:
+                # journal_mode is persistent in the database file, so once is enough
+                conn.execute("PRAGMA journal_mode=WAL")
+                self._wal_enabled = True
+            self._connections.append(conn)
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        This thread's connection. Do not close it; the pool owns it.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+        return conn
+
+    @contextmanager
+    def transaction(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        Runs the block in one transaction on this thread's connection and
+        commits on success or rolls back on error. `immediate` takes the write
+        lock up front (BEGIN IMMEDIATE) instead of on the first write.
+        """
+        conn = self.connection()
+        if immediate:
+            conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """
+        Runs several reads in one deferred transaction so they all see the
+        same committed state, even if a writer commits in between.
+        """
+        conn = self.connection()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+
+    def fetchall(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        return self.connection().execute(sql, params).fetchall()
+
+    def fetchone(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        return self.connection().execute(sql, params).fetchone()
+
+    def execute(self, sql: str, params: Sequence = ()) -> int:
+        """
+        Runs one write statement in its own transaction. Returns the row count.
+        """
+        with self.transaction() as conn:
+            return conn.execute(sql, params).rowcount
+
+    # --- Async interface ---
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Runs `fn(conn, *args)` on a worker thread with that thread's connection.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: fn(self.connection(), *args))
+
+    async def afetchall(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.fetchall, sql, params)
+
+    async def afetchone(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.fetchone, sql, params)
+
+    async def aexecute(self, sql: str, params: Sequence = ()) -> int:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.execute, sql, params)
+
+    def close_all(self):
+        with self._guard:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        # Threads that outlive the pool reopen lazily
+        self._local = threading.local()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._guard:
+            open_connections = len(self._connections)
+        return {
+            "db_file": self.db_file,
+            "open_connections": open_connections,
+            "cached_statements": self.cached_statements,
+            "synchronous": self.synchronous,
+            "mmap_size": self.mmap_size,
+        }
@@ -0,0 +1,95 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from services.config import (
+    YFINANCE_EXECUTOR_WORKERS,
+    BEDROCK_EXECUTOR_WORKERS,
+    DB_EXECUTOR_WORKERS,
+    COMPUTE_EXECUTOR_WORKERS,
+)
+
+
+class NamedExecutor(ThreadPoolExecutor):
+    """
+    Bounded thread pool for one blocking dependency, with queue stats.
+
+    A drop-in Executor for `loop.run_in_executor`. Every submitted task is
+    timed from submission to start (queue wait) and from start to finish
+    (run time), so saturation shows up as queue depth and wait time on the
+    pool that is actually saturated.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        super().__init__(max_workers=max_workers, thread_name_prefix=name)
+        self.name = name
+        self.max_workers = max_workers
+
+        self._stats_lock = threading.Lock()
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def submit(self, fn, /, *args, **kwargs):
+        queued_at = time.monotonic()
+
+        def timed():
+            started_at = time.monotonic()
+            waited = started_at - queued_at
+            with self._stats_lock:
+                self.started += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._stats_lock:
+                    self.completed += 1
+                    if not ok:
+                        self.failed += 1
+                    self.run_seconds += time.monotonic() - started_at
+
+        with self._stats_lock:
+            self.submitted += 1
+        return super().submit(timed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            started = self.started
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self.submitted - started,
+                "running": started - self.completed,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": round(self.wait_seconds / started * 1000, 2) if started else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+                "avg_run_ms": round(self.run_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+            }
+
+
+yfinance_executor = NamedExecutor("yfinance", YFINANCE_EXECUTOR_WORKERS)
+bedrock_executor = NamedExecutor("bedrock", BEDROCK_EXECUTOR_WORKERS)
+db_executor = NamedExecutor("db", DB_EXECUTOR_WORKERS)
+# CPU-bound number crunching (indicators), kept off the event loop
+compute_executor = NamedExecutor("compute", COMPUTE_EXECUTOR_WORKERS)
+
+EXECUTORS = {executor.name: executor for executor in (yfinance_executor, bedrock_executor, db_executor, compute_executor)}
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: executor.stats() for name, executor in EXECUTORS.items()}
+
+
+def shutdown_executors():
+    for executor in EXECUTORS.values():
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,180 @@
+import math
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from services.db import ConnectionPool
+
+
+def load_universe(file_path: str) -> List[Dict]:
+    """
+    Reads the explore universe from a `TICKER|Name` file (one per line).
+    Lines without a name use the ticker as the name.
+    """
+    stock_list = []
+    seen = set()
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            if '|' in line:
+                parts = line.split('|')
+                ticker = parts[0].strip()
+                name = parts[1].strip()
+            else:
+                ticker = line.strip()
+                name = ticker
+
+            if ticker in seen:
+                continue
+            seen.add(ticker)
+            stock_list.append({"ticker": ticker, "name": name})
+
+    return stock_list
+
+
+class ExploreRefreshPlanner:
+    """
+    Picks which tickers each explore refresh run should fetch.
+
+    Every run spends up to `priority_share` of the batch on priority tickers
+    (pinned by any user, or among the most viewed recently) and fills the rest
+    with the stalest tickers in the universe. Because the remainder is always
+    taken stalest-first, the whole universe rotates through in
+    ceil(universe / non-priority slots) runs, which bounds maximum staleness.
+
+    With a `db`, view counts are shared between worker processes: views are
+    counted in memory and added to the `explore_views` table by
+    `flush_views()`, and ranking and decay work on that table, so whichever
+    worker plans a run sees everyone's views.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        interval_seconds: float,
+        priority_share: float = 0.25,
+        top_viewed: int = 50,
+        db: Optional[ConnectionPool] = None,
+    ):
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.priority_slots = int(batch_size * priority_share)
+        self.top_viewed = top_viewed
+        self.db = db
+
+        self._views: Dict[str, float] = {}
+        self._last_attempt: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self.last_run: Optional[Dict] = None
+
+    def init(self):
+        if self.db is None:
+            return
+        with self.db.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS explore_views (
+                    ticker TEXT PRIMARY KEY,
+                    views REAL NOT NULL
+                )
+            """)
+
+    def record_view(self, ticker: str):
+        with self._lock:
+            ticker = ticker.upper()
+            self._views[ticker] = self._views.get(ticker, 0.0) + 1.0
+
+    def flush_views(self):
+        """
+        Adds the views counted here since the last flush to the shared
+        table. Blocking; call from a worker thread. No-op without a db.
+        """
+        if self.db is None:
+            return
+        with self._lock:
+            pending, self._views = self._views, {}
+        if pending:
+            with self.db.transaction() as conn:
+                conn.executemany(
+                    "INSERT INTO explore_views (ticker, views) VALUES (?, ?) "
+                    "ON CONFLICT(ticker) DO UPDATE SET views = views + excluded.views",
+                    list(pending.items())
+                )
+
+    def _decay_views(self):
+        # Halve view counts every run so "frequently viewed" tracks recent interest
+        if self.db is not None:
+            with self.db.transaction() as conn:
+                conn.execute("UPDATE explore_views SET views = views / 2")
+                conn.execute("DELETE FROM explore_views WHERE views < 0.25")
+            return
+        with self._lock:
+            self._views = {t: count / 2 for t, count in self._views.items() if count / 2 >= 0.25}
+
+    def most_viewed(self) -> List[str]:
+        if self.db is not None:
+            self.flush_views()
+            rows = self.db.fetchall("SELECT ticker FROM explore_views ORDER BY views DESC LIMIT ?", (self.top_viewed,))
+            return [row[0] for row in rows]
+        with self._lock:
+            ranked = sorted(self._views.items(), key=lambda item: item[1], reverse=True)
+        return [ticker for ticker, _ in ranked[:self.top_viewed]]
+
+    def _freshness(self, ticker: str, last_updated: Dict[str, datetime]) -> datetime:
+        # A ticker that was attempted but returned no data still counts as
+        # refreshed for ordering, so it doesn't hog every following batch
+        updated = last_updated.get(ticker)
+        attempted = self._last_attempt.get(ticker)
+        candidates = [t for t in (updated, attempted) if t is not None]
+        return max(candidates) if candidates else datetime.min
+
+    def next_batch(self, universe: List[Dict], last_updated: Dict[str, datetime], pinned: Iterable[str]) -> List[Dict]:
+        by_ticker = {item["ticker"]: item for item in universe}
+
+        priority = []
+        for ticker in list(dict.fromkeys(list(pinned) + self.most_viewed())):
+            if ticker in by_ticker and len(priority) < self.priority_slots:
+                priority.append(by_ticker[ticker])
+        chosen = {item["ticker"] for item in priority}
+
+        rest = sorted(
+            (item for item in universe if item["ticker"] not in chosen),
+            key=lambda item: self._freshness(item["ticker"], last_updated)
+        )
+        batch = priority + rest[:self.batch_size - len(priority)]
+
+        now = datetime.now()
+        for item in batch:
+            self._last_attempt[item["ticker"]] = now
+        self._decay_views()
+
+        return batch
+
+    def staleness_bound_seconds(self, universe_size: int) -> float:
+        rotating_slots = max(self.batch_size - self.priority_slots, 1)
+        return math.ceil(universe_size / rotating_slots) * self.interval_seconds
+
+    def report(self, universe: List[Dict], last_updated: Dict[str, datetime]) -> Dict:
+        now = datetime.now()
+        never_updated = [item["ticker"] for item in universe if item["ticker"] not in last_updated]
+        ages = {
+            item["ticker"]: (now - last_updated[item["ticker"]]).total_seconds()
+            for item in universe if item["ticker"] in last_updated
+        }
+        oldest = max(ages, key=ages.get) if ages else None
+
+        return {
+            "universe_size": len(universe),
+            "batch_size": self.batch_size,
+            "priority_slots": self.priority_slots,
+            "interval_seconds": self.interval_seconds,
+            "staleness_bound_seconds": self.staleness_bound_seconds(len(universe)),
+            "max_staleness_seconds": round(ages[oldest], 1) if oldest else None,
+            "oldest_ticker": oldest,
+            "never_updated": len(never_updated),
+            "last_run": self.last_run,
+        }
+
@@ -0,0 +1,168 @@
+import bisect
+from datetime import datetime
+from typing import AbstractSet, Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# sort= name -> how to build its ascending primary key from the snapshot.
+# Descending orders negate; ticker always breaks ties, ascending.
+SORT_ORDERS = {
+    "price": lambda s: -s.current_price,
+    "price_asc": lambda s: s.current_price,
+    "pct_up": lambda s: -s.pct_change,
+    "pct_down": lambda s: s.pct_change,
+    "abs_change": lambda s: -np.abs(s.cost_change),
+    "name": lambda s: np.char.lower(s.names.astype(str)),
+}
+DEFAULT_SORT = "price"
+
+
+class ExploreSnapshot:
+    """
+    Immutable, column-oriented copy of explore_stocks for one refresh.
+
+    Values live in NumPy arrays and every supported ordering is computed once
+    when the snapshot is built. Requests only walk a precomputed order and skip
+    the caller's pinned tickers, so serving a page never sorts or touches SQLite.
+    A refresh builds a new snapshot and swaps the reference; readers holding
+    the old one keep a consistent view.
+    """
+
+    __slots__ = (
+        "snapshot_id", "built_at", "tickers", "names", "current_price", "cost_change",
+        "pct_change", "last_updated", "position", "orders", "ranks", "sort_keys",
+    )
+
+    def __init__(self, snapshot_id: int, rows: Sequence[tuple]):
+        """
+        `rows` are (ticker, name, currentPrice, costChange, percentageChange, last_updated).
+        """
+        self.snapshot_id = snapshot_id
+        self.built_at = datetime.now()
+
+        self.tickers = np.array([row[0] for row in rows], dtype=object)
+        self.names = np.array([row[1] for row in rows], dtype=object)
+        self.current_price = np.array([row[2] for row in rows], dtype=float)
+        self.cost_change = np.array([row[3] for row in rows], dtype=float)
+        self.pct_change = np.array([row[4] for row in rows], dtype=float)
+        self.last_updated = np.array([row[5] for row in rows], dtype=object)
+        self.position: Dict[str, int] = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+        self.orders: Dict[str, np.ndarray] = {}
+        # ranks[sort][i] is where row i sits in that order, for cursor lookups
+        self.ranks: Dict[str, np.ndarray] = {}
+        # sort_keys[sort] is the (key, ticker) sequence in order, for resuming
+        # a cursor whose ticker is no longer in the snapshot
+        self.sort_keys: Dict[str, List[Tuple[Any, str]]] = {}
+
+        ticker_keys = self.tickers.astype(str)
+        for name, key_fn in SORT_ORDERS.items():
+            keys = key_fn(self)
+            if keys.dtype.kind == "f":
+                # Missing values sort last whatever the direction
+                keys = np.where(np.isnan(keys), np.inf, keys)
+            order = np.lexsort((ticker_keys, keys))
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+
+            self.orders[name] = order
+            self.ranks[name] = rank
+            self.sort_keys[name] = [(keys[i].item(), ticker_keys[i]) for i in order]
+
+        for array in (self.tickers, self.names, self.current_price, self.cost_change,
+                      self.pct_change, self.last_updated, *self.orders.values(), *self.ranks.values()):
+            array.setflags(write=False)
+
+    @classmethod
+    def empty(cls) -> "ExploreSnapshot":
+        return cls(0, [])
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def count_excluding(self, excluded: AbstractSet[str]) -> int:
+        return len(self.tickers) - sum(1 for ticker in excluded if ticker in self.position)
+
+    def _row(self, i: int) -> Dict:
+        return {
+            "ticker": self.tickers[i],
+            "name": self.names[i],
+            "currentPrice": float(self.current_price[i]),
+            "costChange": float(self.cost_change[i]),
+            "percentageChange": float(self.pct_change[i]),
+            "last_updated": self.last_updated[i],
+        }
+
+    def _start_after(self, order_name: str, after: Tuple[Any, str]) -> int:
+        key, ticker = after
+        i = self.position.get(ticker)
+        if i is not None:
+            return int(self.ranks[order_name][i]) + 1
+
+        # The cursor's ticker left the universe; resume at the first row that
+        # sorts after (key, ticker)
+        try:
+            return bisect.bisect_right(self.sort_keys[order_name], (key, ticker))
+        except TypeError:
+            raise ValueError("cursor does not match sort order")
+
+    def page(
+        self,
+        excluded: AbstractSet[str],
+        limit: int,
+        offset: int = 0,
+        after: Optional[Tuple[Any, str]] = None,
+        order_name: str = DEFAULT_SORT,
+    ) -> Tuple[List[Dict], Optional[Tuple[Any, str]]]:
+        """
+        One page of rows in `order_name` order, skipping `excluded` tickers.
+        Starts after the `after` cursor (sort key, ticker) if given, otherwise
+        after `offset` non-excluded rows. Returns (rows, cursor for the next page).
+        """
+        order = self.orders[order_name]
+        if after is not None:
+            start = self._start_after(order_name, after)
+        else:
+            # Pinned tickers ahead of the offset shift where the page starts
+            start = max(offset, 0)
+            if excluded:
+                skipped_ranks = sorted(
+                    int(self.ranks[order_name][self.position[t]]) for t in excluded if t in self.position
+                )
+                for rank in skipped_ranks:
+                    if rank < start:
+                        start += 1
+
+        results = []
+        last = None
+        for i in order[start:]:
+            if len(results) >= limit:
+                break
+            if self.tickers[i] in excluded:
+                continue
+            results.append(self._row(i))
+            last = i
+
+        next_cursor = None
+        if last is not None and len(results) == limit:
+            next_cursor = self.sort_keys[order_name][int(self.ranks[order_name][last])]
+        return results, next_cursor
+
+    def leaders(self, order_name: str, limit: int, keep=None) -> List[Dict]:
+        """
+        The first `limit` rows of a precomputed order, stopping at the first
+        row `keep(i)` rejects (e.g. the first non-gainer when listing gainers).
+        """
+        results = []
+        for i in self.orders[order_name][:limit]:
+            if keep is not None and not keep(i):
+                break
+            results.append(self._row(i))
+        return results
+
+    def movers(self, limit: int) -> Dict[str, List[Dict]]:
+        return {
+            "gainers": self.leaders("pct_up", limit, keep=lambda i: self.pct_change[i] > 0),
+            "losers": self.leaders("pct_down", limit, keep=lambda i: self.pct_change[i] < 0),
+            "most_moved": self.leaders("abs_change", limit, keep=lambda i: self.cost_change[i] != 0),
+        }
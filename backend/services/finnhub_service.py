@@ -1,30 +1,126 @@
+import importlib.util
 import httpx
 from datetime import datetime, timedelta
-from typing import List, Dict
-from services.config import FINNHUB_API_KEY
+from typing import List, Dict, Optional
+from services.config import (
+    FINNHUB_API_KEY,
+    FINNHUB_HTTP2,
+    FINNHUB_MAX_CONNECTIONS,
+    FINNHUB_MAX_KEEPALIVE_CONNECTIONS,
+    FINNHUB_MAX_CONNECTIONS_PER_HOST,
+    FINNHUB_KEEPALIVE_EXPIRY,
+    FINNHUB_TIMEOUT,
+    NEWS_CACHE_TTL_SECONDS,
+    NEWS_CACHE_MAX_ENTRIES,
+    FINNHUB_RATE_PER_SECOND,
+    FINNHUB_BURST,
+    UPSTREAM_MAX_ATTEMPTS,
+    UPSTREAM_RETRY_RATIO,
+    WORKER_COUNT,
+)
+from services.cache import TTLCache
+from services.rate_limit import AdaptiveLimiter, THROTTLED, RETRYABLE
 
 FINNHUB_COMPANY_NEWS_URL = "https://finnhub.io/api/v1/company-news"
 FINNHUB_MARKET_NEWS_URL = "https://finnhub.io/api/v1/news"
 
-async def fetch_company_news(
-    ticker: str,
-    days: int = 7
-) -> List[Dict]:
-    end_date = datetime.utcnow().date()
-    start_date = end_date - timedelta(days=days)
+# Shared client, created at app startup and closed at shutdown
+_client: Optional[httpx.AsyncClient] = None
 
-    params = {
-        "symbol": ticker.upper(),
-        "from": start_date.isoformat(),
-        "to": end_date.isoformat(),
-        "token": FINNHUB_API_KEY
-    }
+# Parsed articles keyed by (kind, symbol/category, from, to)
+news_cache = TTLCache(maxsize=NEWS_CACHE_MAX_ENTRIES, ttl=NEWS_CACHE_TTL_SECONDS)
+
+# Cross-worker tier behind news_cache (a SharedCache), set at app startup
+_shared_cache = None
+
+
+def _classify_error(exc: BaseException) -> Optional[str]:
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        if status == 429:
+            return THROTTLED
+        if status >= 500:
+            return RETRYABLE
+        return None
+    if isinstance(exc, httpx.TransportError):
+        return RETRYABLE
+    return None
+
+
+# Every Finnhub request goes through this: rate, in-flight cap and retries
+finnhub_limiter = AdaptiveLimiter(
+    "finnhub",
+    _classify_error,
+    # This worker's share of the deployment-wide limits
+    rate=FINNHUB_RATE_PER_SECOND / WORKER_COUNT,
+    burst=max(1.0, FINNHUB_BURST / WORKER_COUNT),
+    max_concurrency=max(1, FINNHUB_MAX_CONNECTIONS_PER_HOST // WORKER_COUNT),
+    max_attempts=UPSTREAM_MAX_ATTEMPTS,
+    retry_ratio=UPSTREAM_RETRY_RATIO,
+)
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(FINNHUB_COMPANY_NEWS_URL, params=params, timeout=10)
+
+async def init_http_client() -> httpx.AsyncClient:
+    """
+    Creates the pooled client used for every Finnhub request.
+    Safe to call more than once; the existing client is reused.
+    """
+    global _client
+    if _client is not None and not _client.is_closed:
+        return _client
+
+    http2 = FINNHUB_HTTP2 and _http2_available()
+    if FINNHUB_HTTP2 and not http2:
+        print("h2 package not installed, Finnhub client falling back to HTTP/1.1")
+
+    _client = httpx.AsyncClient(
+        http2=http2,
+        timeout=FINNHUB_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=FINNHUB_MAX_CONNECTIONS,
+            max_keepalive_connections=FINNHUB_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=FINNHUB_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return _client
+
+
+def set_shared_cache(shared):
+    """
+    Puts a cache shared between worker processes behind news_cache, so
+    articles one worker fetched aren't fetched again by the others.
+    """
+    global _shared_cache
+    _shared_cache = shared
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+
+
+async def _get_json(url: str, params: Dict):
+    """
+    GET a Finnhub endpoint through the shared client, within the Finnhub
+    rate limit and retrying 429s, 5xx and connection errors.
+    """
+    client = await init_http_client()
+
+    async def get():
+        response = await client.get(url, params=params)
         response.raise_for_status()
-        raw_articles = response.json()
+        return response.json()
 
+    return await finnhub_limiter.call(get)
+
+
+def _parse_articles(raw_articles) -> List[Dict]:
     articles = []
 
     for item in raw_articles:
@@ -45,42 +141,73 @@ async def fetch_company_news(
 
     return articles
 
-async def fetch_market_news(
-    category: str,
+
+async def _fetch_articles(url: str, params: Dict) -> List[Dict]:
+    raw_articles = await _get_json(url, params)
+    return _parse_articles(raw_articles)
+
+
+async def _load_articles(key, url: str, params: Dict) -> List[Dict]:
+    """
+    news_cache miss: try the shared tier before calling Finnhub.
+    """
+    if _shared_cache is not None:
+        try:
+            shared = await _shared_cache.aget("news", key)
+            if shared is not None:
+                return shared[0]
+        except Exception as e:
+            print(f"Shared news cache read failed: {e}")
+
+    articles = await _fetch_articles(url, params)
+
+    if _shared_cache is not None:
+        try:
+            await _shared_cache.aset("news", key, articles, NEWS_CACHE_TTL_SECONDS)
+        except Exception as e:
+            print(f"Shared news cache write failed: {e}")
+    return articles
+
+
+async def fetch_company_news(
+    ticker: str,
     days: int = 7
 ) -> List[Dict]:
     end_date = datetime.utcnow().date()
     start_date = end_date - timedelta(days=days)
 
     params = {
-        "symbol": category.lower(),
+        "symbol": ticker.upper(),
         "from": start_date.isoformat(),
         "to": end_date.isoformat(),
         "token": FINNHUB_API_KEY
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(FINNHUB_MARKET_NEWS_URL, params=params, timeout=10)
-        response.raise_for_status()
-        raw_articles = response.json()
+    key = ("company", params["symbol"], params["from"], params["to"])
+    articles = await news_cache.get_or_load(
+        key, lambda: _load_articles(key, FINNHUB_COMPANY_NEWS_URL, params)
+    )
 
-    articles = []
+    # Callers get their own list so the cached one is never mutated
+    return list(articles)
 
-    for item in raw_articles:
-        # skip empty summaries
-        if not item.get("summary"):
-            continue
+async def fetch_market_news(
+    category: str,
+    days: int = 7
+) -> List[Dict]:
+    end_date = datetime.utcnow().date()
+    start_date = end_date - timedelta(days=days)
 
-        articles.append({
-            "title": item.get("headline"),
-            "summary": item.get("summary"),
-            "source": item.get("source"),
-            "url": item.get("url"),
-            "published": datetime.utcfromtimestamp(
-                item.get("datetime")
-            ).isoformat(),
-            "image": item.get("image")
-        })
+    params = {
+        "symbol": category.lower(),
+        "from": start_date.isoformat(),
+        "to": end_date.isoformat(),
+        "token": FINNHUB_API_KEY
+    }
 
-    return articles
-    
+    key = ("market", params["symbol"], params["from"], params["to"])
+    articles = await news_cache.get_or_load(
+        key, lambda: _load_articles(key, FINNHUB_MARKET_NEWS_URL, params)
+    )
+
+    return list(articles)
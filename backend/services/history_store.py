@@ -0,0 +1,333 @@
+import math
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+import yfinance as yf
+
+from services.db import ConnectionPool
+from services.market_hours import is_market_open, last_session_close
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+INTRADAY_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h"}
+
+# How long after the close yfinance's daily bar is treated as final
+CLOSE_SETTLE_SECONDS = 1800
+
+# Relative difference in an already-stored close that means yfinance
+# has re-adjusted the series (split or dividend) and we must re-base
+REBASE_TOLERANCE = 1e-4
+
+# last_read is only rewritten once it is this stale, so reads stay read-only
+READ_TOUCH_SECONDS = 3600
+
+
+def trading_days(period: str) -> Optional[int]:
+    """
+    N for an "Nd" period (the last N trading days), else None.
+    """
+    return int(period[:-1]) if re.fullmatch(r"\d+d", period) else None
+
+
+def period_start(period: str, now: datetime) -> Optional[datetime]:
+    """
+    Earliest timestamp a yfinance `period` string needs, or None for "max".
+    Day periods count trading days, so they get padding for weekends and holidays.
+    """
+    if period == "max":
+        return None
+    if period == "ytd":
+        return datetime(now.year, 1, 1, tzinfo=timezone.utc)
+
+    if period.endswith("mo"):
+        return now - pd.DateOffset(months=int(period[:-2]))
+    if period.endswith("y"):
+        return now - pd.DateOffset(years=int(period[:-1]))
+    if period.endswith("d"):
+        days = int(period[:-1])
+        return now - timedelta(days=math.ceil(days * 1.5) + 5)
+    raise ValueError(f"Unsupported period: {period}")
+
+
+class HistoryStore:
+    """
+    Local OHLCV store keyed by (ticker, interval).
+
+    Bars live in SQLite. Each read tops the store up with only the bars since
+    the last stored one, at most once per refresh window, and serves the
+    requested period from disk. When yfinance has re-adjusted history since
+    our copy was written (a split or dividend), the stored series is re-based
+    by downloading it again in full. While the market is closed, a series
+    topped up after the last session settled can't gain a bar, so reads are
+    served from disk without asking yfinance at all. Series nobody has read
+    for a while are dropped by `prune`. `on_rebase(ticker, interval)` is
+    called after a re-base, so state derived from the old series can be dropped.
+    """
+
+    def __init__(
+        self,
+        db: ConnectionPool,
+        refresh_seconds: float = 900,
+        intraday_refresh_seconds: float = 60,
+        on_rebase: Optional[Callable[[str, str], None]] = None,
+    ):
+        self.db = db
+        self.refresh_seconds = refresh_seconds
+        self.intraday_refresh_seconds = intraday_refresh_seconds
+        self.on_rebase = on_rebase
+        self._locks: Dict[tuple, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def init(self):
+        with self.db.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS price_bars (
+                    ticker TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume REAL,
+                    dividends REAL,
+                    splits REAL,
+                    PRIMARY KEY (ticker, interval, ts)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS price_history_meta (
+                    ticker TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    tz TEXT NOT NULL,
+                    covered_from INTEGER NOT NULL,
+                    last_fetch REAL NOT NULL,
+                    last_read REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (ticker, interval)
+                )
+            """)
+            columns = [column[1] for column in conn.execute("PRAGMA table_info(price_history_meta)").fetchall()]
+            if "last_read" not in columns:
+                conn.execute("ALTER TABLE price_history_meta ADD COLUMN last_read REAL NOT NULL DEFAULT 0")
+                conn.execute("UPDATE price_history_meta SET last_read = last_fetch")
+
+    def _lock_for(self, key: tuple) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _refresh_window(self, interval: str) -> float:
+        return self.intraday_refresh_seconds if interval in INTRADAY_INTERVALS else self.refresh_seconds
+
+    def _needs_top_up(self, interval: str, last_fetch: float) -> bool:
+        if time.time() - last_fetch <= self._refresh_window(interval):
+            return False
+        if is_market_open():
+            return True
+        # Closed: only worth a call if we haven't fetched since the last close settled
+        return last_fetch < last_session_close().timestamp() + CLOSE_SETTLE_SECONDS
+
+    # --- Upstream ---
+
+    @staticmethod
+    def _download(ticker: str, interval: str, period: Optional[str] = None, start: Optional[datetime] = None) -> pd.DataFrame:
+        stock = yf.Ticker(ticker)
+        if start is not None:
+            return stock.history(start=start, interval=interval)
+        return stock.history(period=period, interval=interval)
+
+    # --- Storage ---
+
+    @staticmethod
+    def _tz(hist: pd.DataFrame) -> str:
+        return str(hist.index.tz) if hist.index.tz is not None else "UTC"
+
+    @staticmethod
+    def _bar_rows(ticker: str, interval: str, hist: pd.DataFrame):
+        rows = []
+        timestamps = hist.index.tz_convert("UTC") if hist.index.tz is not None else hist.index.tz_localize("UTC")
+        for ts, (_, bar) in zip(timestamps, hist.iterrows()):
+            values = [bar.get(column) for column in PRICE_COLUMNS]
+            rows.append((ticker, interval, int(ts.timestamp()), *[
+                None if value is None or pd.isna(value) else float(value) for value in values
+            ]))
+        return rows
+
+    def _write(self, conn, ticker: str, interval: str, rows, tz: str, covered_from: int, replace: bool):
+        with conn:
+            if replace:
+                conn.execute("DELETE FROM price_bars WHERE ticker = ? AND interval = ?", (ticker, interval))
+            conn.executemany(
+                "INSERT OR REPLACE INTO price_bars (ticker, interval, ts, open, high, low, close, volume, dividends, splits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO price_history_meta (ticker, interval, tz, covered_from, last_fetch, last_read) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (ticker, interval, tz, covered_from, now, now)
+            )
+
+    def _read(self, conn, ticker: str, interval: str, tz: str, since: Optional[int]) -> pd.DataFrame:
+        rows = conn.execute(
+            "SELECT ts, open, high, low, close, volume, dividends, splits FROM price_bars "
+            "WHERE ticker = ? AND interval = ? AND ts >= ? ORDER BY ts",
+            (ticker, interval, since or 0)
+        ).fetchall()
+
+        df = pd.DataFrame(rows, columns=["ts"] + PRICE_COLUMNS)
+        index = pd.to_datetime(df.pop("ts"), unit="s", utc=True).dt.tz_convert(tz)
+        df.index = pd.DatetimeIndex(index, name="Datetime" if interval in INTRADAY_INTERVALS else "Date")
+        return df
+
+    # --- Refresh ---
+
+    def _full_fetch(self, conn, ticker: str, interval: str, period: str, start: Optional[datetime]):
+        hist = self._download(ticker, interval, period=period)
+        if hist.empty:
+            return
+        rows = self._bar_rows(ticker, interval, hist)
+        if start is None:
+            covered_from = 0
+        elif trading_days(period) is not None:
+            # The padded start overshoots what an "Nd" download returns
+            covered_from = min(row[2] for row in rows)
+        else:
+            covered_from = int(start.timestamp())
+        self._write(conn, ticker, interval, rows, self._tz(hist), covered_from, replace=True)
+
+    def _rebase(self, conn, ticker: str, interval: str, covered_from: int):
+        print(f"Re-basing stored {interval} history for {ticker} after an adjustment")
+        if covered_from == 0:
+            hist = self._download(ticker, interval, period="max")
+        else:
+            hist = self._download(ticker, interval, start=datetime.fromtimestamp(covered_from, tz=timezone.utc))
+        if not hist.empty:
+            self._write(conn, ticker, interval, self._bar_rows(ticker, interval, hist), self._tz(hist), covered_from, replace=True)
+            if self.on_rebase is not None:
+                self.on_rebase(ticker, interval)
+
+    def _append_missing(self, conn, ticker: str, interval: str, covered_from: int):
+        # Re-fetch from the second-to-last stored bar: it is complete, so its
+        # close should be unchanged unless the series was re-adjusted.
+        recent = conn.execute(
+            "SELECT ts, close FROM price_bars WHERE ticker = ? AND interval = ? ORDER BY ts DESC LIMIT 2",
+            (ticker, interval)
+        ).fetchall()
+        if not recent:
+            return self._rebase(conn, ticker, interval, covered_from)
+
+        anchor_ts, anchor_close = recent[-1]
+        anchor = datetime.fromtimestamp(anchor_ts, tz=timezone.utc)
+        hist = self._download(ticker, interval, start=anchor if interval in INTRADAY_INTERVALS else anchor.date())
+        if hist.empty:
+            conn.execute(
+                "UPDATE price_history_meta SET last_fetch = ? WHERE ticker = ? AND interval = ?",
+                (time.time(), ticker, interval)
+            )
+            conn.commit()
+            return
+
+        rows = self._bar_rows(ticker, interval, hist)
+        fetched_anchor = next((row for row in rows if row[2] == anchor_ts), None)
+        adjusted = any((row[8] or 0) != 0 or (row[9] or 0) != 0 for row in rows if row[2] > anchor_ts)
+        if fetched_anchor is not None and anchor_close and fetched_anchor[6] is not None:
+            adjusted = adjusted or abs(fetched_anchor[6] - anchor_close) / abs(anchor_close) > REBASE_TOLERANCE
+
+        if adjusted:
+            return self._rebase(conn, ticker, interval, covered_from)
+
+        new_rows = [row for row in rows if row[2] >= anchor_ts]
+        self._write(conn, ticker, interval, new_rows, self._tz(hist), covered_from, replace=False)
+
+    def _covers(self, conn, ticker: str, interval: str, period: str, start: Optional[datetime], covered_from: int) -> bool:
+        if covered_from == 0:
+            return True
+        days = trading_days(period)
+        if days is not None:
+            # Bars are contiguous from covered_from, so count the days stored
+            stored = conn.execute(
+                "SELECT COUNT(DISTINCT ts / 86400) FROM price_bars WHERE ticker = ? AND interval = ?",
+                (ticker, interval)
+            ).fetchone()[0]
+            return stored >= days
+        return start is not None and covered_from <= start.timestamp()
+
+    # --- Public API ---
+
+    def get_history(self, ticker: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        """
+        Drop-in replacement for yf.Ticker(ticker).history(period=period, interval=interval)
+        served from the local store. Blocking; call from a worker thread.
+        """
+        ticker = ticker.upper()
+        now = datetime.now(timezone.utc)
+        start = period_start(period, now)
+
+        with self._lock_for((ticker, interval)):
+            conn = self.db.connection()
+            meta = conn.execute(
+                "SELECT tz, covered_from, last_fetch, last_read FROM price_history_meta WHERE ticker = ? AND interval = ?",
+                (ticker, interval)
+            ).fetchone()
+
+            if meta is None or not self._covers(conn, ticker, interval, period, start, meta[1]):
+                self._full_fetch(conn, ticker, interval, period, start)
+            elif self._needs_top_up(interval, meta[2]):
+                self._append_missing(conn, ticker, interval, meta[1])
+            elif time.time() - meta[3] > READ_TOUCH_SECONDS:
+                with conn:
+                    conn.execute(
+                        "UPDATE price_history_meta SET last_read = ? WHERE ticker = ? AND interval = ?",
+                        (time.time(), ticker, interval)
+                    )
+
+            meta = conn.execute(
+                "SELECT tz FROM price_history_meta WHERE ticker = ? AND interval = ?",
+                (ticker, interval)
+            ).fetchone()
+            if meta is None:
+                return pd.DataFrame(columns=PRICE_COLUMNS)
+
+            days = trading_days(period)
+            since = None if start is None or days is not None else int(start.timestamp())
+            hist = self._read(conn, ticker, interval, meta[0], since)
+
+        if days is not None and not hist.empty:
+            # Day periods mean the last N trading days, like yfinance
+            dates = hist.index.normalize()
+            keep = dates.unique()[-days:]
+            hist = hist[dates.isin(keep)]
+
+        return hist
+
+    def prune(self, max_idle_seconds: float) -> int:
+        """
+        Drops every stored series not read for `max_idle_seconds`. Returns how
+        many were dropped. Blocking; call from a worker thread.
+        """
+        cutoff = time.time() - max_idle_seconds
+        conn = self.db.connection()
+        stale = conn.execute(
+            "SELECT ticker, interval FROM price_history_meta WHERE last_read < ?", (cutoff,)
+        ).fetchall()
+
+        pruned = 0
+        for ticker, interval in stale:
+            with self._lock_for((ticker, interval)):
+                with conn:
+                    # Re-checked under the lock in case a read just touched it
+                    deleted = conn.execute(
+                        "DELETE FROM price_history_meta WHERE ticker = ? AND interval = ? AND last_read < ?",
+                        (ticker, interval, cutoff)
+                    ).rowcount
+                    if deleted:
+                        conn.execute("DELETE FROM price_bars WHERE ticker = ? AND interval = ?", (ticker, interval))
+                pruned += deleted
+        return pruned
@@ -0,0 +1,466 @@
+import copy
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.cache import TTLCache
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def stack_histories(histories: Dict[str, pd.DataFrame], benchmark: Optional[pd.DataFrame] = None) -> Dict:
+    """
+    Aligns OHLCV frames for several tickers (and an optional benchmark) on
+    the union of their dates. Returns {"tickers", "index", "high", "low",
+    "close", "volume", "benchmark"} with (bars x tickers) float arrays; a
+    ticker with no bar on a date has NaN there.
+    """
+    tickers = list(histories)
+    index = None
+    for hist in histories.values():
+        index = hist.index if index is None else index.union(hist.index)
+    if index is None:
+        index = pd.DatetimeIndex([])
+
+    def column(name):
+        if not tickers:
+            return np.empty((len(index), 0))
+        return np.column_stack([
+            histories[t][name].reindex(index).to_numpy(dtype=float) for t in tickers
+        ])
+
+    bench = None
+    if benchmark is not None and not benchmark.empty:
+        bench_close = benchmark["Close"]
+        # Match on calendar date so differing intraday stamps or zones still line up
+        bench_close = pd.Series(bench_close.to_numpy(dtype=float), index=bench_close.index.date)
+        bench_close = bench_close[~bench_close.index.duplicated(keep="last")]
+        bench = bench_close.reindex(index.date).to_numpy(dtype=float)
+
+    return {
+        "tickers": tickers,
+        "index": index,
+        "high": column("High"),
+        "low": column("Low"),
+        "close": column("Close"),
+        "volume": column("Volume"),
+        "benchmark": bench,
+    }
+
+
+class IndicatorState:
+    """
+    Running indicator state for N tickers at once.
+
+    `update()` folds in one bar per ticker (NaN where a ticker has no bar) in
+    O(N), so a series can be extended with new bars without recomputing from
+    the start. Everything is vectorized across tickers; the only per-bar work
+    is a handful of NumPy operations on length-N arrays. `from_block()`
+    builds the same state for a whole history at once with array operations
+    over the bars, for when there is nothing to resume from.
+    """
+
+    def __init__(
+        self,
+        n: int,
+        rsi_period: int = 14,
+        atr_period: int = 14,
+        macd_fast: int = 12,
+        macd_slow: int = 26,
+        macd_signal: int = 9,
+        bollinger_window: int = 20,
+        bollinger_width: float = 2.0,
+        ma_windows=(50, 200),
+        periods_per_year: int = TRADING_DAYS_PER_YEAR,
+    ):
+        self.n = n
+        self.rsi_period = rsi_period
+        self.atr_period = atr_period
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self.bollinger_window = bollinger_window
+        self.bollinger_width = bollinger_width
+        self.ma_windows = tuple(ma_windows)
+        self.periods_per_year = periods_per_year
+
+        nan = lambda: np.full(n, np.nan)
+        zero = lambda: np.zeros(n)
+
+        self.bars = np.zeros(n, dtype=np.int64)
+        self.first_close = nan()
+        self.last_close = nan()
+        self.high = nan()
+        self.low = nan()
+        self.volume_sum = zero()
+
+        # Daily returns: Welford mean / sum of squared deviations
+        self.returns = np.zeros(n, dtype=np.int64)
+        self.return_mean = zero()
+        self.return_m2 = zero()
+
+        # Paired returns against the benchmark, for beta
+        self.last_benchmark = np.nan
+        self.paired = np.zeros(n, dtype=np.int64)
+        self.sum_x = zero()
+        self.sum_y = zero()
+        self.sum_xy = zero()
+        self.sum_xx = zero()
+
+        self.ema_fast = nan()
+        self.ema_slow = nan()
+        self.ema_signal = nan()
+
+        self.avg_gain = zero()
+        self.avg_loss = zero()
+        self.atr = zero()
+        self.true_ranges = np.zeros(n, dtype=np.int64)
+
+        self.peak = nan()
+        self.max_drawdown = zero()
+
+        # Ring buffer of recent closes for the moving averages and Bollinger bands
+        self.window = max(self.ma_windows + (bollinger_window,))
+        self.ring = np.full((self.window, n), np.nan)
+        self.ring_pos = np.zeros(n, dtype=np.int64)
+
+    def copy(self) -> "IndicatorState":
+        return copy.deepcopy(self)
+
+    @staticmethod
+    def _ema_step(ema, value, span, mask):
+        # pandas ewm(span, adjust=False): seeded with the first value
+        alpha = 2.0 / (span + 1)
+        stepped = np.where(np.isnan(ema), value, ema + alpha * (value - ema))
+        return np.where(mask, stepped, ema)
+
+    @staticmethod
+    def _wilder_step(avg, value, count, period, mask):
+        # Simple mean of the first `period` values, then Wilder smoothing
+        divisor = np.minimum(count, period).clip(min=1)
+        return np.where(mask, avg + (value - avg) / divisor, avg)
+
+    def update(self, high, low, close, volume, benchmark_close: float = np.nan):
+        close = np.asarray(close, dtype=float)
+        high = np.asarray(high, dtype=float)
+        low = np.asarray(low, dtype=float)
+        volume = np.asarray(volume, dtype=float)
+
+        valid = ~np.isnan(close)
+        prev = self.last_close
+        has_prev = valid & ~np.isnan(prev)
+
+        self.bars += valid
+        self.first_close = np.where(np.isnan(self.first_close) & valid, close, self.first_close)
+        self.high = np.where(valid, np.fmax(self.high, high), self.high)
+        self.low = np.where(valid, np.fmin(self.low, low), self.low)
+        self.volume_sum += np.where(valid, np.nan_to_num(volume), 0.0)
+
+        # Returns
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret = np.where(has_prev, close / prev - 1.0, 0.0)
+        self.returns += has_prev
+        delta = ret - self.return_mean
+        self.return_mean = np.where(has_prev, self.return_mean + delta / self.returns.clip(min=1), self.return_mean)
+        self.return_m2 = np.where(has_prev, self.return_m2 + delta * (ret - self.return_mean), self.return_m2)
+
+        # Beta against the benchmark
+        bench_ret = np.nan
+        if not np.isnan(benchmark_close):
+            if not np.isnan(self.last_benchmark):
+                bench_ret = benchmark_close / self.last_benchmark - 1.0
+            self.last_benchmark = benchmark_close
+        if not np.isnan(bench_ret):
+            self.paired += has_prev
+            self.sum_x += np.where(has_prev, bench_ret, 0.0)
+            self.sum_y += np.where(has_prev, ret, 0.0)
+            self.sum_xy += np.where(has_prev, bench_ret * ret, 0.0)
+            self.sum_xx += np.where(has_prev, bench_ret * bench_ret, 0.0)
+
+        # MACD
+        self.ema_fast = self._ema_step(self.ema_fast, close, self.macd_fast, valid)
+        self.ema_slow = self._ema_step(self.ema_slow, close, self.macd_slow, valid)
+        self.ema_signal = self._ema_step(self.ema_signal, self.ema_fast - self.ema_slow, self.macd_signal, valid)
+
+        # RSI
+        change = np.where(has_prev, close - prev, 0.0)
+        self.avg_gain = self._wilder_step(self.avg_gain, np.maximum(change, 0.0), self.returns, self.rsi_period, has_prev)
+        self.avg_loss = self._wilder_step(self.avg_loss, np.maximum(-change, 0.0), self.returns, self.rsi_period, has_prev)
+
+        # ATR; the first bar's true range is just high - low
+        prev_close = np.where(has_prev, prev, close)
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        has_range = valid & ~np.isnan(true_range)
+        self.true_ranges += has_range
+        self.atr = self._wilder_step(self.atr, np.nan_to_num(true_range), self.true_ranges, self.atr_period, has_range)
+
+        # Drawdown
+        self.peak = np.where(valid, np.fmax(self.peak, close), self.peak)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drawdown = np.where(valid, close / self.peak - 1.0, 0.0)
+        self.max_drawdown = np.minimum(self.max_drawdown, drawdown)
+
+        # Recent closes
+        columns = np.flatnonzero(valid)
+        self.ring[self.ring_pos[columns] % self.window, columns] = close[columns]
+        self.ring_pos += valid
+
+        self.last_close = np.where(valid, close, prev)
+
+    @staticmethod
+    def _wilder(values: np.ndarray, period: int) -> float:
+        # Same result as _wilder_step over `values`: a running mean for the
+        # first `period` values, then an EMA with alpha 1 / period
+        if len(values) == 0:
+            return 0.0
+        if len(values) <= period:
+            return float(values.mean())
+        seeded = np.concatenate(([values[:period].mean()], values[period:]))
+        return float(pd.Series(seeded).ewm(alpha=1.0 / period, adjust=False).mean().iloc[-1])
+
+    @classmethod
+    def from_block(cls, high, low, close, volume, benchmark=None, **params) -> "IndicatorState":
+        """
+        The state `extend()` would reach from a fresh start over a
+        (bars x tickers) block, computed column by column with array operations.
+        """
+        high = np.asarray(high, dtype=float)
+        low = np.asarray(low, dtype=float)
+        close = np.asarray(close, dtype=float)
+        volume = np.asarray(volume, dtype=float)
+        state = cls(close.shape[1], **params)
+
+        # Benchmark return per bar against its previous available close
+        bench_ret = np.full(len(close), np.nan)
+        if benchmark is not None:
+            bench = pd.Series(np.asarray(benchmark, dtype=float))
+            bench_ret = (bench / bench.ffill().shift(1) - 1.0).to_numpy()
+            known = bench.dropna()
+            if not known.empty:
+                state.last_benchmark = float(known.iloc[-1])
+
+        ema = lambda values, span: pd.Series(values).ewm(span=span, adjust=False).mean()
+
+        for j in range(close.shape[1]):
+            valid = ~np.isnan(close[:, j])
+            closes = close[valid, j]
+            m = len(closes)
+            if m == 0:
+                continue
+            highs, lows = high[valid, j], low[valid, j]
+
+            state.bars[j] = m
+            state.first_close[j] = closes[0]
+            state.last_close[j] = closes[-1]
+            state.high[j] = np.fmax.reduce(highs)
+            state.low[j] = np.fmin.reduce(lows)
+            state.volume_sum[j] = np.nan_to_num(volume[valid, j]).sum()
+
+            # Returns
+            ret = closes[1:] / closes[:-1] - 1.0
+            state.returns[j] = m - 1
+            if m > 1:
+                state.return_mean[j] = ret.mean()
+                state.return_m2[j] = ((ret - ret.mean()) ** 2).sum()
+
+            # Beta against the benchmark
+            paired_bench = bench_ret[valid][1:]
+            paired = ~np.isnan(paired_bench)
+            x, y = paired_bench[paired], ret[paired]
+            state.paired[j] = paired.sum()
+            state.sum_x[j] = x.sum()
+            state.sum_y[j] = y.sum()
+            state.sum_xy[j] = (x * y).sum()
+            state.sum_xx[j] = (x * x).sum()
+
+            # MACD
+            fast = ema(closes, state.macd_fast)
+            slow = ema(closes, state.macd_slow)
+            state.ema_fast[j] = fast.iloc[-1]
+            state.ema_slow[j] = slow.iloc[-1]
+            state.ema_signal[j] = ema(fast - slow, state.macd_signal).iloc[-1]
+
+            # RSI
+            change = np.diff(closes)
+            state.avg_gain[j] = cls._wilder(np.maximum(change, 0.0), state.rsi_period)
+            state.avg_loss[j] = cls._wilder(np.maximum(-change, 0.0), state.rsi_period)
+
+            # ATR; the first bar's true range is just high - low
+            prev_close = np.concatenate(([closes[0]], closes[:-1]))
+            true_range = np.fmax(highs - lows, np.fmax(np.abs(highs - prev_close), np.abs(lows - prev_close)))
+            true_range = true_range[~np.isnan(true_range)]
+            state.true_ranges[j] = len(true_range)
+            state.atr[j] = cls._wilder(true_range, state.atr_period)
+
+            # Drawdown
+            peaks = np.maximum.accumulate(closes)
+            state.peak[j] = peaks[-1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                state.max_drawdown[j] = min(0.0, np.nanmin(closes / peaks - 1.0))
+
+            # Recent closes
+            recent = np.arange(max(0, m - state.window), m)
+            state.ring[recent % state.window, j] = closes[recent]
+            state.ring_pos[j] = m
+
+        return state
+
+    def extend(self, high, low, close, volume, benchmark=None):
+        """
+        Folds in a (bars x tickers) block; `benchmark` is one close per bar.
+        """
+        for row in range(len(close)):
+            bench = np.nan if benchmark is None else benchmark[row]
+            self.update(high[row], low[row], close[row], volume[row], bench)
+
+    def _recent(self, count: int) -> np.ndarray:
+        # (count x N) of the last `count` closes per ticker, newest first
+        offsets = np.arange(1, count + 1)[:, None]
+        rows = (self.ring_pos[None, :] - offsets) % self.window
+        return np.take_along_axis(self.ring, rows, axis=0)
+
+    def _moving_average(self, window: int) -> np.ndarray:
+        return np.where(self.bars >= window, self._recent(window).mean(axis=0), np.nan)
+
+    def values(self) -> Dict[str, np.ndarray]:
+        """
+        Current indicator values as {name: length-N array}, NaN where a
+        ticker doesn't yet have enough bars.
+        """
+        bars = self.bars
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variance = np.where(self.returns > 1, self.return_m2 / (self.returns - 1), np.nan)
+            std = np.sqrt(variance)
+            sharpe = self.return_mean / std * np.sqrt(self.periods_per_year)
+
+            rs = self.avg_gain / self.avg_loss
+            rsi = np.where(self.avg_loss == 0, np.where(self.avg_gain == 0, 50.0, 100.0), 100 - 100 / (1 + rs))
+            rsi = np.where(self.returns >= self.rsi_period, rsi, np.nan)
+
+            paired = self.paired
+            cov = self.sum_xy / paired - (self.sum_x / paired) * (self.sum_y / paired)
+            var_bench = self.sum_xx / paired - (self.sum_x / paired) ** 2
+            beta = np.where((paired > 1) & (var_bench > 0), cov / var_bench, np.nan)
+
+            # Bollinger bands use the population standard deviation
+            recent = self._recent(self.bollinger_window)
+            enough = bars >= self.bollinger_window
+            middle = np.where(enough, recent.mean(axis=0), np.nan)
+            width = np.where(enough, recent.std(axis=0), np.nan) * self.bollinger_width
+
+            macd = self.ema_fast - self.ema_slow
+            has_macd = bars >= self.macd_slow
+
+            result = {
+                "current_price": self.last_close,
+                "start_price": self.first_close,
+                "high_price": self.high,
+                "low_price": self.low,
+                "avg_volume": np.where(bars > 0, self.volume_sum / bars, np.nan),
+                "total_return": (self.last_close - self.first_close) / self.first_close * 100,
+                "volatility": std * 100,
+                "rsi_14": rsi,
+                "macd": np.where(has_macd, macd, np.nan),
+                "macd_signal": np.where(has_macd, self.ema_signal, np.nan),
+                "macd_histogram": np.where(has_macd, macd - self.ema_signal, np.nan),
+                "bollinger_upper": middle + width,
+                "bollinger_middle": middle,
+                "bollinger_lower": middle - width,
+                "atr_14": np.where(self.true_ranges >= self.atr_period, self.atr, np.nan),
+                "max_drawdown": np.where(bars > 0, self.max_drawdown * 100, np.nan),
+                "sharpe": sharpe,
+                "beta": beta,
+            }
+        for window in self.ma_windows:
+            result[f"ma_{window}"] = self._moving_average(window)
+        return result
+
+
+class IndicatorEngine:
+    """
+    Computes indicators for aligned multi-ticker history and keeps each
+    series' state checkpointed, so a later call whose history only adds bars
+    at the end folds in just those bars. The last bar is never checkpointed
+    because it can still change intraday. A checkpoint also remembers the
+    closes at its bar, so a series re-adjusted for a split or dividend since
+    then is recomputed from the start instead of resumed.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 86400, **params):
+        self.params = params
+        self._states = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.incremental = 0
+        self.full = 0
+
+    def compute(self, key: Hashable, stacked: Dict) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        {ticker: {indicator: value or None}} for the output of stack_histories.
+        `key` identifies the series (e.g. (tickers, period, interval)).
+        """
+        tickers: List[str] = stacked["tickers"]
+        index = stacked["index"]
+        bench = stacked["benchmark"]
+        bars = len(index)
+
+        if bars == 0:
+            return {ticker: {} for ticker in tickers}
+
+        def block(start, stop):
+            return (
+                stacked["high"][start:stop], stacked["low"][start:stop],
+                stacked["close"][start:stop], stacked["volume"][start:stop],
+                None if bench is None else bench[start:stop],
+            )
+
+        def fingerprint(row):
+            closes = stacked["close"][row]
+            return closes if bench is None else np.append(closes, bench[row])
+
+        # Resume from the checkpoint if the series still starts where it did
+        # and still contains the checkpointed bar with the same closes
+        cached = self._states.get(key)
+        start = 0
+        state = None
+        if cached is not None:
+            first_ts, checkpoint_ts, checkpoint_closes, checkpoint = cached
+            if index[0] == first_ts and checkpoint_ts in index and index.get_loc(checkpoint_ts) < bars - 1:
+                row = index.get_loc(checkpoint_ts)
+                closes = fingerprint(row)
+                if closes.shape == checkpoint_closes.shape and np.allclose(closes, checkpoint_closes, rtol=1e-9, atol=0, equal_nan=True):
+                    start = row + 1
+                    state = checkpoint.copy()
+        if state is None:
+            state = IndicatorState.from_block(*block(0, bars - 1), **self.params)
+            start = bars - 1
+            self.full += 1
+        else:
+            self.incremental += 1
+
+        if start < bars - 1:
+            state.extend(*block(start, bars - 1))
+        if bars > 1:
+            self._states.set(key, (index[0], index[bars - 2], fingerprint(bars - 2), state.copy()))
+        state.extend(*block(bars - 1, bars))
+
+        values = state.values()
+        return {
+            ticker: {
+                name: (None if np.isnan(column[i]) else round(float(column[i]), 6))
+                for name, column in values.items()
+            }
+            for i, ticker in enumerate(tickers)
+        }
+
+    def invalidate(self, symbol: str):
+        """
+        Drops the checkpoints of every series whose key mentions `symbol`,
+        e.g. after its stored history was re-based.
+        """
+        for key in self._states.keys():
+            parts = key if isinstance(key, tuple) else (key,)
+            if any(part == symbol or (isinstance(part, tuple) and symbol in part) for part in parts):
+                self._states.pop(key)
+
+    def stats(self) -> Dict:
+        return {"series": len(self._states), "incremental": self.incremental, "full": self.full}
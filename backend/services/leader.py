@@ -0,0 +1,151 @@
+import asyncio
+import inspect
+import os
+import socket
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from services.db import ConnectionPool
+
+
+class LeaderLease:
+    """
+    Lease-based leader election between worker processes sharing one SQLite file.
+
+    The leader holds a row in `leases` whose expiry it pushes forward every
+    `ttl / 3` seconds. Any worker may take the row over once it has expired,
+    so if the leader dies another worker becomes leader within about `ttl`
+    seconds. A leader that fails to renew steps down straight away rather
+    than risk two leaders running jobs at once.
+    """
+
+    def __init__(self, db: ConnectionPool, name: str, ttl: float = 30):
+        self.db = db
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self.is_leader = False
+        self.leader_since: Optional[datetime] = None
+        self.elections_won = 0
+        self.renew_failures = 0
+        self._task: Optional[asyncio.Task] = None
+        self._on_elected: Optional[Callable[[], Any]] = None
+        self._on_lost: Optional[Callable[[], Any]] = None
+
+    def init(self):
+        with self.db.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    acquired_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def try_acquire(self) -> bool:
+        """
+        Takes or renews the lease in one statement. True if we hold it.
+        """
+        now = time.time()
+        # The upsert only applies when we already own the row or it has expired
+        updated = self.db.execute("""
+            INSERT INTO leases (name, owner, acquired_at, expires_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                owner = excluded.owner,
+                acquired_at = CASE WHEN leases.owner = excluded.owner THEN leases.acquired_at ELSE excluded.acquired_at END,
+                expires_at = excluded.expires_at
+            WHERE leases.owner = excluded.owner OR leases.expires_at <= ?
+        """, (self.name, self.owner, now, now + self.ttl, now))
+        return updated == 1
+
+    def release(self):
+        self.db.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (self.name, self.owner))
+
+    def holder(self) -> Optional[Dict[str, Any]]:
+        row = self.db.fetchone("SELECT owner, acquired_at, expires_at FROM leases WHERE name = ?", (self.name,))
+        if row is None:
+            return None
+        return {
+            "owner": row[0],
+            "acquired_at": datetime.fromtimestamp(row[1]).isoformat(),
+            "expires_at": datetime.fromtimestamp(row[2]).isoformat(),
+        }
+
+    @staticmethod
+    async def _call(callback: Optional[Callable[[], Any]]):
+        if callback is None:
+            return
+        result = callback()
+        if inspect.isawaitable(result):
+            await result
+
+    async def _set_leader(self, leader: bool):
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+        if leader:
+            self.elections_won += 1
+            self.leader_since = datetime.now()
+            print(f"[{datetime.now()}] {self.owner} is now leader for {self.name}")
+            await self._call(self._on_elected)
+        else:
+            self.leader_since = None
+            print(f"[{datetime.now()}] {self.owner} is no longer leader for {self.name}")
+            await self._call(self._on_lost)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                leader = await loop.run_in_executor(self.db.executor, self.try_acquire)
+            except Exception as e:
+                self.renew_failures += 1
+                print(f"Lease renewal for {self.name} failed: {e}")
+                leader = False
+            await self._set_leader(leader)
+            await asyncio.sleep(self.ttl / 3)
+
+    def start(self, on_elected: Callable[[], Any] = None, on_lost: Callable[[], Any] = None):
+        """
+        Starts campaigning. `on_elected` / `on_lost` (plain or async callables)
+        run on the event loop whenever leadership changes hands.
+        """
+        self._on_elected = on_elected
+        self._on_lost = on_lost
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """
+        Stops campaigning, runs `on_lost` if we were leader and frees the
+        lease so another worker can take over without waiting for it to expire.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            await self._set_leader(False)
+            try:
+                self.release()
+            except Exception as e:
+                print(f"Releasing lease {self.name} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "owner": self.owner,
+            "is_leader": self.is_leader,
+            "leader_since": self.leader_since.isoformat() if self.leader_since else None,
+            "ttl_seconds": self.ttl,
+            "elections_won": self.elections_won,
+            "renew_failures": self.renew_failures,
+            "holder": self.holder(),
+        }
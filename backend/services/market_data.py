@@ -0,0 +1,89 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class QuoteColumns(NamedTuple):
+    """
+    Columnar quote snapshot: one entry per ticker that had at least one close.
+    prev_close, change and pct_change are NaN when only one close was available.
+    """
+    tickers: Tuple[str, ...]
+    last_close: np.ndarray
+    prev_close: np.ndarray
+    change: np.ndarray
+    pct_change: np.ndarray
+
+    def to_dict(self) -> Dict[str, Tuple[float, Optional[float]]]:
+        """
+        Legacy {ticker: (current_price, previous_close)} shape used by the endpoints.
+        """
+        return {
+            ticker: (float(last), None if np.isnan(prev) else float(prev))
+            for ticker, last, prev in zip(self.tickers, self.last_close, self.prev_close)
+        }
+
+    def __len__(self):
+        return len(self.tickers)
+
+
+EMPTY_QUOTES = QuoteColumns((), np.empty(0), np.empty(0), np.empty(0), np.empty(0))
+
+
+def close_matrix(data: pd.DataFrame, tickers: List[str]) -> pd.DataFrame:
+    """
+    Pulls the whole Close level out of a yf.download frame as a
+    (dates x tickers) frame, in `tickers` order. Tickers the download
+    didn't return come back as all-NaN columns.
+    """
+    if isinstance(data.columns, pd.MultiIndex):
+        # group_by='ticker' puts tickers on level 0; the default puts fields there
+        level = 1 if 'Close' in data.columns.get_level_values(1) else 0
+        if 'Close' not in data.columns.get_level_values(level):
+            return pd.DataFrame(index=data.index, columns=tickers, dtype=float)
+        closes = data.xs('Close', axis=1, level=level)
+    else:
+        if 'Close' not in data.columns:
+            return pd.DataFrame(index=data.index, columns=tickers, dtype=float)
+        closes = data[['Close']].set_axis(tickers[:1], axis=1)
+
+    closes = closes.loc[:, ~closes.columns.duplicated()]
+    return closes.reindex(columns=tickers)
+
+
+def extract_quote_columns(data: pd.DataFrame, tickers: List[str]) -> QuoteColumns:
+    """
+    Last close, previous close, absolute and percent change for every
+    ticker in one NumPy pass over the Close matrix.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if data is None or data.empty or not tickers:
+        return EMPTY_QUOTES
+
+    closes = close_matrix(data, tickers).to_numpy(dtype=float)
+    valid = ~np.isnan(closes)
+
+    # Row index of the last and second-to-last non-NaN close per column (-1 if none)
+    rows = np.where(valid, np.arange(closes.shape[0])[:, None], -1)
+    last_idx = rows.max(axis=0)
+    prev_idx = np.where(rows == last_idx, -1, rows).max(axis=0)
+
+    columns = np.arange(closes.shape[1])
+    last_close = closes[last_idx.clip(min=0), columns]
+    prev_close = np.where(prev_idx >= 0, closes[prev_idx.clip(min=0), columns], np.nan)
+
+    has_data = last_idx >= 0
+    last_close = last_close[has_data]
+    prev_close = prev_close[has_data]
+    change = last_close - prev_close
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_change = change / prev_close * 100
+
+    return QuoteColumns(
+        tuple(np.asarray(tickers, dtype=object)[has_data]),
+        last_close,
+        prev_close,
+        change,
+        pct_change
+    )
@@ -0,0 +1,30 @@
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+# US equities regular session. Exchange holidays aren't modelled; on those
+# days the market just looks open and callers refresh as usual.
+MARKET_TZ = ZoneInfo("America/New_York")
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 0)
+
+
+def _now(now: datetime = None) -> datetime:
+    return (now or datetime.now(timezone.utc)).astimezone(MARKET_TZ)
+
+
+def is_market_open(now: datetime = None) -> bool:
+    local = _now(now)
+    return local.weekday() < 5 and SESSION_OPEN <= local.time() < SESSION_CLOSE
+
+
+def last_session_close(now: datetime = None) -> datetime:
+    """
+    The most recent regular-session close at or before `now`.
+    """
+    local = _now(now)
+    day = local.date()
+    if local.time() < SESSION_CLOSE:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return datetime.combine(day, SESSION_CLOSE, tzinfo=MARKET_TZ)
@@ -0,0 +1,211 @@
+import asyncio
+import math
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from services.market_data import QuoteColumns
+
+
+class Subscription:
+    """
+    One client's ticker set plus the quotes waiting to be sent to it.
+    Pending quotes are keyed by ticker, so a slow client only ever has the
+    latest quote per ticker queued rather than a growing backlog.
+    """
+
+    def __init__(self, max_tickers: int):
+        self.max_tickers = max_tickers
+        self.tickers: Set[str] = set()
+        self._pending: Dict[str, Dict] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, quotes: Iterable[Dict]):
+        for quote in quotes:
+            self._pending[quote["ticker"]] = quote
+        if self._pending:
+            self._ready.set()
+
+    async def next_batch(self) -> List[Dict]:
+        await self._ready.wait()
+        self._ready.clear()
+        batch, self._pending = list(self._pending.values()), {}
+        return batch
+
+
+class QuoteHub:
+    """
+    Single shared poller for live quotes.
+
+    Every `interval` seconds it bulk-fetches the union of all subscribed
+    tickers once and pushes each subscriber only the quotes that changed
+    since the last poll, so upstream load grows with distinct tickers
+    rather than with connected clients. Subscribing to a ticker the hub
+    hasn't seen yet triggers an early poll.
+
+    With a `shared` tier (a SharedCache), each worker's hub first takes the
+    quotes another worker fetched within the last interval and only fetches
+    the rest, publishing them in turn, so upstream load grows with distinct
+    tickers across all workers rather than per worker.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[List[str]], Awaitable[QuoteColumns]],
+        interval: float = 15,
+        max_tickers_per_client: int = 100,
+        shared=None,
+        namespace: str = "quotes",
+    ):
+        self.fetch = fetch
+        self.interval = interval
+        self.max_tickers_per_client = max_tickers_per_client
+        self.shared = shared
+        self.namespace = namespace
+
+        self._subscriptions: Set[Subscription] = set()
+        self._quotes: Dict[str, Dict] = {}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.polls = 0
+        self.shared_quotes = 0
+        self.pushed = 0
+        self.errors = 0
+
+    # --- Subscriptions ---
+
+    def connect(self) -> Subscription:
+        subscription = Subscription(self.max_tickers_per_client)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def disconnect(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+
+    def subscribe(self, subscription: Subscription, tickers: Iterable[str]) -> List[str]:
+        """
+        Adds tickers (up to the per-client cap) and immediately queues any
+        quotes the hub already has for them. Returns the tickers added.
+        """
+        added = []
+        for ticker in tickers:
+            ticker = ticker.strip().upper()
+            if not ticker or ticker in subscription.tickers:
+                continue
+            if len(subscription.tickers) >= subscription.max_tickers:
+                break
+            subscription.tickers.add(ticker)
+            added.append(ticker)
+
+        subscription.push(self._quotes[t] for t in added if t in self._quotes)
+        if any(t not in self._quotes for t in added):
+            self._wake.set()
+        return added
+
+    def unsubscribe(self, subscription: Subscription, tickers: Iterable[str]) -> List[str]:
+        removed = [t.strip().upper() for t in tickers if t.strip().upper() in subscription.tickers]
+        subscription.tickers.difference_update(removed)
+        return removed
+
+    def watched(self) -> List[str]:
+        union = set()
+        for subscription in self._subscriptions:
+            union |= subscription.tickers
+        return sorted(union)
+
+    # --- Polling ---
+
+    @staticmethod
+    def _quote_rows(quotes: QuoteColumns) -> Dict[str, Dict]:
+        rows = {}
+        for ticker, last, change, pct in zip(quotes.tickers, quotes.last_close, quotes.change, quotes.pct_change):
+            rows[ticker] = {
+                "ticker": ticker,
+                "currentPrice": round(float(last), 2),
+                "costChange": None if math.isnan(change) else round(float(change), 2),
+                "percentageChange": None if math.isnan(pct) else round(float(pct), 2),
+            }
+        return rows
+
+    async def _latest(self, tickers: List[str]) -> Dict[str, Dict]:
+        latest = {}
+        if self.shared is not None:
+            try:
+                # Entries live for one interval, so anything found is recent enough
+                found = await self.shared.aget_many(self.namespace, tickers)
+                latest = {ticker: quote for ticker, (quote, _) in found.items()}
+                self.shared_quotes += len(latest)
+            except Exception as e:
+                print(f"Shared quote read failed: {e}")
+
+        missing = [t for t in tickers if t not in latest]
+        if missing:
+            fetched = self._quote_rows(await self.fetch(missing))
+            latest.update(fetched)
+            if self.shared is not None and fetched:
+                try:
+                    await self.shared.aset_many(self.namespace, fetched, ttl=self.interval)
+                except Exception as e:
+                    print(f"Shared quote write failed: {e}")
+        return latest
+
+    async def poll_once(self):
+        tickers = self.watched()
+        if not tickers:
+            return
+
+        self.polls += 1
+        latest = await self._latest(tickers)
+
+        changed = {t: q for t, q in latest.items() if self._quotes.get(t) != q}
+        self._quotes.update(latest)
+        # Forget quotes nobody is watching any more
+        for ticker in set(self._quotes) - set(tickers):
+            del self._quotes[ticker]
+
+        if not changed:
+            return
+        for subscription in self._subscriptions:
+            relevant = [changed[t] for t in subscription.tickers if t in changed]
+            if relevant:
+                subscription.push(relevant)
+                self.pushed += len(relevant)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"Quote hub poll failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "clients": len(self._subscriptions),
+            "watched_tickers": len(self.watched()),
+            "interval": self.interval,
+            "polls": self.polls,
+            "shared_quotes": self.shared_quotes,
+            "quotes_pushed": self.pushed,
+            "errors": self.errors,
+        }
@@ -0,0 +1,211 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+# What a failed call means for the limiter
+THROTTLED = "throttled"   # upstream asked us to slow down: back off and shrink concurrency
+RETRYABLE = "retryable"   # transient failure: back off and try again
+
+
+class AdaptiveLimiter:
+    """
+    Client-side limits for one upstream.
+
+    - A token bucket caps the request rate at `rate` per second with bursts
+      of up to `burst`.
+    - The number of calls in flight is adjusted AIMD-style between
+      `min_concurrency` and `max_concurrency`: +1 per window of successes,
+      halved (at most once per `decrease_cooldown`) when the upstream throttles.
+    - Throttled and transient failures are retried with jittered exponential
+      backoff, up to `max_attempts` per call and within a shared retry budget:
+      every call earns `retry_ratio` retries, banked up to `budget_cap`, so
+      retries can't multiply load while the upstream is struggling.
+
+    `classify(exc)` returns THROTTLED, RETRYABLE or None (fail immediately).
+    Waiters are futures on the running loop; a limiter is used from one
+    event loop at a time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        classify: Callable[[BaseException], Optional[str]],
+        rate: float = 5.0,
+        burst: float = 10.0,
+        min_concurrency: int = 1,
+        max_concurrency: int = 10,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        retry_ratio: float = 0.2,
+        budget_cap: float = 10.0,
+        decrease_cooldown: float = 1.0,
+    ):
+        self.name = name
+        self.classify = classify
+        self.rate = rate
+        self.burst = burst
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_ratio = retry_ratio
+        self.budget_cap = budget_cap
+        self.decrease_cooldown = decrease_cooldown
+
+        self._tokens = burst
+        self._refilled_at = time.monotonic()
+        self._limit = float(max_concurrency)
+        self._in_flight = 0
+        self._waiters = deque()
+        self._decreased_at = 0.0
+        self._budget = budget_cap
+
+        self.calls = 0
+        self.attempts = 0
+        self.successes = 0
+        self.failures = 0
+        self.throttled = 0
+        self.retries = 0
+        self.retries_denied = 0
+        self.rate_wait_seconds = 0.0
+        self.concurrency_wait_seconds = 0.0
+
+    # --- Token bucket ---
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    async def _take_token(self):
+        started = time.monotonic()
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                break
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+        self.rate_wait_seconds += time.monotonic() - started
+
+    # --- AIMD concurrency ---
+
+    def _has_slot(self) -> bool:
+        return self._in_flight < max(self.min_concurrency, int(self._limit))
+
+    async def _acquire_slot(self):
+        started = time.monotonic()
+        while not self._has_slot():
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Woken, then cancelled before taking the slot (a timeout or a
+                # client disconnect): hand the wakeup on so it isn't lost
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_next()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self._in_flight += 1
+        self.concurrency_wait_seconds += time.monotonic() - started
+
+    def _wake_next(self):
+        while self._waiters and self._has_slot():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    def _release_slot(self, outcome: Optional[str]):
+        self._in_flight -= 1
+
+        if outcome == THROTTLED:
+            now = time.monotonic()
+            # One burst of 429s is one signal, not one halving per request
+            if now - self._decreased_at >= self.decrease_cooldown:
+                self._limit = max(self.min_concurrency, self._limit / 2)
+                self._decreased_at = now
+        elif outcome is None:
+            self._limit = min(self.max_concurrency, self._limit + 1 / max(self._limit, 1))
+
+        self._wake_next()
+
+    # --- Retries ---
+
+    def _should_retry(self, exc: BaseException) -> bool:
+        return self.classify(exc) in (THROTTLED, RETRYABLE)
+
+    def _budget_exhausted(self, retry_state) -> bool:
+        if self._budget >= 1:
+            self._budget -= 1
+            self.retries += 1
+            return False
+        self.retries_denied += 1
+        return True
+
+    async def _attempt(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs):
+        await self._take_token()
+        await self._acquire_slot()
+        self.attempts += 1
+        outcome = None
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            outcome = self.classify(e) or "error"
+            if outcome == THROTTLED:
+                self.throttled += 1
+            raise
+        finally:
+            self._release_slot(outcome)
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs):
+        """
+        Awaits fn(*args, **kwargs) under the rate and concurrency limits,
+        retrying throttled and transient failures. The last error is re-raised
+        once attempts or the retry budget run out.
+        """
+        self.calls += 1
+        self._budget = min(self.budget_cap, self._budget + self.retry_ratio)
+
+        retrying = AsyncRetrying(
+            retry=retry_if_exception(self._should_retry),
+            stop=stop_after_attempt(self.max_attempts) | self._budget_exhausted,
+            wait=wait_random_exponential(multiplier=self.backoff_base, max=self.backoff_max),
+            reraise=True,
+        )
+        try:
+            result = await retrying(self._attempt, fn, *args, **kwargs)
+        except Exception:
+            self.failures += 1
+            raise
+        self.successes += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "concurrency_limit": round(self._limit, 2),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "retry_budget": round(self._budget, 2),
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "retries_denied": self.retries_denied,
+            "rate_wait_seconds": round(self.rate_wait_seconds, 3),
+            "concurrency_wait_seconds": round(self.concurrency_wait_seconds, 3),
+        }
@@ -0,0 +1,132 @@
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class Job:
+    """
+    One periodic coroutine function plus its run history.
+    """
+
+    def __init__(self, name: str, fn: Callable[[], Awaitable[Any]], interval: float, jitter: float, run_at_start: bool):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.jitter = jitter
+        self.run_at_start = run_at_start
+
+        self.loop_task: Optional[asyncio.Task] = None
+        self.run_task: Optional[asyncio.Task] = None
+        self.next_run_at: Optional[datetime] = None
+        self.last_started_at: Optional[datetime] = None
+        self.last_finished_at: Optional[datetime] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+
+    @property
+    def running(self) -> bool:
+        return self.run_task is not None and not self.run_task.done()
+
+    def delay(self) -> float:
+        # Spread runs by +/- jitter of the interval so jobs (and workers) don't fire in lockstep
+        return max(0.0, self.interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval,
+            "jitter": self.jitter,
+            "running": self.running,
+            "next_run_at": self.next_run_at.isoformat() if self.next_run_at else None,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_finished_at": self.last_finished_at.isoformat() if self.last_finished_at else None,
+            "last_duration_ms": round(self.last_duration * 1000, 2) if self.last_duration is not None else None,
+            "last_error": self.last_error,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+        }
+
+
+class LoopScheduler:
+    """
+    Interval scheduler that runs coroutine jobs on the app's own event loop.
+
+    Each job sleeps a jittered interval between runs. A run that comes due
+    while the previous one is still going is skipped (and counted) rather
+    than stacked, so a slow upstream can't pile up overlapping refreshes.
+    """
+
+    def __init__(self, jitter: float = 0.1):
+        self.jitter = jitter
+        self.jobs: Dict[str, Job] = {}
+        self.started = False
+
+    def add_job(
+        self,
+        name: str,
+        fn: Callable[[], Awaitable[Any]],
+        interval_seconds: float,
+        jitter: Optional[float] = None,
+        run_at_start: bool = False,
+    ) -> Job:
+        job = Job(name, fn, interval_seconds, self.jitter if jitter is None else jitter, run_at_start)
+        self.jobs[name] = job
+        if self.started:
+            job.loop_task = asyncio.ensure_future(self._loop(job))
+        return job
+
+    async def _run(self, job: Job):
+        job.last_started_at = datetime.now()
+        started = time.monotonic()
+        try:
+            await job.fn()
+            job.last_error = None
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)[:200]
+            print(f"Scheduled job {job.name} failed: {e}")
+        finally:
+            job.runs += 1
+            job.last_duration = time.monotonic() - started
+            job.last_finished_at = datetime.now()
+
+    def _trigger(self, job: Job):
+        if job.running:
+            job.skipped += 1
+            print(f"Skipping {job.name}: previous run still in progress")
+            return
+        job.run_task = asyncio.ensure_future(self._run(job))
+
+    async def _loop(self, job: Job):
+        if job.run_at_start:
+            self._trigger(job)
+        while True:
+            delay = job.delay()
+            job.next_run_at = datetime.fromtimestamp(time.time() + delay)
+            await asyncio.sleep(delay)
+            self._trigger(job)
+
+    def start(self):
+        self.started = True
+        for job in self.jobs.values():
+            if job.loop_task is None or job.loop_task.done():
+                job.loop_task = asyncio.ensure_future(self._loop(job))
+
+    async def shutdown(self):
+        self.started = False
+        tasks = []
+        for job in self.jobs.values():
+            for task in (job.loop_task, job.run_task):
+                if task is not None and not task.done():
+                    task.cancel()
+                    tasks.append(task)
+            job.loop_task = job.run_task = None
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: job.stats() for name, job in self.jobs.items()}
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from services.db import ConnectionPool
+
+
+# Keys per IN (...) query, well under SQLite's bound-parameter limit
+_MANY_CHUNK = 500
+
+
+class SharedCache:
+    """
+    Cache tier shared by every worker process, stored in SQLite.
+
+    In-process caches stay the first stop; this tier sits behind them so a
+    value fetched upstream by one worker is reused by the others instead of
+    being fetched again. Entries carry the wall-clock time they were stored,
+    so readers can tell a newer copy from their own.
+    Keys are (namespace, key) with any JSON-encodable key; values are JSON.
+    """
+
+    def __init__(self, db: ConnectionPool, max_entries: int = 5000, table: str = "shared_cache"):
+        self.db = db
+        self.max_entries = max_entries
+        self.table = table
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @staticmethod
+    def _key(namespace: str, key: Hashable) -> str:
+        return json.dumps([namespace, key], default=str)
+
+    def init(self):
+        with self.db.transaction() as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_expires_at ON {self.table}(expires_at)")
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """
+        (value, stored_at wall-clock time), or None if missing or expired.
+        """
+        row = self.db.fetchone(
+            f"SELECT value, stored_at FROM {self.table} WHERE key = ? AND expires_at > ?",
+            (self._key(namespace, key), time.time())
+        )
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0]), row[1]
+
+    def get_many(self, namespace: str, keys: List[Hashable]) -> Dict[Hashable, Tuple[Any, float]]:
+        """
+        {key: (value, stored_at)} for the keys that are present and unexpired.
+        """
+        encoded = {self._key(namespace, key): key for key in keys}
+        found: Dict[Hashable, Tuple[Any, float]] = {}
+        now = time.time()
+        names = list(encoded)
+        for i in range(0, len(names), _MANY_CHUNK):
+            chunk = names[i:i + _MANY_CHUNK]
+            rows = self.db.fetchall(
+                f"SELECT key, value, stored_at FROM {self.table} "
+                f"WHERE key IN ({', '.join('?' * len(chunk))}) AND expires_at > ?",
+                (*chunk, now)
+            )
+            for name, value, stored_at in rows:
+                found[encoded[name]] = (json.loads(value), stored_at)
+        self.hits += len(found)
+        self.misses += len(encoded) - len(found)
+        return found
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: float, stored_at: Optional[float] = None):
+        self.set_many(namespace, {key: value}, ttl, stored_at)
+
+    def set_many(self, namespace: str, values: Dict[Hashable, Any], ttl: float, stored_at: Optional[float] = None):
+        now = time.time()
+        stored_at = now if stored_at is None else stored_at
+        with self.db.transaction() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+                [(self._key(namespace, key), json.dumps(value), stored_at, now + ttl) for key, value in values.items()]
+            )
+            # Evict expired rows, then the soonest to expire beyond the cap
+            conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+            conn.execute(f"""
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+        self.writes += len(values)
+
+    def delete(self, namespace: str, key: Hashable):
+        self.db.execute(f"DELETE FROM {self.table} WHERE key = ?", (self._key(namespace, key),))
+
+    # --- Async interface, on the db executor ---
+
+    async def aget(self, namespace: str, key: Hashable) -> Optional[Tuple[Any, float]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.db.executor, self.get, namespace, key)
+
+    async def aset(self, namespace: str, key: Hashable, value: Any, ttl: float, stored_at: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.db.executor, self.set, namespace, key, value, ttl, stored_at)
+
+    async def aget_many(self, namespace: str, keys: List[Hashable]) -> Dict[Hashable, Tuple[Any, float]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.db.executor, self.get_many, namespace, keys)
+
+    async def aset_many(self, namespace: str, values: Dict[Hashable, Any], ttl: float, stored_at: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.db.executor, self.set_many, namespace, values, ttl, stored_at)
+
+    async def adelete(self, namespace: str, key: Hashable):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.db.executor, self.delete, namespace, key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": self.db.fetchone(f"SELECT COUNT(*) FROM {self.table}")[0],
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+        }
@@ -0,0 +1,131 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from services.cache import SingleFlight
+from services.db import ConnectionPool
+
+
+class SummaryCache:
+    """
+    Persistent, content-addressed cache for model output stored in SQLite.
+    Keys are hashes of everything that determines the model's answer
+    (model ID, prompt template and input texts), so identical input is
+    only ever sent to the model once per TTL.
+
+    Reads don't write: hits are remembered in memory and their last_access
+    is applied in one batch, on the next `set` (before it evicts) or once
+    `touch_batch` hits have piled up. Expired rows are left for `set` to evict.
+    """
+
+    def __init__(self, db: ConnectionPool, ttl: float, max_entries: int, table: str = "summary_cache", touch_batch: int = 100):
+        self.db = db
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.table = table
+        self.touch_batch = touch_batch
+        self._touched: Dict[str, float] = {}
+        self._touched_lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            # Separator so ("ab", "c") and ("a", "bc") hash differently
+            digest.update(b"\x1f")
+        return digest.hexdigest()
+
+    def init(self):
+        with self.db.transaction() as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_last_access ON {self.table}(last_access)")
+
+    def _flush_touches(self, conn):
+        with self._touched_lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            conn.executemany(
+                f"UPDATE {self.table} SET last_access = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in touched.items()]
+            )
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        row = self.db.fetchone(
+            f"SELECT value FROM {self.table} WHERE key = ? AND created_at > ?", (key, now - self.ttl)
+        )
+        if row is None:
+            return None
+        with self._touched_lock:
+            self._touched[key] = now
+            pending = len(self._touched)
+        if pending >= self.touch_batch:
+            with self.db.transaction() as conn:
+                self._flush_touches(conn)
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict):
+        now = time.time()
+        with self.db.transaction() as conn:
+            self._flush_touches(conn)
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            # Evict expired rows, then the least recently used beyond the cap
+            conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(f"""
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Dict]],
+        cacheable: Callable[[Dict], bool] = lambda value: True,
+    ) -> Dict:
+        """
+        Returns the cached value for `key`, or runs `compute` once for all
+        concurrent callers and stores the result if `cacheable` accepts it.
+        """
+        loop = asyncio.get_running_loop()
+
+        async def load():
+            cached = await loop.run_in_executor(self.db.executor, self.get, key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+            self.misses += 1
+            value = await compute()
+            if cacheable(value):
+                await loop.run_in_executor(self.db.executor, self.set, key, value)
+            return value
+
+        return await self._flight.do(key, load)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "pending_touches": len(self._touched),
+            "coalesced": self._flight.coalesced,
+        }
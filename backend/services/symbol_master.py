@@ -0,0 +1,175 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Any, Dict, Iterable, List, Optional
+
+import yfinance as yf
+
+from services.db import ConnectionPool
+
+
+class SymbolMaster:
+    """
+    Local ticker -> company name table.
+
+    Seeded from the explore universe and existing favorites, and filled in
+    lazily from yfinance `.info` for anything else. Tickers yfinance has no
+    name for are remembered as missing for `negative_ttl` seconds, so a bad
+    ticker costs one upstream call per window rather than one per request.
+    Known names stay in memory as well as in SQLite. The async lookups run
+    on `executor`, a long-lived pool, so they share its bound and its
+    threads' database connections.
+    """
+
+    def __init__(self, db: ConnectionPool, executor: Executor, negative_ttl: float = 86400):
+        self.db = db
+        self.executor = executor
+        self.negative_ttl = negative_ttl
+
+        self._names: Dict[str, str] = {}
+        self._missing: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.upstream_lookups = 0
+
+    def init(self):
+        with self.db.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS symbols (
+                    ticker TEXT PRIMARY KEY,
+                    name TEXT,
+                    found INTEGER NOT NULL,
+                    source TEXT NOT NULL,
+                    checked_at REAL NOT NULL
+                )
+            """)
+
+        now = time.time()
+        for ticker, name, found, checked_at in self.db.fetchall("SELECT ticker, name, found, checked_at FROM symbols"):
+            if found:
+                self._names[ticker] = name
+            elif checked_at + self.negative_ttl > now:
+                self._missing[ticker] = checked_at + self.negative_ttl
+
+    def seed(self, symbols: Iterable[Dict], source: str):
+        """
+        Adds {"ticker", "name"} entries without overwriting known names.
+        """
+        now = time.time()
+        rows = [
+            (item["ticker"].upper(), item["name"], source, now)
+            for item in symbols if item.get("ticker") and item.get("name")
+        ]
+        with self.db.transaction() as conn:
+            # Seeded names replace earlier negative entries, never positive ones
+            conn.executemany("""
+                INSERT INTO symbols (ticker, name, found, source, checked_at) VALUES (?, ?, 1, ?, ?)
+                ON CONFLICT(ticker) DO UPDATE SET
+                    name = excluded.name, found = 1, source = excluded.source, checked_at = excluded.checked_at
+                WHERE symbols.found = 0
+            """, rows)
+        for ticker, name, _, _ in rows:
+            self._names.setdefault(ticker, name)
+            self._missing.pop(ticker, None)
+
+    def _lock_for(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(ticker)
+            if lock is None:
+                lock = self._locks[ticker] = threading.Lock()
+            return lock
+
+    def _cached(self, ticker: str):
+        """
+        (known, name): known is False when neither cache has an answer.
+        """
+        name = self._names.get(ticker)
+        if name is not None:
+            self.hits += 1
+            return True, name
+
+        expires_at = self._missing.get(ticker)
+        if expires_at is not None:
+            if expires_at > time.time():
+                self.negative_hits += 1
+                return True, None
+            self._missing.pop(ticker, None)
+
+        return False, None
+
+    def _remember(self, ticker: str, name: Optional[str]):
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO symbols (ticker, name, found, source, checked_at) VALUES (?, ?, ?, 'yfinance', ?)",
+            (ticker, name, 1 if name else 0, now)
+        )
+        if name:
+            self._names[ticker] = name
+        else:
+            self._missing[ticker] = now + self.negative_ttl
+
+    def resolve(self, ticker: str) -> Optional[str]:
+        """
+        Company name for `ticker`, or None if yfinance doesn't know it.
+        Blocking (may call yfinance); upstream errors propagate uncached.
+        """
+        ticker = ticker.upper()
+        known, name = self._cached(ticker)
+        if known:
+            return name
+
+        # One upstream lookup per ticker even when requests race
+        with self._lock_for(ticker):
+            known, name = self._cached(ticker)
+            if known:
+                return name
+
+            self.upstream_lookups += 1
+            info = yf.Ticker(ticker).info
+            name = info.get('longName') if info else None
+            self._remember(ticker, name)
+            return name
+
+    # --- Async interface: cache hits answer on the loop, lookups run on `executor` ---
+
+    async def aresolve(self, ticker: str) -> Optional[str]:
+        known, name = self._cached(ticker.upper())
+        if known:
+            return name
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.resolve, ticker)
+
+    async def aresolve_many(self, tickers: List[str]) -> Dict[str, Any]:
+        """
+        {ticker: name or None} for every ticker, answering what it can from
+        the caches and looking the rest up upstream concurrently. A value is
+        an Exception if that ticker's upstream lookup failed.
+        """
+        loop = asyncio.get_running_loop()
+        results: Dict[str, Any] = {}
+        unknown = []
+        for ticker in dict.fromkeys(t.upper() for t in tickers):
+            known, name = self._cached(ticker)
+            if known:
+                results[ticker] = name
+            else:
+                unknown.append(ticker)
+
+        lookups = [loop.run_in_executor(self.executor, self.resolve, ticker) for ticker in unknown]
+        for ticker, name in zip(unknown, await asyncio.gather(*lookups, return_exceptions=True)):
+            results[ticker] = name
+
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "known": len(self._names),
+            "negative": len(self._missing),
+            "negative_ttl": self.negative_ttl,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "upstream_lookups": self.upstream_lookups,
+        }